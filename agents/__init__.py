@@ -7,6 +7,7 @@ from .technical_analyst import get_block as technical_analyst_get_block
 from .strategy_generator import get_top_strategies_line as strategy_generator_get_line
 from .backtester_agent import run_backtest_line as backtester_agent_run_line
 from .final_decision import build_prompts as final_decision_build_prompts
+from .fast_path import match as fast_path_match, answer as fast_path_answer, stats as fast_path_stats
 
 __all__ = [
     "analyzer_run",
@@ -14,4 +15,7 @@ __all__ = [
     "strategy_generator_get_line",
     "backtester_agent_run_line",
     "final_decision_build_prompts",
+    "fast_path_match",
+    "fast_path_answer",
+    "fast_path_stats",
 ]
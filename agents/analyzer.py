@@ -21,6 +21,7 @@ def run(message: str) -> Dict[str, Any]:
       want_strategy: bool
       want_backtest: bool
       want_scan: bool
+      confidence: str  (intent detector's; "high" when symbols were found)
     """
     msg_lower = (message or "").lower().strip()
     want_strategy = any(k in msg_lower for k in ("strategy", "strategies", "策略", "推荐", "win rate", "胜率"))
@@ -37,6 +38,7 @@ def run(message: str) -> Dict[str, Any]:
             "want_strategy": want_strategy,
             "want_backtest": want_backtest,
             "want_scan": want_scan,
+            "confidence": "high" if symbols else "medium",
         }
 
     result = _detector.detect(message)
@@ -57,4 +59,5 @@ def run(message: str) -> Dict[str, Any]:
         "want_strategy": want_strategy,
         "want_backtest": want_backtest,
         "want_scan": want_scan,
+        "confidence": result.get("confidence", "medium"),
     }
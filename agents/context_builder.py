@@ -0,0 +1,134 @@
+"""
+Context builder: token-budgeted rules + data for the Final Decision prompt.
+At startup every rule file is split into its "## " sections and each section's tokens are
+counted once; per intent the sections are packed into RULES_TOKEN_BUDGET in RulesEngine.RULE_MAP
+order (most important file first, then section order), skipping sections that don't fit.
+The result is cached per intent, so it costs nothing per request and stays byte-identical
+(prompt-cache friendly). The stage blocks of stock_data_context ([Data], [Consensus], ...)
+are packed into DATA_TOKEN_BUDGET by DATA_PRIORITY, keeping their original order.
+Token counts use tiktoken when its encoding is available, else a chars/4 (CJK: 1/char) estimate.
+"""
+
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+RULES_TOKEN_BUDGET = int(os.getenv("RULES_TOKEN_BUDGET", "2000"))
+DATA_TOKEN_BUDGET = int(os.getenv("DATA_TOKEN_BUDGET", "600"))
+TOKEN_MODEL = "gpt-4o-mini"
+# Stage blocks, most important first; unknown blocks go last
+DATA_PRIORITY = ["[Data]", "[Consensus]", "[Backtest", "[Strategy pick]", "[Fit]", "[News"]
+
+_encoding: Any = None  # tiktoken encoding; False once we know it is unavailable
+_CJK = re.compile(r"[一-鿿]")
+
+
+def count_tokens(text: str) -> int:
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+            try:
+                _encoding = tiktoken.encoding_for_model(TOKEN_MODEL)
+            except KeyError:  # older tiktoken without the 4o tokenizer
+                _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"⚠️ tiktoken unavailable ({type(e).__name__}), estimating tokens")
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def split_sections(content: str) -> List[str]:
+    """Intro (title) + one chunk per "## " section."""
+    parts = re.split(r"(?m)^(?=## )", content)
+    return [p.strip("\n") for p in parts if p.strip()]
+
+
+def _block_rank(block: str) -> int:
+    head = block.lstrip()
+    return next((i for i, tag in enumerate(DATA_PRIORITY) if head.startswith(tag)), len(DATA_PRIORITY))
+
+
+def split_data_blocks(context: str) -> List[str]:
+    """stock_data_context → one block per "[Tag]" line with its continuation lines."""
+    blocks: List[str] = []
+    for line in context.strip("\n").split("\n"):
+        if line.startswith("[") or not blocks:
+            blocks.append(line)
+        else:
+            blocks[-1] += "\n" + line
+    return [b for b in blocks if b.strip()]
+
+
+class ContextBuilder:
+    """Per-intent rules within a token budget (precomputed), plus per-request data packing."""
+
+    def __init__(self, rules_engine: Any, rules_budget: int = RULES_TOKEN_BUDGET,
+                 data_budget: int = DATA_TOKEN_BUDGET):
+        self.rules_engine = rules_engine
+        self.rules_budget = rules_budget
+        self.data_budget = data_budget
+        # rule name -> [(section text, tokens)]
+        self.sections: Dict[str, List[Tuple[str, int]]] = {
+            name: [(sec, count_tokens(sec)) for sec in split_sections(content)]
+            for name, content in rules_engine.rules.items()
+        }
+        self._cache: Dict[Tuple[str, int], Tuple[str, int]] = {}
+        self.stats = {"data_tokens_in": 0, "data_tokens_out": 0, "data_blocks_dropped": 0}
+        for intent in rules_engine.RULE_MAP:
+            self.rules_for(intent)
+
+    def full_rule_tokens(self, intent: str) -> int:
+        return sum(t for name in self.rules_engine.get_rule_names(intent) for _, t in self.sections.get(name, []))
+
+    def rules_for(self, intent: str, budget: Optional[int] = None) -> str:
+        """Relevant rules for the intent packed into the budget (cached)."""
+        budget = self.rules_budget if budget is None else budget
+        key = (intent, budget)
+        if key not in self._cache:
+            picked: Dict[str, List[str]] = {}
+            used = 0
+            for name in self.rules_engine.get_rule_names(intent):
+                header = f"# {name.upper().replace('_', ' ')}"
+                header_tokens = count_tokens(header) + 1
+                for text, tokens in self.sections.get(name, []):
+                    cost = tokens + 1 + (0 if name in picked else header_tokens)
+                    if used + cost <= budget:
+                        picked.setdefault(name, []).append(text)
+                        used += cost
+            rules = "\n\n".join(
+                f"# {name.upper().replace('_', ' ')}\n" + "\n\n".join(texts) for name, texts in picked.items()
+            )
+            self._cache[key] = (rules, used)
+        return self._cache[key][0]
+
+    def rules_tokens(self, intent: str) -> int:
+        self.rules_for(intent)
+        return self._cache[(intent, self.rules_budget)][1]
+
+    def pack_data(self, context: str, budget: Optional[int] = None) -> str:
+        """Keep the most important stage blocks that fit the budget, in their original order.
+        The top block is always kept, so the model never loses the quote itself."""
+        if not context:
+            return context
+        budget = self.data_budget if budget is None else budget
+        blocks = [(b, count_tokens(b)) for b in split_data_blocks(context)]
+        keep = set()
+        used = 0
+        for i in sorted(range(len(blocks)), key=lambda i: (_block_rank(blocks[i][0]), i)):
+            if not keep or used + blocks[i][1] <= budget:
+                keep.add(i)
+                used += blocks[i][1]
+        total = sum(t for _, t in blocks)
+        self.stats["data_tokens_in"] += total
+        self.stats["data_tokens_out"] += used
+        self.stats["data_blocks_dropped"] += len(blocks) - len(keep)
+        return "\n" + "\n".join(b for i, (b, _) in enumerate(blocks) if i in keep) + "\n"
+
+    def summary(self) -> Dict[str, Tuple[int, int]]:
+        """{intent: (full rule tokens, packed rule tokens)}"""
+        return {intent: (self.full_rule_tokens(intent), self.rules_tokens(intent))
+                for intent in self.rules_engine.RULE_MAP}
@@ -0,0 +1,157 @@
+"""
+Fast path: answer plain quote / signal questions ("NVDA price?", "RKLB RSI", "AMD signal")
+without the LLM. Chosen when the intent detector is confident about exactly one symbol and
+the message is just that symbol plus a quote or signal keyword; the reply is the matching
+sections of ai_rules/response_templates.md (Standard Analysis, or Chinese Format for Chinese
+messages) filled from get_extended_stock_data and the strategy consensus.
+Anything the templates or data can't fill falls back to the full pipeline.
+"""
+
+import html
+import re
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+TEMPLATES_FILE = Path("ai_rules/response_templates.md")
+
+# kind -> keywords; kind picks the template sections (0 header, 1 technicals, 2 consensus, 3 setup)
+PATTERNS = {
+    "quote": ["price", "quote", "how much", "rsi", "ema", "technical", "technicals",
+              "价格", "股价", "现价", "多少钱", "技术面", "指标"],
+    "signal": ["signal", "signals", "consensus", "buy or sell", "信号", "共识", "买还是卖"],
+}
+SECTIONS = {"quote": (0, 1), "signal": (0, 2, 3)}
+# Words allowed besides the symbol and the keyword; anything else ("news", "compare", a second
+# ticker) means the question needs the full pipeline
+FILLER = {"what", "whats", "what's", "is", "the", "s", "of", "now", "today", "current", "latest", "live", "check"}
+FILLER_CJK = set("现在今天目前最新的是多少呢吗啊")
+
+_templates: Dict[str, List[str]] = {}
+stats = {"served": 0, "fallback": 0}
+
+_CJK = re.compile(r"[一-鿿]")
+
+
+def load_templates(path: Path = TEMPLATES_FILE) -> Dict[str, List[str]]:
+    """{"### heading": [sections of its first code block, split on blank lines]} (read once)."""
+    if not _templates and path.exists():
+        heading = None
+        for block in re.split(r"^(###\s+.+)$", path.read_text(encoding="utf-8"), flags=re.M):
+            if block.startswith("###"):
+                heading = block.strip("# ").strip()
+                continue
+            code = re.search(r"```\n(.*?)```", block, flags=re.S)
+            if heading and code:
+                _templates[heading] = [s.strip("\n") for s in re.split(r"\n\s*\n", code.group(1)) if s.strip()]
+    return _templates
+
+
+def match(message: str, intent_data: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    """(kind, symbol) when the message is a plain one-symbol lookup, else None."""
+    if intent_data.get("confidence") != "high" or intent_data.get("intent") not in ("stock_analysis", "general"):
+        return None
+    text = (message or "").lower()
+    keywords = {kw for kws in PATTERNS.values() for kw in kws}
+    # Only tickers typed as a word count: the detector's name matching also finds "ICE" in "price"
+    typed = [s for s in intent_data.get("symbols") or []
+             if s.lower() not in keywords and re.search(rf"(?<![a-z]){re.escape(s.lower())}(?![a-z])", text)]
+    if len(typed) != 1:
+        return None
+    symbol = typed[0]
+    for kind in ("signal", "quote"):  # "signal" first: "buy or sell" must not count as a quote
+        hit = next((kw for kw in PATTERNS[kind] if re.search(rf"(?<![a-z]){re.escape(kw)}(?![a-z])", text)), None)
+        if hit:
+            rest = re.sub(r"[^\w\s']", " ", text.replace(hit, " ").replace(symbol.lower(), " "))
+            words = [w for w in _CJK.sub(" ", rest).split() if w not in FILLER]
+            if not words and set(_CJK.findall(rest)) <= FILLER_CJK:
+                return kind, symbol
+    return None
+
+
+def _values(symbol: str, data: Dict[str, Any], consensus: Dict[str, Any]) -> Dict[str, Any]:
+    """Placeholder -> value; lists are used up in order ([price] appears several times)."""
+    price = float(data["current_price"])
+    support, resistance = float(data["support"]), float(data["resistance"])
+    action = consensus.get("action", "HOLD")
+    entry, target, stop = (price, support, resistance) if action == "SELL" else (price, resistance, support)
+    gain = abs(target - entry) / entry * 100 if entry else 0.0
+    risk = abs(entry - stop) / entry * 100 if entry else 0.0
+    rsi = float(data["rsi"])
+    rsi_label = "oversold" if rsi < 30 else "overbought" if rsi > 70 else "neutral"
+    above = price > float(data.get("ema_9", price))
+    reason = f"price {'above' if above else 'below'} EMA9 ${float(data.get('ema_9', price)):.2f}"
+    counts = {"BUY": consensus.get("buy_count", 0), "SELL": consensus.get("sell_count", 0),
+              "HOLD": consensus.get("hold_count", 0)}
+    tops = ", ".join(s["strategy"] for s in consensus.get("top_signals", [])[:3]) or "—"
+    prices = [f"{price:.2f}", f"{entry:.2f}", f"{target:.2f}", f"{stop:.2f}"]
+    return {
+        # Standard Analysis
+        "STOCK": symbol, "price": list(prices), "±X.X%": f"{data['price_change_pct']:+.1f}%",
+        "📈/📉": "📈" if data["price_change_pct"] >= 0 else "📉",
+        "bullish/bearish/neutral": data.get("trend_en", "neutral"), "one-line reason": reason,
+        "value": f"{rsi:.0f}", "oversold/neutral/overbought": rsi_label, "ratio": f"{data['volume_ratio']:.2f}",
+        "X": str(counts.get(action, 0)), "BUY/SELL/HOLD": action, "top 3 strategies": tops,
+        "reason for this level": "current price", "% gain": f"+{gain:.1f}%", "% risk": f"-{risk:.1f}%",
+        # Chinese Format
+        "股票": symbol, "价格": list(prices), "看涨/看跌/中性": data.get("trend", "中性"), "原因": reason,
+        "数值": f"{rsi:.0f}", "超卖/中性/超买": {"oversold": "超卖", "overbought": "超买"}.get(rsi_label, "中性"),
+        "比率": f"{data['volume_ratio']:.2f}", "买入/卖出/持有": {"BUY": "买入", "SELL": "卖出"}.get(action, "持有"),
+        "%收益": f"+{gain:.1f}%", "%风险": f"-{risk:.1f}%",
+    }
+
+
+def _fill(section: str, values: Dict[str, Any]) -> Optional[str]:
+    missing = []
+
+    def repl(m):
+        value = values.get(m.group(1))
+        if isinstance(value, list):
+            value = value.pop(0) if value else None
+        if value is None:
+            missing.append(m.group(1))
+            return m.group(0)
+        return html.escape(str(value))
+
+    out = re.sub(r"\[([^\[\]]+)\]", repl, section)
+    return None if missing else out
+
+
+def render(kind: str, symbol: str, data: Dict[str, Any], consensus: Dict[str, Any], chinese: bool = False) -> Optional[str]:
+    """Template text for kind, or None if a template section is missing or can't be filled."""
+    sections = load_templates().get("Chinese Format" if chinese else "Standard Analysis (Most Common)")
+    if not sections or max(SECTIONS[kind]) >= len(sections) or not data:
+        return None
+    values = _values(symbol, data, consensus)
+    total = consensus.get("total_agents", 0)
+    parts = []
+    for i in SECTIONS[kind]:
+        filled = _fill(sections[i], values)
+        if filled is None:
+            return None
+        parts.append(re.sub(r"/12(?!\d)", f"/{total}", filled))  # templates assume 12 agents
+    return "\n\n".join(parts)
+
+
+def answer(
+    message: str,
+    kind: str,
+    symbol: str,
+    *,
+    get_stock_data_fn: Callable[[str], Optional[Dict]],
+    orchestrator: Any = None,
+) -> Optional[str]:
+    """Blocking: fetch data + consensus and render (None -> use the full pipeline)."""
+    try:
+        data = get_stock_data_fn(symbol)
+        if not data:
+            return None
+        consensus = orchestrator.get_incremental_consensus(data, symbol) if orchestrator else {}
+        if kind == "signal" and not consensus:
+            return None
+        text = render(kind, symbol, data, consensus, chinese=bool(_CJK.search(message or "")))
+        if text:
+            text += f"\n\n<i>{html.escape(str(data.get('data_source', '')))} {html.escape(str(data.get('last_update', '')))}</i>"
+        return text
+    except Exception as e:
+        print(f"⚠️ Fast path {symbol}: {e}")
+        return None
@@ -0,0 +1,85 @@
+"""
+Tool prefetch: start get_stock_data / run_backtest / get_news for the analyzer's symbols
+as soon as the message arrives, so the results are ready (or nearly) when the model asks.
+Tool calls that match a prefetch take its result; anything else runs on demand.
+Prefetches the model never asked for are counted as wasted (see stats / /usage).
+"""
+
+import asyncio
+import functools
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from core.metrics import record
+
+from .tools import execute_tool
+
+PREFETCH_TOOLS = ("get_stock_data", "run_backtest", "get_news")
+
+# Own pool so speculative work never queues behind the ai_brain stages
+_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="prefetch")
+
+stats = {"started": 0, "used": 0, "wasted": 0, "on_demand": 0}
+
+
+def _key(tool_name: str, arguments: Dict[str, Any]) -> Tuple[str, str]:
+    return tool_name, (arguments.get("symbol") or "").strip().upper()
+
+
+class ToolPrefetcher:
+    """One per message: start() the speculative calls, run() each tool call, close() at the end."""
+
+    def __init__(
+        self,
+        *,
+        get_stock_data_fn: Optional[Callable[[str], Optional[Dict]]] = None,
+        orchestrator: Any = None,
+        tools: Iterable[str] = PREFETCH_TOOLS,
+    ):
+        self.get_stock_data_fn = get_stock_data_fn
+        self.orchestrator = orchestrator
+        self.tools = tuple(tools)
+        self._futures: Dict[Tuple[str, str], Future] = {}
+        self._used = set()
+
+    def _call(self, tool_name: str, arguments: Dict[str, Any]) -> Callable[[], str]:
+        return functools.partial(
+            execute_tool, tool_name, arguments,
+            get_stock_data_fn=self.get_stock_data_fn, orchestrator=self.orchestrator,
+        )
+
+    def start(self, symbols: Iterable[str]) -> None:
+        for symbol in symbols:
+            for tool_name in self.tools:
+                key = _key(tool_name, {"symbol": symbol})
+                if key[1] and key not in self._futures:
+                    self._futures[key] = _POOL.submit(self._call(tool_name, {"symbol": key[1]}))
+                    stats["started"] += 1
+
+    async def run(self, tool_name: str, arguments: Dict[str, Any]) -> str:
+        """Result of one tool call: the prefetched one if there is one, else run it now (off the loop)."""
+        key = _key(tool_name, arguments)
+        future = self._futures.get(key)
+        t0 = time.perf_counter()
+        if future is not None and not future.cancelled():
+            if key not in self._used:
+                self._used.add(key)
+                stats["used"] += 1
+            result = await asyncio.wrap_future(future)
+            record("prefetch.wait", time.perf_counter() - t0)
+            return result
+        stats["on_demand"] += 1
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(_POOL, self._call(tool_name, arguments))
+        record("prefetch.on_demand", time.perf_counter() - t0)
+        return result
+
+    def close(self) -> None:
+        """Count and drop the prefetches nobody asked for (queued ones are cancelled)."""
+        for key, future in self._futures.items():
+            if key not in self._used:
+                future.cancel()
+                stats["wasted"] += 1
+        self._futures.clear()
+        self._used.clear()
@@ -1,9 +1,17 @@
 """
 OpenAI function-calling tools: get_stock_data, run_backtest, get_news.
 Tool schemas for the API and executor that runs them (with injected dependencies).
+execute_tools() runs all tool calls of one model round concurrently under a shared timeout.
 """
 
-from typing import Any, Dict, List, Optional, Callable
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Dict, List, Optional, Callable, Sequence, Tuple
+
+TOOL_BATCH_TIMEOUT = 8.0  # seconds for a whole round of tool calls
+
+_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="tool")
 
 # OpenAI tool definitions (JSON schema for chat.completions.create(tools=...))
 OPENAI_TOOLS = [
@@ -121,3 +129,40 @@ def execute_tool(
             return f"Error: {e}"
 
     return f"Unknown tool: {tool_name}"
+
+
+async def execute_tools(
+    calls: Sequence[Tuple[str, Dict[str, Any]]],
+    *,
+    get_stock_data_fn: Optional[Callable[[str], Optional[Dict]]] = None,
+    orchestrator: Any = None,
+    runner: Optional[Callable[[str, Dict[str, Any]], Awaitable[str]]] = None,
+    timeout: float = TOOL_BATCH_TIMEOUT,
+) -> List[str]:
+    """
+    Run one round of (tool_name, arguments) calls concurrently; results come back in call order.
+    runner (e.g. ToolPrefetcher.run) replaces the default execute_tool-in-a-thread.
+    Calls still running after `timeout` get an error string so the round can continue.
+    """
+    if runner is None:
+        loop = asyncio.get_running_loop()
+
+        async def runner(name: str, args: Dict[str, Any]) -> str:
+            return await loop.run_in_executor(_POOL, functools.partial(
+                execute_tool, name, args, get_stock_data_fn=get_stock_data_fn, orchestrator=orchestrator,
+            ))
+
+    tasks = [asyncio.ensure_future(runner(name, args)) for name, args in calls]
+    if not tasks:
+        return []
+    await asyncio.wait(tasks, timeout=timeout)
+    results = []
+    for (name, _), task in zip(calls, tasks):
+        if not task.done():
+            task.cancel()
+            results.append(f"Error: {name} timed out after {timeout:.0f}s.")
+        elif task.exception() is not None:
+            results.append(f"Error: {task.exception()}")
+        else:
+            results.append(task.result())
+    return results
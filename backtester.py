@@ -1,112 +1,534 @@
 """
-Backtester - Simple historical backtest for strategy agents.
-Uses daily OHLCV from Yahoo to simulate signals and P&L (no execution simulation).
+Backtester - Historical backtest for strategy agents.
+Uses daily OHLCV from Yahoo (or core.synthetic_data with STOCK_DATA_PROVIDER=synthetic). Signals come from the agents bar by bar; positions,
+stops/targets, commission and slippage are simulated over NumPy arrays.
+walk_forward() re-optimizes params per rolling window and reports out-of-sample results only.
+Fetched frames are reused in-process and results are cached on disk (backtest_cache.json).
 """
 
-from typing import Dict, List, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
+import hashlib
 import json
+import math
+import os
+import threading
+import time
 
 try:
     import yfinance as yf
+except ImportError:
+    yf = None
+
+try:
+    import numpy as np
     import pandas as pd
 except ImportError:
-    yfinance = None
+    np = None
     pd = None
 
+try:
+    from core.synthetic_data import get_ticker, use_synthetic
+except ImportError:
+    get_ticker = None
+    use_synthetic = lambda: False
+
+
+# market_data key -> (DataFrame column, default when missing / NaN)
+_ROW_FIELDS = [
+    ("current_price", "Close", 0.0),
+    ("ema_5", "ema_5", 0.0),
+    ("ema_9", "ema_9", 0.0),
+    ("ema_21", "ema_21", 0.0),
+    ("rsi", "rsi", 50.0),
+    ("volume_ratio", "volume_ratio", 1.0),
+    ("support", "support", 0.0),
+    ("resistance", "resistance", 0.0),
+    ("bb_upper", "bb_upper", 0.0),
+    ("bb_middle", "bb_middle", 0.0),
+    ("bb_lower", "bb_lower", 0.0),
+    ("donchian_upper_20", "donchian_upper_20", 0.0),
+    ("donchian_lower_20", "donchian_lower_20", 0.0),
+    ("donchian_upper_40", "donchian_upper_40", 0.0),
+    ("donchian_lower_40", "donchian_lower_40", 0.0),
+    ("atr", "atr", 0.0),
+    ("week_52_high", "week_52_high", 0.0),
+    ("week_52_low", "week_52_low", 0.0),
+]
+
+_ACTION_CODES = {"BUY": 1, "SELL": -1}
+
+# Result cache: key -> result, persisted across restarts. Keys carry the last bar
+# date, so a new daily bar or a params change is a miss; nothing else expires.
+BACKTEST_CACHE_FILE = Path("backtest_cache.json")
+CACHE_VERSION = 1
+# Fetched + indicator frames are reused in-process for this long (one button press
+# backtests every strategy on the same symbol)
+FRAME_CACHE_SECONDS = 300
 
-def fetch_historical(symbol: str, days: int = 60) -> Optional[pd.DataFrame]:
-    """Fetch daily OHLCV for symbol. Returns DataFrame with Close, High, Low, Volume."""
-    if not yfinance or not pd:
+_frame_cache: Dict[Tuple[str, int], Tuple[float, Any]] = {}
+_result_cache: Optional[Dict[str, Dict[str, Any]]] = None
+_cache_lock = threading.RLock()
+cache_stats = {"hits": 0, "misses": 0, "frame_hits": 0, "frame_fetches": 0}
+
+
+@dataclass
+class BacktestCosts:
+    """
+    Execution cost model applied to simulated fills.
+    Commission: per share with a per-order minimum (IBKR-style).
+    Slippage: adverse move in basis points on market and stop fills
+    (entries, signal exits, stops, end of data). Target exits are limit orders: no slippage.
+    """
+    commission_per_share: float = 0.005
+    commission_min: float = 1.0
+    slippage_bps: float = 5.0
+
+    def commission(self, shares: int) -> float:
+        return max(self.commission_min, shares * self.commission_per_share) if shares > 0 else 0.0
+
+
+def fetch_historical(symbol: str, days: int = 60) -> Optional["pd.DataFrame"]:
+    """Fetch daily OHLCV for symbol. Returns DataFrame with Close, High, Low, Volume plus indicators."""
+    if not pd or not (yf or use_synthetic()):
         return None
     try:
-        ticker = yf.Ticker(symbol)
+        ticker = get_ticker(symbol) if get_ticker else yf.Ticker(symbol)
         df = ticker.history(period=f"{days}d", interval="1d")
         if df is None or len(df) < 14:
             return None
-        # EMAs
-        df["ema_5"] = df["Close"].ewm(span=5, adjust=False).mean()
-        df["ema_9"] = df["Close"].ewm(span=9, adjust=False).mean()
-        df["ema_21"] = df["Close"].ewm(span=21, adjust=False).mean()
-        
-        # RSI
-        delta = df["Close"].diff()
-        gain = delta.where(delta > 0, 0).rolling(14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
-        rs = gain / loss.replace(0, 1e-10)
-        df["rsi"] = 100 - (100 / (1 + rs))
-        
-        # Volume
-        df["volume_ratio"] = df["Volume"] / df["Volume"].rolling(20).mean().replace(0, 1)
-        
-        # Support/Resistance
-        df["support"] = df["Low"].rolling(20).min()
-        df["resistance"] = df["High"].rolling(20).max()
-        
-        # Bollinger Bands
-        df["sma_20"] = df["Close"].rolling(20).mean()
-        df["bb_std"] = df["Close"].rolling(20).std()
-        df["bb_upper"] = df["sma_20"] + (2 * df["bb_std"])
-        df["bb_middle"] = df["sma_20"]
-        df["bb_lower"] = df["sma_20"] - (2 * df["bb_std"])
-        
-        # Donchian Channels
-        df["donchian_upper_20"] = df["High"].rolling(20).max()
-        df["donchian_lower_20"] = df["Low"].rolling(20).min()
-        df["donchian_upper_40"] = df["High"].rolling(40).max()
-        df["donchian_lower_40"] = df["Low"].rolling(40).min()
-        
-        # ATR
-        high_low = df["High"] - df["Low"]
-        high_close = (df["High"] - df["Close"].shift()).abs()
-        low_close = (df["Low"] - df["Close"].shift()).abs()
-        df["true_range"] = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-        df["atr"] = df["true_range"].rolling(14).mean()
-        
-        # 52-week high/low
-        if len(df) >= 252:
-            df["week_52_high"] = df["High"].rolling(252).max()
-            df["week_52_low"] = df["Low"].rolling(252).min()
-        else:
-            df["week_52_high"] = df["High"].rolling(min(len(df), 60)).max()
-            df["week_52_low"] = df["Low"].rolling(min(len(df), 60)).min()
-        
-        return df
+        return add_indicators(df)
     except Exception as e:
         print(f"Backtest fetch error {symbol}: {e}")
         return None
 
 
+def load_historical(symbol: str, days: int = 60, use_cache: bool = True) -> Optional["pd.DataFrame"]:
+    """
+    fetch_historical() behind an in-process cache (FRAME_CACHE_SECONDS).
+    The returned frame is shared: read it, don't modify it.
+    """
+    key = (symbol.upper(), days)
+    if use_cache:
+        with _cache_lock:
+            hit = _frame_cache.get(key)
+            if hit and time.time() - hit[0] <= FRAME_CACHE_SECONDS:
+                cache_stats["frame_hits"] += 1
+                return hit[1]
+    df = fetch_historical(symbol, days)
+    with _cache_lock:
+        cache_stats["frame_fetches"] += 1
+        if df is not None:
+            _frame_cache[key] = (time.time(), df)
+    return df
+
+
+def params_hash(params: Any) -> str:
+    """Stable short hash of a params dict (or any JSON-able structure)."""
+    raw = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+
+def _result_prefix(kind: str, symbol: str, strategy: str, days: int) -> str:
+    return f"v{CACHE_VERSION}|{kind}|{symbol.upper()}|{strategy}|{days}"
+
+
+def _load_result_cache() -> Dict[str, Dict[str, Any]]:
+    global _result_cache
+    if _result_cache is None:
+        _result_cache = {}
+        if BACKTEST_CACHE_FILE.exists():
+            try:
+                _result_cache = json.loads(BACKTEST_CACHE_FILE.read_text(encoding="utf-8"))
+            except Exception as e:
+                print(f"Backtest cache unreadable, starting empty: {e}")
+    return _result_cache
+
+
+def _cached_result(key: str) -> Optional[Dict[str, Any]]:
+    with _cache_lock:
+        entry = _load_result_cache().get(key)
+        cache_stats["hits" if entry else "misses"] += 1
+        return json.loads(json.dumps(entry["result"])) if entry else None
+
+
+def _store_result(key: str, prefix: str, result: Dict[str, Any]) -> None:
+    """Save result under key, dropping older entries (earlier bars / old params) for the same prefix."""
+    with _cache_lock:
+        cache = _load_result_cache()
+        for stale in [k for k, v in cache.items() if v.get("prefix") == prefix]:
+            del cache[stale]
+        cache[key] = {"prefix": prefix, "saved_at": time.time(), "result": result}
+        try:
+            tmp = BACKTEST_CACHE_FILE.with_suffix(".tmp")
+            tmp.write_text(json.dumps(cache), encoding="utf-8")
+            os.replace(tmp, BACKTEST_CACHE_FILE)
+        except Exception as e:
+            print(f"Backtest cache save error: {e}")
+
+
+def clear_backtest_cache(disk: bool = True) -> None:
+    """Drop cached frames and results (and the cache file when disk=True)."""
+    global _result_cache
+    with _cache_lock:
+        _frame_cache.clear()
+        _result_cache = {} if disk else None
+        if disk and BACKTEST_CACHE_FILE.exists():
+            BACKTEST_CACHE_FILE.unlink()
+
+
+def _cache_key(prefix: str, params: Any, df: "pd.DataFrame") -> str:
+    return f"{prefix}|{params_hash(params)}|{str(df.index[-1])[:10]}"
+
+
+def add_indicators(df: "pd.DataFrame") -> "pd.DataFrame":
+    """Add the indicator columns the strategy agents read (EMA, RSI, BB, Donchian, ATR, 52w) in place."""
+    # EMAs
+    df["ema_5"] = df["Close"].ewm(span=5, adjust=False).mean()
+    df["ema_9"] = df["Close"].ewm(span=9, adjust=False).mean()
+    df["ema_21"] = df["Close"].ewm(span=21, adjust=False).mean()
+
+    # RSI
+    delta = df["Close"].diff()
+    gain = delta.where(delta > 0, 0).rolling(14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+    rs = gain / loss.replace(0, 1e-10)
+    df["rsi"] = 100 - (100 / (1 + rs))
+
+    # Volume
+    df["volume_ratio"] = df["Volume"] / df["Volume"].rolling(20).mean().replace(0, 1)
+
+    # Support/Resistance
+    df["support"] = df["Low"].rolling(20).min()
+    df["resistance"] = df["High"].rolling(20).max()
+
+    # Bollinger Bands
+    df["sma_20"] = df["Close"].rolling(20).mean()
+    df["bb_std"] = df["Close"].rolling(20).std()
+    df["bb_upper"] = df["sma_20"] + (2 * df["bb_std"])
+    df["bb_middle"] = df["sma_20"]
+    df["bb_lower"] = df["sma_20"] - (2 * df["bb_std"])
+
+    # Donchian Channels (prior N bars, so the close can break out of them)
+    df["donchian_upper_20"] = df["High"].shift(1).rolling(20).max()
+    df["donchian_lower_20"] = df["Low"].shift(1).rolling(20).min()
+    df["donchian_upper_40"] = df["High"].shift(1).rolling(40).max()
+    df["donchian_lower_40"] = df["Low"].shift(1).rolling(40).min()
+
+    # ATR
+    high_low = df["High"] - df["Low"]
+    high_close = (df["High"] - df["Close"].shift()).abs()
+    low_close = (df["Low"] - df["Close"].shift()).abs()
+    df["true_range"] = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
+    df["atr"] = df["true_range"].rolling(14).mean()
+
+    # 52-week high/low
+    if len(df) >= 252:
+        df["week_52_high"] = df["High"].rolling(252).max()
+        df["week_52_low"] = df["Low"].rolling(252).min()
+    else:
+        df["week_52_high"] = df["High"].rolling(min(len(df), 60)).max()
+        df["week_52_low"] = df["Low"].rolling(min(len(df), 60)).min()
+
+    return df
+
+
+def market_data_rows(df: "pd.DataFrame", start: int = 0) -> List[Dict[str, Any]]:
+    """
+    One agent-ready market_data dict per bar from `start` on (same keys as
+    get_extended_stock_data). Built column-wise from NumPy arrays, NaN -> default.
+    """
+    n = max(len(df) - start, 0)
+    cols: Dict[str, list] = {}
+    for key, col, default in _ROW_FIELDS:
+        if col in df.columns:
+            arr = df[col].to_numpy(dtype=float)[start:]
+            cols[key] = np.where(np.isnan(arr), default, arr).tolist()
+        else:
+            cols[key] = [default] * n
+    cols["trend_en"] = [
+        "bullish" if c > e else "bearish" for c, e in zip(cols["current_price"], cols["ema_9"])
+    ]
+    keys = list(cols)
+    return [dict(zip(keys, values)) for values in zip(*cols.values())]
+
+
+def generate_signals(agent: Any, rows: List[Dict[str, Any]]) -> List[Any]:
+    """Run agent.analyze on every row. Failed bars yield None (treated as HOLD)."""
+    signals = []
+    for market_data in rows:
+        try:
+            signals.append(agent.analyze(market_data))
+        except Exception:
+            signals.append(None)
+    return signals
+
+
+def signal_arrays(signals: List[Any], n_bars: int, start: int = 0) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """
+    Convert signals for bars start..n_bars-1 into (actions, stops, targets) arrays of length n_bars.
+    actions: 1 BUY, -1 SELL, 0 HOLD. stops/targets: NaN when the signal has none.
+    """
+    actions = np.zeros(n_bars, dtype=np.int8)
+    stops = np.full(n_bars, np.nan)
+    targets = np.full(n_bars, np.nan)
+    for i, sig in enumerate(signals, start):
+        if sig is None:
+            continue
+        actions[i] = _ACTION_CODES.get(sig.action, 0)
+        if sig.stop_loss:
+            stops[i] = sig.stop_loss
+        if sig.target:
+            targets[i] = sig.target
+    return actions, stops, targets
+
+
+def _first_true(mask: "np.ndarray") -> int:
+    """Index of the first True in mask, or -1."""
+    if not len(mask):
+        return -1
+    i = int(np.argmax(mask))
+    return i if mask[i] else -1
+
+
+def simulate_trades(
+    open_: "np.ndarray",
+    high: "np.ndarray",
+    low: "np.ndarray",
+    close: "np.ndarray",
+    actions: "np.ndarray",
+    stops: "np.ndarray",
+    targets: "np.ndarray",
+    *,
+    costs: Optional[BacktestCosts] = None,
+    initial_capital: float = 10_000.0,
+    position_pct: float = 100.0,
+) -> Dict[str, Any]:
+    """
+    Long-only position simulation.
+    A BUY on bar i's close enters at bar i+1's open. The position exits on the first of:
+    a SELL signal (fills at the next open), the signal's stop (Low <= stop), its target
+    (High >= target), or the last bar's close. When several happen on the same bar the
+    order is: open (signal exit / gap through a level), then stop, then target.
+    Sizing: position_pct of current equity, whole shares.
+    Returns {"trades": [...], "equity": np.ndarray} with bar indices in trades.
+    """
+    costs = costs or BacktestCosts()
+    slip = costs.slippage_bps / 10_000.0
+    n = len(close)
+    buy_bars = np.flatnonzero(actions[:-1] == 1) if n > 1 else np.array([], dtype=int)
+    sell_mask = actions == -1
+
+    cash = float(initial_capital)
+    shares_diff = np.zeros(n + 1)
+    cash_diff = np.zeros(n + 1)
+    trades: List[Dict[str, Any]] = []
+    cursor = 0
+    while True:
+        k = int(np.searchsorted(buy_bars, cursor))
+        if k >= len(buy_bars):
+            break
+        sig_bar = int(buy_bars[k])
+        entry_bar = sig_bar + 1
+        entry_px = float(open_[entry_bar]) * (1 + slip)
+        budget = cash * position_pct / 100.0
+        qty = int(budget // entry_px) if entry_px > 0 else 0
+        while qty > 0 and qty * entry_px + costs.commission(qty) > cash:
+            qty -= 1
+        if qty <= 0:
+            break
+
+        stop = stops[sig_bar]
+        target = targets[sig_bar]
+        seg = slice(entry_bar, n)
+        exit_bar, exit_px, reason = n - 1, float(close[n - 1]) * (1 - slip), "end"
+        j = _first_true(sell_mask[entry_bar:n - 1])
+        if j >= 0:
+            exit_bar, exit_px, reason = entry_bar + j + 1, float(open_[entry_bar + j + 1]) * (1 - slip), "signal"
+        if not np.isnan(stop):
+            s = _first_true(low[seg] <= stop)
+            if s >= 0 and (entry_bar + s < exit_bar or (entry_bar + s == exit_bar and reason == "end")):
+                b = entry_bar + s
+                exit_bar, exit_px, reason = b, min(float(open_[b]), float(stop)) * (1 - slip), "stop"
+        if not np.isnan(target):
+            t = _first_true(high[seg] >= target)
+            if t >= 0 and (entry_bar + t < exit_bar or (entry_bar + t == exit_bar and reason == "end")):
+                b = entry_bar + t
+                exit_bar, exit_px, reason = b, max(float(open_[b]), float(target)), "target"
+
+        comm = costs.commission(qty) * 2
+        pnl = qty * (exit_px - entry_px) - comm
+        cash += pnl
+        shares_diff[entry_bar] += qty
+        shares_diff[exit_bar] -= qty
+        cash_diff[entry_bar] -= qty * entry_px + costs.commission(qty)
+        cash_diff[exit_bar] += qty * exit_px - costs.commission(qty)
+        trades.append({
+            "entry_bar": entry_bar,
+            "exit_bar": exit_bar,
+            "entry_price": round(entry_px, 4),
+            "exit_price": round(exit_px, 4),
+            "shares": qty,
+            "pnl": round(pnl, 2),
+            "return_pct": round(pnl / (qty * entry_px) * 100, 3),
+            "exit_reason": reason,
+        })
+        cursor = exit_bar
+
+    shares = np.cumsum(shares_diff[:n])
+    equity = initial_capital + np.cumsum(cash_diff[:n]) + shares * close
+    return {"trades": trades, "equity": equity}
+
+
+def compute_metrics(
+    equity: "np.ndarray",
+    trades: List[Dict[str, Any]],
+    initial_capital: float = 10_000.0,
+    periods_per_year: int = 252,
+) -> Dict[str, Any]:
+    """Win rate, profit factor, max drawdown, Sharpe and return from an equity curve and trade list."""
+    pnls = np.array([t["pnl"] for t in trades], dtype=float)
+    wins = pnls[pnls > 0]
+    losses = pnls[pnls <= 0]
+    gross_win = float(wins.sum())
+    gross_loss = float(-losses.sum())
+    if gross_loss > 0:
+        profit_factor = round(gross_win / gross_loss, 3)
+    else:
+        profit_factor = math.inf if gross_win > 0 else 0.0
+
+    final_equity = float(equity[-1]) if len(equity) else float(initial_capital)
+    if len(equity) > 1:
+        peak = np.maximum.accumulate(equity)
+        max_dd = float(((peak - equity) / peak).max()) * 100
+        rets = np.diff(equity) / equity[:-1]
+        std = float(rets.std(ddof=1)) if len(rets) > 1 else 0.0
+        sharpe = float(rets.mean()) / std * math.sqrt(periods_per_year) if std > 0 else 0.0
+    else:
+        max_dd, sharpe = 0.0, 0.0
+    held = sum(t["exit_bar"] - t["entry_bar"] for t in trades)
+
+    return {
+        "trades": len(trades),
+        "wins": int(len(wins)),
+        "losses": int(len(losses)),
+        "win_rate": round(len(wins) / len(trades) * 100, 1) if trades else 0.0,
+        "profit_factor": profit_factor,
+        "total_pnl": round(final_equity - initial_capital, 2),
+        "total_return_pct": round((final_equity / initial_capital - 1) * 100, 2),
+        "final_equity": round(final_equity, 2),
+        "max_drawdown_pct": round(max_dd, 2),
+        "sharpe": round(sharpe, 2),
+        "avg_trade_pct": round(float(np.mean([t["return_pct"] for t in trades])), 3) if trades else 0.0,
+        "exposure_pct": round(held / len(equity) * 100, 1) if len(equity) else 0.0,
+    }
+
+
+def backtest_frame(
+    df: "pd.DataFrame",
+    agent: Any,
+    start_idx: int = 41,
+    *,
+    costs: Optional[BacktestCosts] = None,
+    initial_capital: float = 10_000.0,
+    position_pct: float = 100.0,
+    rows: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """
+    P&L backtest of one agent over an indicator DataFrame (see add_indicators).
+    rows: precomputed market_data_rows(df, start_idx), to reuse across many agents.
+    Returns signals, trades (with dates), equity curve and metrics.
+    """
+    if rows is None:
+        rows = market_data_rows(df, start_idx)
+    signals = generate_signals(agent, rows)
+    actions, stops, targets = signal_arrays(signals, len(df), start_idx)
+    sim = simulate_trades(
+        df["Open"].to_numpy(dtype=float),
+        df["High"].to_numpy(dtype=float),
+        df["Low"].to_numpy(dtype=float),
+        df["Close"].to_numpy(dtype=float),
+        actions,
+        stops,
+        targets,
+        costs=costs,
+        initial_capital=initial_capital,
+        position_pct=position_pct,
+    )
+    for t in sim["trades"]:
+        t["entry_date"] = str(df.index[t["entry_bar"]])[:10]
+        t["exit_date"] = str(df.index[t["exit_bar"]])[:10]
+    return {
+        "signals": signals,
+        "actions": actions,
+        "trades": sim["trades"],
+        "equity_curve": sim["equity"],
+        "metrics": compute_metrics(sim["equity"], sim["trades"], initial_capital),
+    }
+
+
+def run_pnl_backtest(
+    symbol: str,
+    agent: Any,
+    days: int = 756,
+    *,
+    costs: Optional[BacktestCosts] = None,
+    initial_capital: float = 10_000.0,
+    position_pct: float = 100.0,
+) -> Dict[str, Any]:
+    """
+    Full P&L backtest for one StrategyAgent over N days of daily bars:
+    trades, equity curve and metrics (win rate, profit factor, max drawdown, Sharpe).
+    """
+    df = load_historical(symbol, days)
+    if df is None or agent is None:
+        return {"error": "No data or agent", "total_days": 0}
+    bt = backtest_frame(
+        df, agent, costs=costs, initial_capital=initial_capital, position_pct=position_pct
+    )
+    return {
+        "symbol": symbol,
+        "strategy": agent.skill_name,
+        "total_days": len(df),
+        "metrics": bt["metrics"],
+        "trades": bt["trades"],
+        "equity_curve": [round(float(x), 2) for x in bt["equity_curve"]],
+        "dates": [str(d)[:10] for d in df.index],
+    }
+
+
 def run_backtest(
     symbol: str,
     orchestrator: Any,
     days: int = 60,
+    use_cache: bool = True,
 ) -> Dict[str, Any]:
     """
     Run a simple backtest: for each day, build market_data from row,
     get consensus signal. If BUY, record "trade" (no real P&L, just count).
     Returns summary: total_signals, buy_days, sell_days, sample_signals.
+    Cached per (symbol, all agents' params, last bar date).
     """
-    df = fetch_historical(symbol, days)
-    if df is None or orchestrator is None:
+    if orchestrator is None:
         return {"error": "No data or no orchestrator", "total_days": 0}
+    df = load_historical(symbol, days, use_cache)
+    if df is None:
+        return {"error": "No data or no orchestrator", "total_days": 0}
+    prefix = _result_prefix("consensus", symbol, "all", days)
+    key = _cache_key(prefix, {a.skill_name: a.params for a in orchestrator.agents}, df)
+    if use_cache:
+        cached = _cached_result(key)
+        if cached is not None:
+            return cached
 
     buy_days = 0
     sell_days = 0
     sample_signals = []
 
-    for i in range(21, len(df)):
-        row = df.iloc[i]
-        market_data = {
-            "current_price": float(row["Close"]),
-            "ema_9": float(row["ema_9"]),
-            "ema_21": float(row["ema_21"]),
-            "rsi": float(row["rsi"]) if not pd.isna(row["rsi"]) else 50,
-            "volume_ratio": float(row["volume_ratio"]) if not pd.isna(row["volume_ratio"]) else 1.0,
-            "support": float(row["support"]),
-            "resistance": float(row["resistance"]),
-            "trend_en": "bullish" if row["Close"] > row["ema_9"] else "bearish",
-        }
+    start_idx = 21
+    for i, market_data in enumerate(market_data_rows(df, start_idx), start_idx):
         try:
             result = orchestrator.get_consensus_signal(market_data, symbol)
             if result["action"] == "BUY":
@@ -122,8 +544,8 @@ def run_backtest(
         except Exception as e:
             pass
 
-    total_days = len(df) - 21
-    return {
+    total_days = len(df) - start_idx
+    result = {
         "symbol": symbol,
         "total_days": total_days,
         "buy_days": buy_days,
@@ -131,67 +553,57 @@ def run_backtest(
         "hold_days": total_days - buy_days - sell_days,
         "sample_signals": sample_signals,
     }
+    _store_result(key, prefix, result)
+    return result
 
 
 def run_backtest_single_strategy(
     symbol: str,
     agent: Any,
     days: int = 60,
+    use_cache: bool = True,
 ) -> Dict[str, Any]:
     """
     Run backtest using one StrategyAgent (not orchestrator).
-    Returns per-strategy BUY/SELL/HOLD counts for the symbol over N days.
+    Returns per-strategy BUY/SELL/HOLD counts for the symbol over N days,
+    plus "pnl": simulated-trade metrics (see backtest_frame).
+    Cached per (symbol, strategy, params, last bar date).
     """
-    df = fetch_historical(symbol, days)
-    if df is None or agent is None:
+    if agent is None:
         return {"error": "No data or agent", "total_days": 0}
-    
+    df = load_historical(symbol, days, use_cache)
+    if df is None:
+        return {"error": "No data or agent", "total_days": 0}
+    prefix = _result_prefix("single", symbol, agent.skill_name, days)
+    key = _cache_key(prefix, agent.params, df)
+    if use_cache:
+        cached = _cached_result(key)
+        if cached is not None:
+            return cached
+
+    # Start at 41 to have enough data for 40-period Donchian
+    start_idx = max(41, 21)
+    bt = backtest_frame(df, agent, start_idx)
+
     buy_days = 0
     sell_days = 0
     sample_signals = []
-    
-    # Start at 41 to have enough data for 40-period Donchian
-    start_idx = max(41, 21)
-    for i in range(start_idx, len(df)):
-        row = df.iloc[i]
-        market_data = {
-            "current_price": float(row["Close"]),
-            "ema_5": float(row["ema_5"]) if "ema_5" in row and not pd.isna(row["ema_5"]) else 0,
-            "ema_9": float(row["ema_9"]),
-            "ema_21": float(row["ema_21"]),
-            "rsi": float(row["rsi"]) if not pd.isna(row["rsi"]) else 50,
-            "volume_ratio": float(row["volume_ratio"]) if not pd.isna(row["volume_ratio"]) else 1.0,
-            "support": float(row["support"]),
-            "resistance": float(row["resistance"]),
-            "trend_en": "bullish" if row["Close"] > row["ema_9"] else "bearish",
-            "bb_upper": float(row["bb_upper"]) if "bb_upper" in row and not pd.isna(row["bb_upper"]) else 0,
-            "bb_middle": float(row["bb_middle"]) if "bb_middle" in row and not pd.isna(row["bb_middle"]) else 0,
-            "bb_lower": float(row["bb_lower"]) if "bb_lower" in row and not pd.isna(row["bb_lower"]) else 0,
-            "donchian_upper_20": float(row["donchian_upper_20"]) if "donchian_upper_20" in row and not pd.isna(row["donchian_upper_20"]) else 0,
-            "donchian_lower_20": float(row["donchian_lower_20"]) if "donchian_lower_20" in row and not pd.isna(row["donchian_lower_20"]) else 0,
-            "donchian_upper_40": float(row["donchian_upper_40"]) if "donchian_upper_40" in row and not pd.isna(row["donchian_upper_40"]) else 0,
-            "donchian_lower_40": float(row["donchian_lower_40"]) if "donchian_lower_40" in row and not pd.isna(row["donchian_lower_40"]) else 0,
-            "atr": float(row["atr"]) if "atr" in row and not pd.isna(row["atr"]) else 0,
-            "week_52_high": float(row["week_52_high"]) if "week_52_high" in row and not pd.isna(row["week_52_high"]) else 0,
-            "week_52_low": float(row["week_52_low"]) if "week_52_low" in row and not pd.isna(row["week_52_low"]) else 0,
-        }
-        try:
-            signal = agent.analyze(market_data)
-            if signal.action == "BUY":
-                buy_days += 1
-            elif signal.action == "SELL":
-                sell_days += 1
-            if len(sample_signals) < 3:
-                sample_signals.append({
-                    "date": str(df.index[i])[:10],
-                    "action": signal.action,
-                    "reason": signal.reasoning[:50],
-                })
-        except Exception as e:
-            pass
-    
+    for i, signal in enumerate(bt["signals"], start_idx):
+        if signal is None:
+            continue
+        if signal.action == "BUY":
+            buy_days += 1
+        elif signal.action == "SELL":
+            sell_days += 1
+        if len(sample_signals) < 3:
+            sample_signals.append({
+                "date": str(df.index[i])[:10],
+                "action": signal.action,
+                "reason": signal.reasoning[:50],
+            })
+
     total_days = len(df) - start_idx
-    return {
+    result = {
         "symbol": symbol,
         "strategy": agent.skill_name,
         "total_days": total_days,
@@ -199,4 +611,141 @@ def run_backtest_single_strategy(
         "sell_days": sell_days,
         "hold_days": total_days - buy_days - sell_days,
         "sample_signals": sample_signals,
+        "pnl": bt["metrics"],
     }
+    _store_result(key, prefix, result)
+    return result
+
+
+def walk_forward_windows(n_bars: int, train_bars: int, test_bars: int, start: int = 41) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """Rolling (in_sample, out_of_sample) bar ranges; out-of-sample windows tile the tail without overlap."""
+    windows = []
+    s = start
+    while s + train_bars + test_bars <= n_bars:
+        windows.append(((s, s + train_bars), (s + train_bars, s + train_bars + test_bars)))
+        s += test_bars
+    return windows
+
+
+def _stitch_oos(steps: List[Dict[str, Any]], symbol: str, initial_capital: float) -> Tuple["np.ndarray", List[Dict[str, Any]]]:
+    """Chain one symbol's out-of-sample windows into a single compounded equity curve and trade list."""
+    curves = []
+    trades = []
+    level = initial_capital
+    offset = 0
+    for step in steps:
+        oos = step["oos"][symbol]
+        scale = level / initial_capital
+        curve = np.asarray(oos["equity_curve"], dtype=float) * scale
+        for t in oos["trades"]:
+            t = dict(t, pnl=round(t["pnl"] * scale, 2))
+            t["entry_bar"] += offset
+            t["exit_bar"] += offset
+            trades.append(t)
+        curves.append(curve)
+        level = float(curve[-1])
+        offset += len(curve)
+    return np.concatenate(curves), trades
+
+
+def walk_forward(
+    strategies: List[str],
+    symbols: List[str],
+    *,
+    spaces: Optional[Dict[str, Dict[str, Any]]] = None,
+    train_bars: int = 252,
+    test_bars: int = 63,
+    days: int = 1260,
+    metric: str = "sharpe",
+    search: str = "grid",
+    n_random: int = 50,
+    seed: Optional[int] = None,
+    history: Optional[Dict[str, Any]] = None,
+    costs: Optional[BacktestCosts] = None,
+    min_trades: int = 1,
+    initial_capital: float = 10_000.0,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Walk-forward analysis: for each rolling window, re-optimize the strategy's params
+    on train_bars in-sample bars (strategy_optimizer search space), then trade them
+    unchanged on the next test_bars bars. Out-of-sample windows are stitched into one
+    equity curve per symbol, so the reported metrics never see the data they were tuned on.
+
+    Indicators are computed once over the whole history and sliced per window; every
+    (strategy, window) runs as its own task on a process pool (max_workers=0: in-process).
+    Returns {strategy: {"windows", "per_symbol", "metrics", "in_sample_metric", "equity_curves"}}.
+    """
+    from strategy_optimizer import (
+        DEFAULT_SPACES,
+        init_worker,
+        load_history,
+        make_combinations,
+        optimize_window,
+        prepare_history,
+        summarize_metrics,
+    )
+
+    spaces = spaces or DEFAULT_SPACES
+    combos = {}
+    for strategy in strategies:
+        if not spaces.get(strategy):
+            return {"error": f"No search space for {strategy}"}
+        combos[strategy] = make_combinations(spaces[strategy], search, n_random, seed)
+
+    history = history if history is not None else load_history(symbols, days)
+    history = {s: history[s] for s in symbols if s in history}
+    if not history:
+        return {"error": "No history for any symbol"}
+    # Align symbols on their common most recent bars so windows cover the same dates
+    n_bars = min(len(df) for df in history.values())
+    history = {s: df.iloc[-n_bars:] for s, df in history.items()}
+    windows = walk_forward_windows(n_bars, train_bars, test_bars)
+    if not windows:
+        return {"error": f"Need at least {41 + train_bars + test_bars} bars, have {n_bars}"}
+
+    all_combos = [c for cs in combos.values() for c in cs]
+    prepared = prepare_history(history, all_combos)
+    tasks = [(strategy, w) for strategy in strategies for w in windows]
+
+    def _args(task):
+        strategy, (in_sample, out_sample) = task
+        return (strategy, combos[strategy], in_sample, out_sample, metric, min_trades, costs, initial_capital)
+
+    if max_workers == 0:
+        init_worker(prepared)
+        steps = [optimize_window(*_args(t)) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker, initargs=(prepared,)) as pool:
+            futures = [pool.submit(optimize_window, *_args(t)) for t in tasks]
+            steps = [f.result() for f in futures]
+
+    dates = next(iter(history.values())).index
+    report: Dict[str, Any] = {}
+    for strategy in strategies:
+        strategy_steps = [st for (name, _), st in zip(tasks, steps) if name == strategy]
+        per_symbol = {}
+        curves = {}
+        for symbol in history:
+            equity, trades = _stitch_oos(strategy_steps, symbol, initial_capital)
+            per_symbol[symbol] = compute_metrics(equity, trades, initial_capital)
+            curves[symbol] = [round(float(x), 2) for x in equity]
+        is_values = [st["in_sample_metrics"].get(metric, 0.0) for st in strategy_steps]
+        report[strategy] = {
+            "metric": metric,
+            "windows": [
+                {
+                    "in_sample": f"{str(dates[st['in_sample'][0]])[:10]}..{str(dates[st['in_sample'][1] - 1])[:10]}",
+                    "out_of_sample": f"{str(dates[st['out_sample'][0]])[:10]}..{str(dates[st['out_sample'][1] - 1])[:10]}",
+                    "params": st["params"],
+                    "in_sample_metric": st["in_sample_metrics"].get(metric, 0.0),
+                    "oos_metric": summarize_metrics({s: o["metrics"] for s, o in st["oos"].items()}).get(metric, 0.0),
+                }
+                for st in strategy_steps
+            ],
+            "in_sample_metric": round(sum(is_values) / len(is_values), 3),
+            "per_symbol": per_symbol,
+            "metrics": summarize_metrics(per_symbol),
+            "equity_curves": curves,
+        }
+    return report
@@ -0,0 +1,24 @@
+"""
+Shared pytest fixtures.
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def _random_ohlcv(n, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, n)))
+    open_ = close * (1 + rng.normal(0, 0.004, n))
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, n))
+    volume = rng.integers(1_000_000, 5_000_000, n).astype(float)
+    idx = pd.bdate_range("2015-01-02", periods=n)
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}, index=idx)
+
+
+@pytest.fixture
+def random_ohlcv():
+    """random_ohlcv(n, seed=0): seeded random-walk daily OHLCV bars from 2015-01-02."""
+    return _random_ohlcv
@@ -0,0 +1,112 @@
+"""
+Answer Cache - Reuse LLM answers for repeated questions on an unchanged market snapshot.
+Key = normalized query + intent + symbols + a quantized snapshot per symbol (price in
+PRICE_STEP log buckets, RSI in RSI_STEP buckets, consensus action), so "NVDA entry?"
+asked twice a minute is answered once, but a real move in price / RSI / consensus misses.
+Entries expire after the session TTL and never outlive the session they were made in
+(pre / regular / post / closed, New York time). Hits do not cost an AI call.
+"""
+
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import pytz
+
+MARKET_TZ = pytz.timezone("America/New_York")
+MAX_ENTRIES = 512
+PRICE_STEP = 0.005  # 0.5% price buckets
+RSI_STEP = 5
+# Seconds an answer stays valid per session; the regular session moves fastest
+SESSION_TTL = {"regular": 180, "pre": 600, "post": 600, "closed": 3600}
+# Session boundaries in minutes after midnight, New York time (same as intraday_backtester)
+_SESSIONS = (("pre", 240, 570), ("regular", 570, 960), ("post", 960, 1200))
+
+_lock = threading.Lock()
+_entries: "OrderedDict[Tuple, Tuple[float, str]]" = OrderedDict()
+stats = {"hits": 0, "misses": 0, "stores": 0, "expired": 0}
+
+
+def market_session(now: Optional[datetime] = None) -> Tuple[str, datetime]:
+    """(session, end of that session) for `now` (default: current time)."""
+    now = (now or datetime.now(pytz.utc)).astimezone(MARKET_TZ)
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    minutes = now.hour * 60 + now.minute
+    if now.weekday() < 5:
+        for name, lo, hi in _SESSIONS:
+            if lo <= minutes < hi:
+                return name, midnight + timedelta(minutes=hi)
+    # Closed until the next weekday's pre-market
+    day = midnight if now.weekday() < 5 and minutes < 240 else midnight + timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return "closed", day + timedelta(minutes=240)
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, drop punctuation, collapse whitespace (CJK characters are kept)."""
+    text = re.sub(r"[^\w\s$.]", " ", text.lower())
+    return " ".join(text.split()).strip(" .")
+
+
+def snapshot(stock_data: Dict[str, Dict[str, Any]], actions: Optional[Dict[str, str]] = None) -> Tuple:
+    """Quantized (symbol, price bucket, RSI bucket, consensus action) per symbol."""
+    out = []
+    for sym in sorted(stock_data):
+        data = stock_data[sym]
+        price = float(data.get("current_price") or 0)
+        price_bucket = round(math.log(price) / math.log1p(PRICE_STEP)) if price > 0 else 0
+        rsi_bucket = int(float(data.get("rsi") or 50) // RSI_STEP)
+        out.append((sym, price_bucket, rsi_bucket, (actions or {}).get(sym, "")))
+    return tuple(out)
+
+
+def make_key(query: str, intent: str, symbols: Iterable[str], snap: Tuple = ()) -> Tuple:
+    return (normalize_query(query), intent or "", tuple(sorted(set(symbols))), snap)
+
+
+def get(key: Optional[Tuple]) -> Optional[str]:
+    if key is None:
+        return None
+    now = time.time()
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[0] <= now:
+            del _entries[key]
+            stats["expired"] += 1
+            entry = None
+        if entry is None:
+            stats["misses"] += 1
+            return None
+        _entries.move_to_end(key)
+        stats["hits"] += 1
+        return entry[1]
+
+
+def put(key: Optional[Tuple], answer: str, now: Optional[datetime] = None) -> None:
+    if key is None or not answer:
+        return
+    session, session_end = market_session(now)
+    ttl = min(SESSION_TTL[session], (session_end - (now or datetime.now(pytz.utc))).total_seconds())
+    with _lock:
+        _entries[key] = (time.time() + ttl, answer)
+        _entries.move_to_end(key)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
+        stats["stores"] += 1
+
+
+def hit_rate() -> float:
+    lookups = stats["hits"] + stats["misses"]
+    return stats["hits"] / lookups if lookups else 0.0
+
+
+def clear() -> None:
+    with _lock:
+        _entries.clear()
+        for k in stats:
+            stats[k] = 0
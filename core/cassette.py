@@ -0,0 +1,356 @@
+"""
+Cassette - Record / replay of outbound HTTP traffic.
+Hooks httpx (OpenAI, Telegram), requests (yfinance, Finnhub, news pages) and
+feedparser.parse (RSS) at the transport level, so call sites don't change.
+
+CASSETTE_MODE     off (default) | record | replay
+CASSETTE_DIR      where cassettes live (default: cassettes/)
+CASSETTE_NAME     cassette file name without .jsonl (default: default)
+CASSETTE_LATENCY  replay delay: 0 (default), "recorded" (original timings),
+                  "recorded*2" (scaled), "250" (fixed ms) or "100-400" (uniform ms)
+
+Replay matches on method + URL + body; if nothing matches exactly, falls back to the
+same method + URL, then the same method + path, in recorded order (LLM prompts and
+Yahoo queries contain timestamps). Once a key's recordings are used up the last one
+repeats, except Telegram getUpdates, which goes quiet. Calls with no recording fail
+like a network error. Tokens and API keys are redacted before saving.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+CASSETTE_DIR = Path("cassettes")
+MODES = ("off", "record", "replay")
+
+_REDACT_QUERY = {"token", "apikey", "api_key", "key", "access_token"}
+_BOT_TOKEN = re.compile(r"/bot\d+:[\w-]+")
+_DROP_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "set-cookie"}
+_EMPTY_UPDATES = {"status": 200, "headers": {"content-type": "application/json"},
+                  "text": '{"ok":true,"result":[]}', "elapsed_ms": 1000.0}
+
+_lock = threading.Lock()
+_state: Dict[str, Any] = {"mode": "off"}
+_originals: Dict[str, Any] = {}
+stats: Dict[str, int] = defaultdict(int)
+
+
+def redact_url(url: str) -> str:
+    """Strip bot tokens from the path and API keys from the query string."""
+    parts = urlsplit(str(url))
+    path = _BOT_TOKEN.sub("/bot<TOKEN>", parts.path)
+    query = [(k, "<REDACTED>" if k.lower() in _REDACT_QUERY else v) for k, v in parse_qsl(parts.query, keep_blank_values=True)]
+    return urlunsplit((parts.scheme, parts.netloc, path, urlencode(sorted(query)), ""))
+
+
+def _url_path(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.netloc}{parts.path}"
+
+
+def _body_hash(body: Optional[bytes]) -> str:
+    return hashlib.sha1(body or b"").hexdigest()[:16]
+
+
+def _encode(body: bytes) -> Dict[str, str]:
+    try:
+        return {"text": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"b64": base64.b64encode(body).decode("ascii")}
+
+
+def _decode(entry: Dict[str, Any]) -> bytes:
+    if "b64" in entry:
+        return base64.b64decode(entry["b64"])
+    return entry.get("text", "").encode("utf-8")
+
+
+class Cassette:
+    """One JSONL file of recorded exchanges plus the replay cursors."""
+
+    def __init__(self, path: Path, mode: str, latency: str = "0", seed: int = 0):
+        self.path = Path(path)
+        self.mode = mode
+        self.latency = str(latency or "0")
+        self._rng = random.Random(seed)
+        self._exact: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = defaultdict(list)
+        self._by_url: Dict[Tuple[str, str], List[Dict[str, Any]]] = defaultdict(list)
+        self._by_path: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = defaultdict(list)
+        self._cursor: Dict[Any, int] = defaultdict(int)
+        if mode == "replay":
+            self._load()
+        elif mode == "record":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            print(f"⚠️ Cassette not found: {self.path} (every call will miss)")
+            return
+        for line in self.path.read_text(encoding="utf-8").splitlines():
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            self._exact[(entry["method"], entry["url"], entry["body_hash"])].append(entry)
+            self._by_url[(entry["method"], entry["url"])].append(entry)
+            self._by_path[(entry["method"], _url_path(entry["url"]), "path")].append(entry)
+
+    def record(self, method: str, url: str, body: Optional[bytes], status: int,
+               headers: Dict[str, str], content: bytes, elapsed_ms: float) -> None:
+        entry = {
+            "method": method,
+            "url": redact_url(url),
+            "body_hash": _body_hash(body),
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() not in _DROP_HEADERS},
+            "elapsed_ms": round(elapsed_ms, 1),
+            **_encode(content),
+        }
+        with _lock:
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            stats["recorded"] += 1
+
+    def lookup(self, method: str, url: str, body: Optional[bytes]) -> Optional[Dict[str, Any]]:
+        """Next recorded response for this request (the last one repeats once exhausted)."""
+        url = redact_url(url)
+        levels = (
+            ((method, url, _body_hash(body)), self._exact, "hits"),
+            ((method, url), self._by_url, "fallback_hits"),
+            ((method, _url_path(url), "path"), self._by_path, "fallback_hits"),
+        )
+        with _lock:
+            # Prefer an unused recording at any level before repeating one
+            for repeat in (False, True):
+                for key, table, stat in levels:
+                    entries = table.get(key)
+                    if not entries:
+                        continue
+                    i = self._cursor[key]
+                    if i >= len(entries) and not repeat:
+                        continue
+                    if i >= len(entries) and url.endswith("/getUpdates"):
+                        stats["hits"] += 1
+                        return _EMPTY_UPDATES
+                    self._cursor[key] = i + 1
+                    stats[stat] += 1
+                    return entries[min(i, len(entries) - 1)]
+            stats["misses"] += 1
+        print(f"⚠️ Cassette miss: {method} {url}")
+        return None
+
+    def delay(self, entry: Dict[str, Any]) -> float:
+        """Seconds to wait before serving entry, per CASSETTE_LATENCY."""
+        if entry is _EMPTY_UPDATES:
+            return 1.0  # stand-in for the long poll, so the bot doesn't spin
+        spec = self.latency.strip().lower()
+        if spec.startswith("recorded"):
+            scale = float(spec.split("*", 1)[1]) if "*" in spec else 1.0
+            return entry.get("elapsed_ms", 0.0) * scale / 1000
+        if "-" in spec:
+            lo, hi = (float(x) for x in spec.split("-", 1))
+            with _lock:
+                return self._rng.uniform(lo, hi) / 1000
+        return float(spec or 0) / 1000
+
+
+def active() -> Optional[Cassette]:
+    return _state.get("cassette")
+
+
+# --- httpx -----------------------------------------------------------------
+
+def _httpx_response(entry: Dict[str, Any], request: Any) -> Any:
+    import httpx
+    return httpx.Response(entry["status"], headers=entry["headers"], content=_decode(entry), request=request)
+
+
+def _httpx_miss(request: Any) -> Exception:
+    import httpx
+    return httpx.ConnectError(f"cassette miss: {request.method} {redact_url(str(request.url))}", request=request)
+
+
+def _httpx_body(request: Any) -> bytes:
+    import httpx
+    try:
+        return request.content
+    except httpx.RequestNotRead:  # streamed (multipart) body
+        return request.read()
+
+
+def _patched_httpx_send(self, request, *args, **kwargs):
+    cassette = active()
+    body = _httpx_body(request)
+    if cassette.mode == "replay":
+        entry = cassette.lookup(request.method, str(request.url), body)
+        if entry is None:
+            raise _httpx_miss(request)
+        time.sleep(cassette.delay(entry))
+        return _httpx_response(entry, request)
+    t0 = time.perf_counter()
+    response = _originals["httpx.Client.send"](self, request, *args, **kwargs)
+    content = response.read()
+    cassette.record(request.method, str(request.url), body, response.status_code,
+                    dict(response.headers), content, (time.perf_counter() - t0) * 1000)
+    return response
+
+
+async def _patched_httpx_async_send(self, request, *args, **kwargs):
+    cassette = active()
+    body = _httpx_body(request)
+    if cassette.mode == "replay":
+        entry = cassette.lookup(request.method, str(request.url), body)
+        if entry is None:
+            raise _httpx_miss(request)
+        await asyncio.sleep(cassette.delay(entry))
+        return _httpx_response(entry, request)
+    t0 = time.perf_counter()
+    response = await _originals["httpx.AsyncClient.send"](self, request, *args, **kwargs)
+    content = await response.aread()
+    cassette.record(request.method, str(request.url), body, response.status_code,
+                    dict(response.headers), content, (time.perf_counter() - t0) * 1000)
+    return response
+
+
+# --- requests --------------------------------------------------------------
+
+def _request_body(request: Any) -> Optional[bytes]:
+    body = request.body
+    return body.encode("utf-8") if isinstance(body, str) else body
+
+
+def _patched_requests_send(self, request, **kwargs):
+    import requests
+    cassette = active()
+    if cassette.mode == "replay":
+        entry = cassette.lookup(request.method, request.url, _request_body(request))
+        if entry is None:
+            raise requests.ConnectionError(f"cassette miss: {request.method} {redact_url(request.url)}", request=request)
+        time.sleep(cassette.delay(entry))
+        response = requests.Response()
+        response.status_code = entry["status"]
+        response.headers = requests.structures.CaseInsensitiveDict(entry["headers"])
+        response._content = _decode(entry)
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        return response
+    t0 = time.perf_counter()
+    response = _originals["requests.Session.send"](self, request, **kwargs)
+    cassette.record(request.method, request.url, _request_body(request), response.status_code,
+                    dict(response.headers), response.content, (time.perf_counter() - t0) * 1000)
+    return response
+
+
+# --- feedparser ------------------------------------------------------------
+
+def _patched_feedparser_parse(url_file_stream_or_string, *args, **kwargs):
+    original = _originals["feedparser.parse"]
+    cassette = active()
+    if not (isinstance(url_file_stream_or_string, str) and url_file_stream_or_string.startswith(("http://", "https://"))):
+        return original(url_file_stream_or_string, *args, **kwargs)
+    url = url_file_stream_or_string
+    if cassette.mode == "replay":
+        entry = cassette.lookup("GET", url, None)
+        if entry is None:
+            return original(b"", *args, **kwargs)  # empty feed, like an unreachable host
+        time.sleep(cassette.delay(entry))
+        return original(_decode(entry), *args, **kwargs)
+    import urllib.request
+    headers = {"User-Agent": "Mozilla/5.0", **(kwargs.get("request_headers") or {})}
+    t0 = time.perf_counter()
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=15) as resp:
+            content, status, resp_headers = resp.read(), resp.status, dict(resp.headers)
+    except Exception as e:
+        print(f"RSS fetch error {url}: {e}")
+        return original(b"", *args, **kwargs)
+    cassette.record("GET", url, None, status, resp_headers, content, (time.perf_counter() - t0) * 1000)
+    return original(content, *args, **kwargs)
+
+
+# --- install ---------------------------------------------------------------
+
+def _patch(name: str, owner: Any, attr: str, replacement: Any) -> None:
+    _originals[name] = getattr(owner, attr)
+    setattr(owner, attr, replacement)
+
+
+def install(
+    mode: Optional[str] = None,
+    name: Optional[str] = None,
+    directory: Optional[Path] = None,
+    latency: Optional[str] = None,
+) -> Optional[Cassette]:
+    """
+    Start recording or replaying (arguments default to the CASSETTE_* env vars).
+    Returns the active Cassette, or None when the mode is off.
+    """
+    mode = (mode or os.getenv("CASSETTE_MODE") or "off").lower()
+    if mode not in MODES:
+        raise ValueError(f"CASSETTE_MODE must be one of {MODES}, got {mode!r}")
+    uninstall()
+    if mode == "off":
+        return None
+    directory = Path(directory or os.getenv("CASSETTE_DIR") or CASSETTE_DIR)
+    name = name or os.getenv("CASSETTE_NAME") or "default"
+    latency = latency if latency is not None else os.getenv("CASSETTE_LATENCY", "0")
+    cassette = Cassette(directory / f"{name}.jsonl", mode, latency)
+    _state.update(mode=mode, cassette=cassette)
+
+    try:
+        import httpx
+        _patch("httpx.Client.send", httpx.Client, "send", _patched_httpx_send)
+        _patch("httpx.AsyncClient.send", httpx.AsyncClient, "send", _patched_httpx_async_send)
+    except ImportError:
+        pass
+    try:
+        import requests
+        _patch("requests.Session.send", requests.Session, "send", _patched_requests_send)
+    except ImportError:
+        pass
+    try:
+        import feedparser
+        _patch("feedparser.parse", feedparser, "parse", _patched_feedparser_parse)
+    except ImportError:
+        pass
+    print(f"📼 Cassette {mode}: {cassette.path} (latency {cassette.latency})")
+    return cassette
+
+
+def uninstall() -> None:
+    """Restore the original transports."""
+    owners = {
+        "httpx.Client.send": ("httpx", "Client"),
+        "httpx.AsyncClient.send": ("httpx", "AsyncClient"),
+        "requests.Session.send": ("requests", "Session"),
+        "feedparser.parse": ("feedparser", None),
+    }
+    for name, original in list(_originals.items()):
+        module_name, cls = owners[name]
+        module = __import__(module_name)
+        setattr(getattr(module, cls) if cls else module, name.rsplit(".", 1)[-1], original)
+        del _originals[name]
+    _state.clear()
+    _state["mode"] = "off"
+
+
+@contextmanager
+def use_cassette(name: str, mode: str = "replay", directory: Optional[Path] = None,
+                 latency: str = "0") -> Iterator[Optional[Cassette]]:
+    """with use_cassette("ai_brain_nvda"): ... (benchmarks, tests)."""
+    cassette = install(mode, name, directory, latency)
+    try:
+        yield cassette
+    finally:
+        uninstall()
@@ -1,9 +1,12 @@
 """
 Shared config, trades, and strategies I/O.
 Single source of truth for paths and file operations.
+Trades live in core/trade_ledger.py (SQLite); TRADES_FILE is only its one-time import source.
 """
 
 import json
+import os
+import tempfile
 from pathlib import Path
 from typing import List, Dict, Any
 
@@ -30,6 +33,24 @@ DEFAULT_CONFIG = {
 }
 
 
+def write_json_atomic(path: Path, obj: Any) -> bool:
+    """Write JSON to a temp file next to path, then rename over it (readers never see half a file)."""
+    path = Path(path)
+    try:
+        fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent or ".")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(obj, f, indent=2)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        return True
+    except Exception as e:
+        print(f"⚠️ Write failed ({path}): {e}")
+        return False
+
+
 def load_config() -> Dict[str, Any]:
     """Load config from file; merge with defaults."""
     if CONFIG_FILE.exists():
@@ -43,29 +64,27 @@ def load_config() -> Dict[str, Any]:
 
 def save_config(config: Dict[str, Any]) -> bool:
     """Save config to file. Returns True on success."""
-    try:
-        CONFIG_FILE.write_text(json.dumps(config, indent=2), encoding="utf-8")
-        return True
-    except Exception:
-        return False
+    return write_json_atomic(CONFIG_FILE, config)
 
 
 def load_trades() -> List[Dict]:
-    """Load trades history from file."""
-    if TRADES_FILE.exists():
-        try:
-            return json.loads(TRADES_FILE.read_text(encoding="utf-8"))
-        except Exception:
-            pass
-    return []
+    """All trades, oldest first (core/trade_ledger.py)."""
+    try:
+        from .trade_ledger import get_ledger
+        return get_ledger().all()
+    except Exception as e:
+        print(f"⚠️ Trade ledger read failed: {e}")
+        return []
 
 
 def save_trades(trades: List[Dict]) -> bool:
-    """Save full trades list to file. Returns True on success."""
+    """Replace the whole trade list. Returns True on success (prefer save_trade for one trade)."""
     try:
-        TRADES_FILE.write_text(json.dumps(trades, indent=2), encoding="utf-8")
+        from .trade_ledger import get_ledger
+        get_ledger().replace_all(trades)
         return True
-    except Exception:
+    except Exception as e:
+        print(f"⚠️ Trade ledger write failed: {e}")
         return False
 
 
@@ -86,30 +105,28 @@ def load_strategies() -> Dict[str, Dict[str, Any]]:
 
 def save_strategies(strategies: Dict[str, Dict[str, Any]]) -> bool:
     """Save strategies to file. Returns True on success."""
-    try:
-        STRATEGIES_FILE.write_text(json.dumps(strategies, indent=2), encoding="utf-8")
-        return True
-    except Exception:
-        return False
+    return write_json_atomic(STRATEGIES_FILE, strategies)
 
 
 def save_trade(trade: Dict) -> bool:
-    """Append one trade and save. Returns True on success."""
-    trades = load_trades()
-    trades.append(trade)
-    return save_trades(trades)
+    """Append one trade. Returns True on success."""
+    try:
+        from .trade_ledger import get_ledger
+        get_ledger().add(trade)
+        return True
+    except Exception as e:
+        print(f"⚠️ Trade ledger write failed: {e}")
+        return False
 
 
 def calculate_win_rate() -> tuple:
     """Returns (win_rate_pct, wins, total) from closed trades."""
-    trades = load_trades()
-    closed = [t for t in trades if t.get("status") == "closed"]
-    if not closed:
+    try:
+        from .trade_ledger import get_ledger
+        return get_ledger().win_rate()
+    except Exception as e:
+        print(f"⚠️ Trade ledger read failed: {e}")
         return 0.0, 0, 0
-    wins = len([t for t in closed if (t.get("profit") or 0) > 0])
-    total = len(closed)
-    pct = (wins / total * 100) if total > 0 else 0.0
-    return pct, wins, total
 
 
 def update_strategy_performance(strategy_name: str, profit: float) -> None:
@@ -0,0 +1,160 @@
+"""
+Config Store - In-memory geewoni_config.json with debounced, atomic write-behind.
+Reads and writes hit the in-memory dict; changed keys are written together SAVE_DEBOUNCE
+seconds after the first unsaved change, from a timer thread (never on the event loop), via temp file + rename
+so a reader never sees a half-written file. Before writing, edits another process made to
+the file (Streamlit dashboard) are merged in for every key we haven't changed ourselves.
+Hot counters (AI usage) are plain in-memory increments that ride along with the next write.
+Listeners registered with subscribe(fn) get fn(key, value) on every change.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import CONFIG_FILE, DEFAULT_CONFIG, write_json_atomic
+
+SAVE_DEBOUNCE = float(os.getenv("CONFIG_SAVE_DEBOUNCE", "2.0"))
+
+
+class ConfigStore:
+    """Dict-like config: store["weekly_profit"] += p; store.save("priority") after in-place edits."""
+
+    def __init__(
+        self,
+        path: Path = CONFIG_FILE,
+        *,
+        defaults: Optional[Dict[str, Any]] = None,
+        counters: Optional[Dict[str, int]] = None,
+        debounce: float = SAVE_DEBOUNCE,
+    ):
+        self.path = Path(path)
+        self.defaults = dict(DEFAULT_CONFIG if defaults is None else defaults)
+        self.debounce = debounce
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._dirty: set = set()
+        self._listeners: List[Callable[[str, Any], None]] = []
+        self._mtime = None
+        self.data: Dict[str, Any] = dict(self.defaults)
+        self.data.update(self._read())
+        # Counters start from the given values in each process (not from the file)
+        self.counters: Dict[str, int] = dict(counters or {})
+        self.stats = {"changes": 0, "writes": 0, "merged": 0, "errors": 0}
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            self._mtime = self.path.stat().st_mtime_ns
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"⚠️ Config read failed ({self.path}): {e}")
+            return {}
+
+    # --- dict access ---
+    def __getitem__(self, key: str) -> Any:
+        if key in self.counters:
+            return self.counters[key]
+        return self.data[key]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        with self._lock:
+            if key in self.counters:
+                self.counters[key] = value
+            else:
+                self.data[key] = value
+        self.save(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.counters or key in self.data
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Plain dict copy (what gets written)."""
+        with self._lock:
+            return {**self.data, **self.counters}
+
+    def incr(self, key: str, n: int = 1) -> int:
+        """Bump a hot counter; written with the next debounced save, no listeners."""
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+            value = self.counters[key]
+        self._schedule((key,))
+        return value
+
+    # --- change notifications ---
+    def subscribe(self, fn: Callable[[str, Any], None]) -> None:
+        self._listeners.append(fn)
+
+    def _notify(self, key: str, value: Any) -> None:
+        for fn in list(self._listeners):
+            try:
+                fn(key, value)
+            except Exception as e:
+                print(f"⚠️ Config listener failed for {key}: {e}")
+
+    # --- write-behind ---
+    def save(self, *keys: str) -> None:
+        """Mark keys changed (all if none given): notify listeners and schedule the write.
+        Call after editing a value in place (store["priority"].append(sym))."""
+        self._schedule(keys)
+        for key in keys:
+            if key not in self.counters:
+                self._notify(key, self.data.get(key))
+
+    def _schedule(self, keys) -> None:
+        """Start the write timer unless one is pending (it will pick these keys up too)."""
+        with self._lock:
+            self._dirty.update(keys or self.snapshot().keys())
+            self.stats["changes"] += 1
+            if self.debounce > 0 and self._timer is None:
+                self._timer = threading.Timer(self.debounce, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if self.debounce <= 0:
+            self.flush()
+
+    def refresh(self) -> List[str]:
+        """Pick up keys another process changed in the file (ours win if not yet written)."""
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return []
+        if mtime == self._mtime:
+            return []
+        changed = []
+        with self._lock:
+            for key, value in self._read().items():
+                if key in self._dirty or key in self.counters or self.data.get(key) == value:
+                    continue
+                self.data[key] = value
+                changed.append(key)
+            self.stats["merged"] += len(changed)
+        for key in changed:
+            self._notify(key, self.data[key])
+        return changed
+
+    def flush(self) -> bool:
+        """Write pending changes now. Returns True if the file is up to date."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return True
+            self.refresh()
+            if not write_json_atomic(self.path, self.snapshot()):
+                self.stats["errors"] += 1
+                return False
+            self._mtime = self.path.stat().st_mtime_ns
+            self._dirty.clear()
+            self.stats["writes"] += 1
+            return True
+
+    def close(self) -> None:
+        self.flush()
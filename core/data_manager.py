@@ -1,6 +1,7 @@
 """
 Data Manager - Unified real-time and historical stock data
 Primary: Finnhub (real-time quote). Fallback: Yahoo Finance.
+STOCK_DATA_PROVIDER=synthetic: offline bars from core.synthetic_data, no network calls.
 """
 
 import os
@@ -17,6 +18,8 @@ logging.getLogger("yfinance").setLevel(logging.WARNING)
 import yfinance as yf
 import pandas as pd
 
+from core.synthetic_data import get_ticker, use_synthetic
+
 try:
     import finnhub
     FINNHUB_AVAILABLE = True
@@ -90,7 +93,7 @@ def _finnhub_quote(symbol: str) -> Optional[Dict]:
 def _yahoo_extended(symbol: str) -> Optional[Dict]:
     try:
         warnings.filterwarnings('ignore')
-        ticker = yf.Ticker(symbol)
+        ticker = get_ticker(symbol)
         hist_data = ticker.history(period="1mo", interval="1d")
         # prepost=True: include pre-market and after-hours so data works 24/7
         today_data = ticker.history(period="1d", interval="5m", prepost=True)
@@ -131,11 +134,12 @@ def _yahoo_extended(symbol: str) -> Optional[Dict]:
         bb_middle = float(sma_20.iloc[-1]) if not sma_20.empty and not pd.isna(sma_20.iloc[-1]) else 0
         bb_lower = float((sma_20 - (2 * std_20)).iloc[-1]) if not sma_20.empty and not pd.isna(sma_20.iloc[-1]) else 0
         
-        # Donchian Channels
-        donchian_upper_20 = float(hist_data['High'].rolling(20).max().iloc[-1])
-        donchian_lower_20 = float(hist_data['Low'].rolling(20).min().iloc[-1])
-        donchian_upper_40 = float(hist_data['High'].rolling(40).max().iloc[-1]) if len(hist_data) >= 40 else donchian_upper_20
-        donchian_lower_40 = float(hist_data['Low'].rolling(40).min().iloc[-1]) if len(hist_data) >= 40 else donchian_lower_20
+        # Donchian Channels (prior N bars, so today's price can break out of them)
+        prev_high, prev_low = hist_data['High'].shift(1), hist_data['Low'].shift(1)
+        donchian_upper_20 = float(prev_high.rolling(20).max().iloc[-1])
+        donchian_lower_20 = float(prev_low.rolling(20).min().iloc[-1])
+        donchian_upper_40 = float(prev_high.rolling(40).max().iloc[-1]) if len(hist_data) > 40 else donchian_upper_20
+        donchian_lower_40 = float(prev_low.rolling(40).min().iloc[-1]) if len(hist_data) > 40 else donchian_lower_20
         
         # ATR (Average True Range, 14-period)
         high_low = hist_data['High'] - hist_data['Low']
@@ -167,6 +171,7 @@ def _yahoo_extended(symbol: str) -> Optional[Dict]:
         else:
             trend, trend_en = "弱势看跌", "bearish"
         last_update_str = last_update.strftime('%m/%d %H:%M') if hasattr(last_update, 'strftime') else str(last_update)
+        source = 'Synthetic' if use_synthetic() else 'Yahoo Finance'
         return {
             'symbol': symbol.upper(),
             'session': session_note,
@@ -189,7 +194,7 @@ def _yahoo_extended(symbol: str) -> Optional[Dict]:
             'trend_en': trend_en,
             'price_change_pct': price_change_pct,
             'last_update': last_update_str,
-            'data_source': 'Yahoo Finance (incl. pre/post)' if session_note == 'extended' else 'Yahoo Finance',
+            'data_source': f'{source} (incl. pre/post)' if session_note == 'extended' else source,
             # New indicators
             'bb_upper': bb_upper,
             'bb_middle': bb_middle,
@@ -217,7 +222,8 @@ def get_extended_stock_data(symbol: str, use_cache: bool = True) -> Optional[Dic
             return cached
 
     # 1st: Try Finnhub only. If we get a quote, return it and do not call Yahoo.
-    fq = _finnhub_quote(symbol) if FINNHUB_AVAILABLE and FINNHUB_API_KEY else None
+    synthetic = use_synthetic()
+    fq = _finnhub_quote(symbol) if FINNHUB_AVAILABLE and FINNHUB_API_KEY and not synthetic else None
     if fq:
         print(f"[DATA] {symbol} ← Finnhub only | ${fq['current_price']:.2f}")
         out = {
@@ -246,10 +252,10 @@ def get_extended_stock_data(symbol: str, use_cache: bool = True) -> Optional[Dic
         _set_cached(symbol, out)
         return out
 
-    # 2nd: Finnhub failed or not configured → use Yahoo only
+    # 2nd: Finnhub failed or not configured → use Yahoo only (or the synthetic provider)
     yahoo_data = _yahoo_extended(symbol)
     if yahoo_data is not None:
-        print(f"[DATA] {symbol} ← Yahoo only | ${yahoo_data['current_price']:.2f}")
+        print(f"[DATA] {symbol} ← {'Synthetic' if synthetic else 'Yahoo only'} | ${yahoo_data['current_price']:.2f}")
         _set_cached(symbol, yahoo_data)
         return yahoo_data
     return None
@@ -0,0 +1,237 @@
+"""
+Learning Log - AI recommendations, follows and outcomes in the trade ledger's SQLite file
+instead of loading / rewriting ai_learning.json on every event.
+Recommendations are rows indexed on (symbol, followed) with a partial index on the ones still
+waiting for an outcome, so "latest unfollowed NVDA near $145" and "followed NVDA without an
+outcome" are index lookups. The summary behind /learn and the ai_brain learning line
+(counters + learned insights) is one state row, kept in memory and updated on each event
+instead of being recomputed from the full list. ai_learning.json is imported once.
+"""
+
+import copy
+import json
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from .trade_ledger import LEDGER_DB, TradeLedger, connect, get_ledger, transaction
+
+AI_LEARNING_FILE = Path("ai_learning.json")
+FOLLOW_PRICE_TOLERANCE = 0.02  # a buy within 2% of the recommended entry counts as followed
+
+REC_COLUMNS = ("id", "timestamp", "symbol", "entry_price", "target_price", "stop_loss", "strategy",
+               "rsi", "volume_ratio", "ema_setup")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recommendations (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT, timestamp TEXT, symbol TEXT, entry_price REAL, target_price REAL, stop_loss REAL,
+    strategy TEXT, rsi REAL, volume_ratio REAL, ema_setup TEXT,
+    followed INTEGER NOT NULL DEFAULT 0, outcome TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_recs_symbol_followed ON recommendations(symbol, followed);
+CREATE INDEX IF NOT EXISTS idx_recs_awaiting_outcome ON recommendations(symbol) WHERE followed=1 AND outcome IS NULL;
+CREATE TABLE IF NOT EXISTS followed_trades (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    recommendation_id TEXT, symbol TEXT, entry_price REAL, timestamp TEXT
+);
+CREATE TABLE IF NOT EXISTS success_patterns (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    rsi REAL, volume_ratio REAL, ema_setup TEXT, strategy TEXT
+);
+CREATE TABLE IF NOT EXISTS learning_state (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def default_state() -> Dict[str, Any]:
+    return {
+        "learning_insights": {
+            "best_rsi_range": {"min": 40, "max": 60},
+            "best_volume_ratio": 1.5,
+            "best_ema_setup": "bullish_crossover",
+            "preferred_strategies": [],
+        },
+        "total_recommendations": 0,
+        "recommendations_followed": 0,
+        "follow_rate": 0,
+        "outcomes": 0,
+        "successes": 0,
+        "success_patterns": 0,
+    }
+
+
+def learn(insights: Dict[str, Any], rec: Dict[str, Any]) -> None:
+    """Widen the RSI range to include a successful trade and remember its strategy."""
+    rsi = rec.get("rsi")
+    if rsi:
+        rsi_range = insights["best_rsi_range"]
+        if rsi < rsi_range["min"]:
+            rsi_range["min"] = max(30, rsi - 5)
+        if rsi > rsi_range["max"]:
+            rsi_range["max"] = min(70, rsi + 5)
+    if rec.get("strategy") not in insights["preferred_strategies"]:
+        insights["preferred_strategies"].append(rec.get("strategy"))
+
+
+def _now() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+class LearningLog:
+    """Pass the trade ledger to share its connection and lock (one writer on trades.db)."""
+
+    def __init__(self, path: Path = LEDGER_DB, json_file: Optional[Path] = AI_LEARNING_FILE,
+                 *, ledger: Optional[TradeLedger] = None):
+        self._owns_db = ledger is None
+        self._lock = threading.Lock() if ledger is None else ledger._lock
+        self._db = connect(Path(path)) if ledger is None else ledger._db
+        with self._lock:
+            self._db.executescript(_SCHEMA)
+            row = self._db.execute("SELECT value FROM learning_state WHERE key='summary'").fetchone()
+        self.state = {**default_state(), **json.loads(row["value"])} if row else default_state()
+        if json_file is not None and row is None:
+            self.migrate_json(Path(json_file))
+
+    def _save_state(self, state: Dict[str, Any]) -> None:
+        self._db.execute("INSERT OR REPLACE INTO learning_state VALUES ('summary', ?)", (json.dumps(state),))
+
+    def _write(self, fn: Callable[[Dict[str, Any]], Any]) -> Any:
+        """Run fn(state copy) in one transaction; the copy replaces self.state only after COMMIT."""
+        with self._lock:
+            state = copy.deepcopy(self.state)
+            result = transaction(self._db, lambda: fn(state))
+            self.state = state
+            return result
+
+    def log_recommendation(self, symbol: str, data: Dict[str, Any]) -> str:
+        """Append one recommendation; returns its id."""
+        rec = {"id": datetime.now().strftime("%Y%m%d%H%M%S"), "timestamp": _now(), "symbol": symbol,
+               **{k: data.get(k) for k in REC_COLUMNS[3:]}}
+
+        def insert(state):
+            self._db.execute(
+                f"INSERT INTO recommendations ({', '.join(REC_COLUMNS)}) VALUES ({', '.join('?' * len(REC_COLUMNS))})",
+                tuple(rec[k] for k in REC_COLUMNS),
+            )
+            state["total_recommendations"] += 1
+            self._save_state(state)
+
+        self._write(insert)
+        return rec["id"]
+
+    def mark_followed(self, symbol: str, entry_price: float) -> bool:
+        """Mark the latest unfollowed recommendation for symbol within 2% of entry_price."""
+        def follow(state):
+            row = self._db.execute(
+                "SELECT seq, id FROM recommendations WHERE symbol=? AND followed=0 AND entry_price > 0 "
+                "AND ABS(? - entry_price) / entry_price < ? ORDER BY seq DESC LIMIT 1",
+                (symbol, entry_price, FOLLOW_PRICE_TOLERANCE),
+            ).fetchone()
+            if row is None:
+                return False
+            self._db.execute("UPDATE recommendations SET followed=1 WHERE seq=?", (row["seq"],))
+            self._db.execute(
+                "INSERT INTO followed_trades (recommendation_id, symbol, entry_price, timestamp) VALUES (?, ?, ?, ?)",
+                (row["id"], symbol, entry_price, _now()),
+            )
+            state["recommendations_followed"] += 1
+            total = state["total_recommendations"]
+            state["follow_rate"] = state["recommendations_followed"] / total * 100 if total else 0
+            self._save_state(state)
+            return True
+
+        return self._write(follow)
+
+    def record_outcome(self, symbol: str, exit_price: float, profit: float) -> bool:
+        """Close the latest followed recommendation for symbol; learn from it if it won."""
+        def close(state):
+            row = self._db.execute(
+                "SELECT * FROM recommendations WHERE symbol=? AND followed=1 AND outcome IS NULL "
+                "ORDER BY seq DESC LIMIT 1", (symbol,),
+            ).fetchone()
+            if row is None:
+                return False
+            outcome = {"exit_price": exit_price, "profit": profit, "success": profit > 0, "close_timestamp": _now()}
+            self._db.execute("UPDATE recommendations SET outcome=? WHERE seq=?", (json.dumps(outcome), row["seq"]))
+            state["outcomes"] += 1
+            if profit > 0:
+                self._db.execute(
+                    "INSERT INTO success_patterns (rsi, volume_ratio, ema_setup, strategy) VALUES (?, ?, ?, ?)",
+                    (row["rsi"], row["volume_ratio"], row["ema_setup"], row["strategy"]),
+                )
+                state["successes"] += 1
+                state["success_patterns"] += 1
+                learn(state["learning_insights"], dict(row))
+            self._save_state(state)
+            return True
+
+        return self._write(close)
+
+    def summary(self) -> Dict[str, Any]:
+        """Counters + insights (no I/O)."""
+        with self._lock:
+            return json.loads(json.dumps(self.state))
+
+    def migrate_json(self, json_file: Path) -> int:
+        """Import ai_learning.json into an empty log. Returns the number of recommendations."""
+        if not json_file.exists():
+            self._write(self._save_state)
+            return 0
+        try:
+            learning = json.loads(json_file.read_text(encoding="utf-8"))
+        except Exception as e:
+            print(f"⚠️ Learning log: could not read {json_file}: {e}")
+            return 0
+        recs = learning.get("recommendations", [])
+        insights = learning.get("learning_insights", {})
+        patterns = insights.get("success_patterns", [])
+        state = default_state()
+        state["learning_insights"].update({k: v for k, v in insights.items() if k != "success_patterns"})
+        for key in ("total_recommendations", "recommendations_followed", "follow_rate"):
+            state[key] = learning.get(key, state[key])
+        state["outcomes"] = sum(1 for r in recs if r.get("outcome"))
+        state["successes"] = sum(1 for r in recs if (r.get("outcome") or {}).get("success"))
+        state["success_patterns"] = len(patterns)
+        def load(current):
+            self._db.executemany(
+                f"INSERT INTO recommendations ({', '.join(REC_COLUMNS)}, followed, outcome) "
+                f"VALUES ({', '.join('?' * (len(REC_COLUMNS) + 2))})",
+                [tuple(r.get(k) for k in REC_COLUMNS) + (int(bool(r.get("followed"))),
+                                                         json.dumps(r["outcome"]) if r.get("outcome") else None)
+                 for r in recs],
+            )
+            self._db.executemany(
+                "INSERT INTO followed_trades (recommendation_id, symbol, entry_price, timestamp) VALUES (?, ?, ?, ?)",
+                [(f.get("recommendation_id"), f.get("symbol"), f.get("entry_price"), f.get("timestamp"))
+                 for f in learning.get("followed_trades", [])],
+            )
+            self._db.executemany(
+                "INSERT INTO success_patterns (rsi, volume_ratio, ema_setup, strategy) VALUES (?, ?, ?, ?)",
+                [(p.get("rsi"), p.get("volume_ratio"), p.get("ema_setup"), p.get("strategy")) for p in patterns],
+            )
+            current.clear()
+            current.update(state)
+            self._save_state(current)
+
+        self._write(load)
+        print(f"✅ Learning log: imported {len(recs)} recommendations from {json_file}")
+        return len(recs)
+
+    def close(self) -> None:
+        if self._owns_db:
+            with self._lock:
+                self._db.close()
+
+
+_log: Optional[LearningLog] = None
+_log_lock = threading.Lock()
+
+
+def get_learning_log() -> LearningLog:
+    """Process-wide log on the ledger database (created and migrated on first use)."""
+    global _log
+    with _log_lock:
+        if _log is None:
+            _log = LearningLog(ledger=get_ledger())
+        return _log
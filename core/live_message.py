@@ -0,0 +1,94 @@
+"""
+Live Message - A Telegram message that fills in while the LLM streams.
+Sends a placeholder straight away, then edits it as text arrives: at most one edit per
+STREAM_EDIT_INTERVAL seconds (default 1.0, Telegram allows roughly one edit per second per
+chat) and only after STREAM_MIN_CHARS new characters. Flood-control (RetryAfter) pauses the
+edits instead of failing the reply; the final edit carries the HTML and buttons.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Optional
+
+from core.metrics import record
+
+try:
+    from telegram.error import BadRequest, RetryAfter
+except ImportError:
+    BadRequest = RetryAfter = None
+
+EDIT_INTERVAL = float(os.getenv("STREAM_EDIT_INTERVAL", "1.0"))
+MIN_CHARS = int(os.getenv("STREAM_MIN_CHARS", "40"))
+MAX_LEN = 4096  # Telegram message limit
+CURSOR = " ▌"
+
+
+def _retry_seconds(exc: Exception) -> float:
+    wait = getattr(exc, "retry_after", 1)
+    return wait.total_seconds() if hasattr(wait, "total_seconds") else float(wait)
+
+
+class LiveMessage:
+    """Placeholder + throttled edits for one streamed reply."""
+
+    def __init__(self, message: Any, *, metric: str = "ai_brain", interval: float = EDIT_INTERVAL,
+                 min_chars: int = MIN_CHARS):
+        self.message = message  # the user's message; we reply to it
+        self.metric = metric
+        self.interval = interval
+        self.min_chars = min_chars
+        self.sent = None
+        self.started = time.perf_counter()
+        self.first_text_at: Optional[float] = None
+        self.edits = 0
+        self._shown = ""
+        self._last_edit = 0.0
+        self._paused_until = 0.0
+
+    async def start(self, placeholder: str = "🧠 分析中…") -> None:
+        self.started = time.perf_counter()
+        self.sent = await self.message.reply_text(placeholder)
+        self._last_edit = time.perf_counter()
+
+    async def update(self, text: str) -> None:
+        """Show the partial text (plain, with a cursor) if the throttle allows."""
+        now = time.perf_counter()
+        if self.sent is None or now < self._paused_until:
+            return
+        if self._shown and (now - self._last_edit < self.interval or len(text) - len(self._shown) < self.min_chars):
+            return
+        if not text.strip() or text == self._shown:
+            return
+        if await self._edit(text[: MAX_LEN - len(CURSOR)] + CURSOR):
+            self._shown = text
+            if self.first_text_at is None:
+                self.first_text_at = time.perf_counter()
+                record(f"{self.metric}.first_text", self.first_text_at - self.started)
+
+    async def finish(self, text: str, **kwargs: Any) -> None:
+        """Final edit (parse_mode / reply_markup pass through); falls back to a new message."""
+        wait = self._paused_until - time.perf_counter()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        if self.sent is None or not await self._edit(text[:MAX_LEN], final=True, **kwargs):
+            await self.message.reply_text(text[:MAX_LEN], **kwargs)
+        record(f"{self.metric}.full_text", time.perf_counter() - self.started)
+
+    async def _edit(self, text: str, final: bool = False, **kwargs: Any) -> bool:
+        self._last_edit = time.perf_counter()
+        try:
+            await self.sent.edit_text(text, **kwargs)
+            self.edits += 1
+            return True
+        except Exception as e:
+            if RetryAfter is not None and isinstance(e, RetryAfter):
+                self._paused_until = time.perf_counter() + _retry_seconds(e)
+                if final:
+                    await asyncio.sleep(_retry_seconds(e))
+                    return await self._edit(text, final=False, **kwargs)
+                return False
+            if BadRequest is not None and isinstance(e, BadRequest) and "not modified" in str(e).lower():
+                return True
+            print(f"⚠️ Live message edit failed: {e}")
+            return False
@@ -0,0 +1,242 @@
+"""
+LLM Gateway - One shared async OpenAI client for the bot and the schedulers.
+AsyncOpenAI over a pooled httpx.AsyncClient (keep-alive connections), a global cap on
+requests in flight (LLM_MAX_CONCURRENCY, default 8) and retries with full jitter on
+429 / 5xx / timeouts / connection errors (Retry-After is honoured).
+Same call shape as the OpenAI SDK, awaited:
+    response = await gateway.chat.completions.create(model=..., messages=[...])
+Streamed completions yield text deltas and record llm.ttft / llm.stream_total (core.metrics):
+    async for delta in gateway.stream(model=..., messages=[...]): ...
+With tools, stream(..., tools=[...], tool_calls=calls) also fills calls with the round's tool calls.
+Usage fields of every response feed prompt-cache stats: cached_share() is the share of input
+tokens the provider served from its prompt cache; call latency is recorded as
+llm.call.cached / llm.call.uncached.
+"""
+
+import asyncio
+import os
+import random
+import time
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from core.metrics import record
+
+try:
+    import openai
+    from openai import AsyncOpenAI
+except ImportError:
+    openai = None
+    AsyncOpenAI = None
+
+DEFAULT_MODEL = "gpt-4o-mini"
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+MAX_RETRIES = 3
+RETRY_BASE_DELAY = 0.5  # seconds; attempt n waits uniform(0, min(RETRY_MAX_DELAY, base * 2**n))
+RETRY_MAX_DELAY = 8.0
+REQUEST_TIMEOUT = 30.0
+MAX_CONNECTIONS = 20
+
+
+def _retryable(exc: Exception) -> bool:
+    if openai is None:
+        return False
+    return isinstance(exc, (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    ))
+
+
+def _merge_tool_calls(calls: List[Dict[str, Any]], deltas: Any) -> None:
+    """Fold streamed tool-call deltas (id / name first, arguments in pieces) into calls by index."""
+    for d in deltas:
+        index = getattr(d, "index", None)
+        index = len(calls) if index is None else index
+        while len(calls) <= index:
+            calls.append({"id": "", "type": "function", "function": {"name": "", "arguments": ""}})
+        call = calls[index]
+        if getattr(d, "id", None):
+            call["id"] = d.id
+        fn = getattr(d, "function", None)
+        if fn is not None:
+            call["function"]["name"] += getattr(fn, "name", None) or ""
+            call["function"]["arguments"] += getattr(fn, "arguments", None) or ""
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    try:
+        return float(response.headers.get("retry-after")) if response is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMGateway:
+    """Shared async LLM client: connection pool + concurrency cap + jittered retries."""
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        *,
+        client: Any = None,
+        max_concurrency: int = MAX_CONCURRENCY,
+        max_retries: int = MAX_RETRIES,
+        timeout: float = REQUEST_TIMEOUT,
+        max_connections: int = MAX_CONNECTIONS,
+    ):
+        if client is None:
+            if AsyncOpenAI is None:
+                raise ImportError("openai is not installed")
+            http_client = httpx.AsyncClient(
+                trust_env=False,  # ignore proxy env vars, as the sync client did
+                timeout=timeout,
+                limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            )
+            # Retries are done here (with jitter, outside the concurrency slot), not in the SDK
+            client = AsyncOpenAI(api_key=api_key, http_client=http_client, max_retries=0, timeout=timeout)
+        self._client = client
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop = None
+        self.stats: Dict[str, float] = {
+            "calls": 0, "retries": 0, "failures": 0, "in_flight": 0, "max_in_flight": 0, "wait_seconds": 0.0,
+            "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0,
+        }
+        # OpenAI-shaped entry point: gateway.chat.completions.create(...)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def _slots(self) -> asyncio.Semaphore:
+        """Semaphore bound to the running loop (tests and scripts may use several loops)."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def _enter(self, queued_at: float) -> None:
+        self.stats["wait_seconds"] += time.perf_counter() - queued_at
+        self.stats["in_flight"] += 1
+        self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+
+    def _record_usage(self, usage: Any, seconds: float) -> None:
+        if usage is None:
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached = (getattr(details, "cached_tokens", 0) or 0) if details is not None else 0
+        self.stats["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+        self.stats["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+        self.stats["cached_tokens"] += cached
+        record("llm.call.cached" if cached else "llm.call.uncached", seconds)
+
+    def cached_share(self) -> float:
+        """Share of prompt tokens served from the provider's prompt cache."""
+        return self.stats["cached_tokens"] / self.stats["prompt_tokens"] if self.stats["prompt_tokens"] else 0.0
+
+    async def _backoff(self, attempt: int, error: Exception) -> None:
+        """Sleep before the next attempt (outside the slot so other requests can use it)."""
+        delay = _retry_after(error)
+        if delay is None:
+            delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+        self.stats["retries"] += 1
+        print(f"⚠️ LLM {type(error).__name__}, retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+        await asyncio.sleep(delay)
+
+    async def create(self, **kwargs: Any) -> Any:
+        """chat.completions.create(**kwargs) with the concurrency cap and retries."""
+        kwargs.setdefault("model", DEFAULT_MODEL)
+        self.stats["calls"] += 1
+        for attempt in range(self.max_retries + 1):
+            t0 = time.perf_counter()
+            async with self._slots():
+                self._enter(t0)
+                try:
+                    t_call = time.perf_counter()
+                    response = await self._client.chat.completions.create(**kwargs)
+                    self._record_usage(getattr(response, "usage", None), time.perf_counter() - t_call)
+                    return response
+                except Exception as e:
+                    if attempt >= self.max_retries or not _retryable(e):
+                        self.stats["failures"] += 1
+                        raise
+                    error = e
+                finally:
+                    self.stats["in_flight"] -= 1
+            await self._backoff(attempt, error)
+
+    async def stream(self, *, tool_calls: Optional[List[Dict[str, Any]]] = None, **kwargs: Any) -> AsyncIterator[str]:
+        """Streamed create(): yields the text deltas. Retries only until the first token arrives;
+        the concurrency slot is held until the stream ends. Pass a list as tool_calls to collect
+        the tool calls of a round with tools (assembled from their deltas, message format)."""
+        kwargs.setdefault("model", DEFAULT_MODEL)
+        kwargs["stream"] = True
+        kwargs.setdefault("stream_options", {"include_usage": True})  # usage arrives in the last chunk
+        self.stats["calls"] += 1
+        started = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            t0 = time.perf_counter()
+            got_token = got_ttft = False
+            async with self._slots():
+                self._enter(t0)
+                try:
+                    chunks = await self._client.chat.completions.create(**kwargs)
+                    async for chunk in chunks:
+                        if getattr(chunk, "usage", None) is not None:
+                            self._record_usage(chunk.usage, time.perf_counter() - started)
+                        if not chunk.choices:
+                            continue
+                        if tool_calls is not None and getattr(chunk.choices[0].delta, "tool_calls", None):
+                            got_token = True
+                            _merge_tool_calls(tool_calls, chunk.choices[0].delta.tool_calls)
+                        delta = chunk.choices[0].delta.content
+                        if not delta:
+                            continue
+                        if not got_ttft:
+                            got_token = got_ttft = True
+                            record("llm.ttft", time.perf_counter() - started)
+                        yield delta
+                    record("llm.stream_total", time.perf_counter() - started)
+                    return
+                except Exception as e:
+                    if got_token or attempt >= self.max_retries or not _retryable(e):
+                        self.stats["failures"] += 1
+                        raise
+                    error = e
+                finally:
+                    self.stats["in_flight"] -= 1
+            await self._backoff(attempt, error)
+
+    async def complete(self, prompt: str, *, system: Optional[str] = None, **kwargs: Any) -> str:
+        """Single-turn helper: returns the message text ("" if empty)."""
+        messages = ([{"role": "system", "content": system}] if system else []) + [{"role": "user", "content": prompt}]
+        response = await self.create(messages=messages, **kwargs)
+        return (response.choices[0].message.content or "").strip()
+
+    async def aclose(self) -> None:
+        close = getattr(self._client, "close", None)
+        if close:
+            await close()
+
+
+_gateway: Optional[LLMGateway] = None
+
+
+def get_gateway(api_key: Optional[str] = None) -> Optional[LLMGateway]:
+    """Process-wide gateway (created on first use from api_key or OPENAI_KEY); None without a key."""
+    global _gateway
+    if _gateway is None:
+        api_key = api_key or os.getenv("OPENAI_KEY") or os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            return None
+        _gateway = LLMGateway(api_key.strip().strip('"').strip("'"))
+    return _gateway
+
+
+def set_gateway(gateway: Optional[LLMGateway]) -> None:
+    """Replace the shared gateway (tests, load tests)."""
+    global _gateway
+    _gateway = gateway
@@ -0,0 +1,115 @@
+"""
+Metrics - In-process latency series for handlers and pipeline stages.
+record() / timer() / Stopwatch feed named series; summary() reports count, mean,
+p50 / p95 / p99 and max in ms. monitor_event_loop_lag() measures how late the event
+loop wakes up, which is where blocking calls inside async handlers show up.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, List, Optional
+
+MAX_SAMPLES = 50_000  # per series; oldest samples drop off
+
+_lock = threading.Lock()
+_series: Dict[str, Deque[float]] = {}
+
+
+def record(name: str, seconds: float) -> None:
+    with _lock:
+        series = _series.get(name)
+        if series is None:
+            series = _series[name] = deque(maxlen=MAX_SAMPLES)
+        series.append(seconds)
+
+
+@contextmanager
+def timer(name: str) -> Iterator[None]:
+    """with timer("handler.route_message"): ..."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - t0)
+
+
+class Stopwatch:
+    """Sequential stages: sw.lap("analyzer") records the time since the previous lap as <prefix>.analyzer."""
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.start = self.last = time.perf_counter()
+        self.laps: Dict[str, float] = {}
+
+    def lap(self, stage: str) -> float:
+        now = time.perf_counter()
+        elapsed = now - self.last
+        self.last = now
+        self.laps[stage] = self.laps.get(stage, 0.0) + elapsed
+        record(f"{self.prefix}.{stage}", elapsed)
+        return elapsed
+
+    def total(self, stage: str = "total") -> float:
+        elapsed = time.perf_counter() - self.start
+        record(f"{self.prefix}.{stage}", elapsed)
+        return elapsed
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summary(prefix: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    """{series: {count, mean_ms, p50_ms, p95_ms, p99_ms, max_ms}} for series starting with prefix."""
+    with _lock:
+        snapshot = {k: sorted(v) for k, v in _series.items() if not prefix or k.startswith(prefix)}
+    out = {}
+    for name, values in sorted(snapshot.items()):
+        if not values:
+            continue
+        out[name] = {
+            "count": len(values),
+            "mean_ms": round(sum(values) / len(values) * 1000, 2),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p95_ms": round(percentile(values, 95) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2),
+        }
+    return out
+
+
+def reset(prefix: Optional[str] = None) -> None:
+    with _lock:
+        for name in [k for k in _series if not prefix or k.startswith(prefix)]:
+            del _series[name]
+
+
+async def monitor_event_loop_lag(interval: float = 0.01, name: str = "event_loop.lag") -> None:
+    """Run as a task: records how much later than `interval` each wake-up happens. Cancel to stop."""
+    while True:
+        t0 = time.perf_counter()
+        await asyncio.sleep(interval)
+        record(name, max(0.0, time.perf_counter() - t0 - interval))
+
+
+def format_summary(stats: Dict[str, Dict[str, float]]) -> str:
+    """Fixed-width table of summary() output."""
+    if not stats:
+        return "(no samples)"
+    width = max(len(k) for k in stats)
+    lines = [f"{'series':<{width}}  {'count':>7}  {'p50':>9}  {'p95':>9}  {'p99':>9}  {'max':>9}"]
+    for name, s in stats.items():
+        lines.append(
+            f"{name:<{width}}  {s['count']:>7}  {s['p50_ms']:>7.1f}ms  {s['p95_ms']:>7.1f}ms  "
+            f"{s['p99_ms']:>7.1f}ms  {s['max_ms']:>7.1f}ms"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,107 @@
+"""
+P&L Rollups - daily / weekly / monthly / per-strategy / all-time aggregates of closed trades,
+updated in O(1) per close instead of rescanning the trade history.
+Each bucket keeps count, wins, P&L, the Welford running mean / M2 of per-trade P&L (for the
+standard deviation and a per-trade Sharpe ratio) and its own equity, peak and max drawdown,
+which only need the previous values and the new trade. Buckets are rows of the trade ledger's
+SQLite file (core/trade_ledger.py calls apply() in the same transaction as the close).
+"""
+
+import math
+import sqlite3
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+SCOPES = ("day", "week", "month", "strategy", "all")
+FIELDS = ("count", "wins", "pnl", "mean", "m2", "equity", "peak", "max_drawdown")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    scope TEXT NOT NULL, key TEXT NOT NULL,
+    count INTEGER, wins INTEGER, pnl REAL, mean REAL, m2 REAL, equity REAL, peak REAL, max_drawdown REAL,
+    PRIMARY KEY (scope, key)
+);
+"""
+
+
+def new_bucket() -> Dict[str, Any]:
+    return {"count": 0, "wins": 0, "pnl": 0.0, "mean": 0.0, "m2": 0.0, "equity": 0.0, "peak": 0.0, "max_drawdown": 0.0}
+
+
+def add(bucket: Dict[str, Any], profit: float) -> Dict[str, Any]:
+    """Fold one closed trade into the bucket (Welford update + running drawdown)."""
+    profit = float(profit or 0)
+    bucket["count"] += 1
+    bucket["wins"] += profit > 0
+    bucket["pnl"] += profit
+    delta = profit - bucket["mean"]
+    bucket["mean"] += delta / bucket["count"]
+    bucket["m2"] += delta * (profit - bucket["mean"])
+    bucket["equity"] += profit
+    bucket["peak"] = max(bucket["peak"], bucket["equity"])
+    bucket["max_drawdown"] = max(bucket["max_drawdown"], bucket["peak"] - bucket["equity"])
+    return bucket
+
+
+def std(bucket: Dict[str, Any]) -> float:
+    """Sample standard deviation of per-trade P&L."""
+    return math.sqrt(bucket["m2"] / (bucket["count"] - 1)) if bucket["count"] > 1 else 0.0
+
+
+def sharpe(bucket: Dict[str, Any]) -> Optional[float]:
+    """Mean / std of per-trade P&L (not annualized); None until it is defined."""
+    sd = std(bucket)
+    return bucket["mean"] / sd if sd > 0 else None
+
+
+def win_rate(bucket: Dict[str, Any]) -> float:
+    return bucket["wins"] / bucket["count"] * 100 if bucket["count"] else 0.0
+
+
+def keys_for(exit_date: Optional[str], strategy: Optional[str]) -> List[Tuple[str, str]]:
+    """(scope, key) of every bucket a trade closed at exit_date ("YYYY-MM-DD ...") belongs to."""
+    keys = [("strategy", strategy or "Manual"), ("all", "all")]
+    try:
+        day = datetime.strptime((exit_date or "")[:10], "%Y-%m-%d")
+    except ValueError:
+        return keys
+    year, week, _ = day.isocalendar()
+    return [("day", day.strftime("%Y-%m-%d")), ("week", f"{year}-W{week:02d}"),
+            ("month", day.strftime("%Y-%m"))] + keys
+
+
+def current_keys(now: Optional[datetime] = None) -> Dict[str, str]:
+    """{"day": ..., "week": ..., "month": ...} for now (local time, like the trade timestamps)."""
+    return {scope: key for scope, key in keys_for((now or datetime.now()).strftime("%Y-%m-%d"), None)[:3]}
+
+
+# --- SQLite (caller holds the ledger lock / transaction) ---
+def apply(db: sqlite3.Connection, profit: float, exit_date: Optional[str], strategy: Optional[str]) -> None:
+    for scope, key in keys_for(exit_date, strategy):
+        bucket = add(get(db, scope, key) or new_bucket(), profit)
+        db.execute(
+            f"INSERT OR REPLACE INTO rollups (scope, key, {', '.join(FIELDS)}) VALUES (?, ?, {', '.join('?' * len(FIELDS))})",
+            (scope, key) + tuple(bucket[f] for f in FIELDS),
+        )
+
+
+def rebuild(db: sqlite3.Connection) -> None:
+    """Recompute every bucket from the closed trades, in close order (after bulk imports)."""
+    db.execute("DELETE FROM rollups")
+    rows = db.execute(
+        "SELECT profit, COALESCE(exit_date, date) AS closed_at, strategy FROM trades "
+        "WHERE status='closed' ORDER BY closed_at, seq"
+    ).fetchall()
+    for row in rows:
+        apply(db, row["profit"], row["closed_at"], row["strategy"])
+
+
+def get(db: sqlite3.Connection, scope: str, key: str) -> Optional[Dict[str, Any]]:
+    row = db.execute(f"SELECT {', '.join(FIELDS)} FROM rollups WHERE scope=? AND key=?", (scope, key)).fetchone()
+    return {f: row[f] for f in FIELDS} if row else None
+
+
+def scope(db: sqlite3.Connection, name: str) -> Dict[str, Dict[str, Any]]:
+    """{key: bucket} for one scope, keys in order."""
+    rows = db.execute(f"SELECT key, {', '.join(FIELDS)} FROM rollups WHERE scope=? ORDER BY key", (name,)).fetchall()
+    return {row["key"]: {f: row[f] for f in FIELDS} for row in rows}
@@ -0,0 +1,81 @@
+"""
+Stage runner: run blocking pipeline stages (data fetch, consensus, backtest, RSS) concurrently,
+each in a worker thread under its own deadline.
+A stage that errors or misses its deadline is reported and left out; its thread is not killed
+(Python can't), it finishes in the background and the result is dropped.
+"""
+
+import asyncio
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from core import metrics
+
+# Seconds per stage (name before ":"; "news:NVDA" uses "news")
+STAGE_TIMEOUTS: Dict[str, float] = {
+    "technical": 6.0,
+    "consensus": 2.0,
+    "skills_fit": 1.0,
+    "strategy_pick": 1.0,
+    "backtest": 4.0,
+    "news": 2.5,
+    "fast_path": 1.5,
+}
+DEFAULT_TIMEOUT = 3.0
+
+# Own pool: the default executor has only cpu+4 threads, and stalled stages hold theirs
+_POOL = ThreadPoolExecutor(max_workers=32, thread_name_prefix="stage")
+
+
+@dataclass
+class StageResult:
+    name: str
+    status: str  # ok | timeout | error | skipped
+    seconds: float = 0.0
+    value: Any = None
+    error: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "ok"
+
+
+def stage_timeout(name: str) -> float:
+    return STAGE_TIMEOUTS.get(name.split(":", 1)[0], DEFAULT_TIMEOUT)
+
+
+async def run_stage(name: str, fn: Optional[Callable[..., Any]], *args: Any, timeout: Optional[float] = None) -> StageResult:
+    """Run fn(*args) in the stage pool; never raises."""
+    if fn is None:
+        return StageResult(name, "skipped")
+    timeout = stage_timeout(name) if timeout is None else timeout
+    loop = asyncio.get_running_loop()
+    t0 = time.perf_counter()
+    try:
+        value = await asyncio.wait_for(loop.run_in_executor(_POOL, functools.partial(fn, *args)), timeout)
+        result = StageResult(name, "ok", value=value)
+    except asyncio.TimeoutError:
+        result = StageResult(name, "timeout", error=f"> {timeout:.1f}s")
+        print(f"⏱ Stage {name} dropped (> {timeout:.1f}s)")
+    except Exception as e:
+        result = StageResult(name, "error", error=str(e)[:80])
+        print(f"Stage {name} error: {e}")
+    result.seconds = time.perf_counter() - t0
+    metrics.record(f"ai_brain.stage.{name.split(':', 1)[0]}", result.seconds)
+    return result
+
+
+def format_stage_report(results: Dict[str, StageResult]) -> str:
+    """One line, e.g. '⏱ technical 0.4s ✓ · consensus 0.1s ✓ · news:NVDA 2.5s ✗ timeout'."""
+    parts = []
+    for name, r in results.items():
+        if r.status == "ok":
+            parts.append(f"{name} {r.seconds:.1f}s ✓")
+        elif r.status == "skipped":
+            parts.append(f"{name} –")
+        else:
+            parts.append(f"{name} {r.seconds:.1f}s ✗ {r.status}")
+    return "⏱ " + " · ".join(parts) if parts else ""
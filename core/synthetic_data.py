@@ -0,0 +1,313 @@
+"""
+Synthetic Data - Offline OHLCV provider (drop-in for yfinance.Ticker.history).
+Daily bars: geometric Brownian motion with Markov regime switches (bull / bear / chop),
+overnight gaps with occasional jumps, and volume that follows weekday seasonality and
+the size of the move. Intraday 5m bars are Brownian bridges between each day's open and
+close (pre-market bridges the gap from the previous close), with a U-shaped volume curve.
+Every symbol gets its own seeded path anchored at SYNTHETIC_EPOCH, so the same seed gives
+the same bars for the same dates regardless of the period requested.
+
+Select with STOCK_DATA_PROVIDER=synthetic (optionally SYNTHETIC_SEED), or set_provider().
+"""
+
+import os
+import zlib
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+MARKET_TZ = "America/New_York"
+SYNTHETIC_EPOCH = "2010-01-04"
+BAR_MINUTES = 5
+PRE_BARS, REGULAR_BARS, POST_BARS = 66, 78, 48  # 04:00-09:30, 09:30-16:00, 16:00-20:00
+
+# (daily drift, daily vol multiplier, mean length in days)
+REGIMES: Dict[str, Tuple[float, float, float]] = {
+    "bull": (0.0008, 0.8, 120.0),
+    "bear": (-0.0010, 1.6, 45.0),
+    "chop": (0.0, 1.0, 60.0),
+}
+# Row: from-regime, columns: to-regime (bull, bear, chop)
+_TRANSITIONS = np.array([[0.0, 0.4, 0.6], [0.5, 0.0, 0.5], [0.6, 0.4, 0.0]])
+_WEEKDAY_VOLUME = np.array([1.10, 0.95, 0.95, 1.00, 1.05])  # Mon..Fri
+
+_provider_override: Optional[str] = None
+_seed_override: Optional[int] = None
+
+
+def set_provider(name: Optional[str], seed: Optional[int] = None) -> None:
+    """Force "synthetic" or "yahoo" in-process (None: back to STOCK_DATA_PROVIDER)."""
+    global _provider_override, _seed_override
+    _provider_override = name
+    _seed_override = seed
+
+
+def provider_name() -> str:
+    return (_provider_override or os.getenv("STOCK_DATA_PROVIDER") or "yahoo").lower()
+
+
+def use_synthetic() -> bool:
+    return provider_name() == "synthetic"
+
+
+def default_seed() -> int:
+    if _seed_override is not None:
+        return _seed_override
+    try:
+        return int(os.getenv("SYNTHETIC_SEED", "0"))
+    except ValueError:
+        return 0
+
+
+def get_ticker(symbol: str) -> Any:
+    """SyntheticTicker when the synthetic provider is selected, else yfinance.Ticker."""
+    if use_synthetic():
+        return SyntheticTicker(symbol)
+    import yfinance as yf
+    return yf.Ticker(symbol)
+
+
+def synthetic_symbols(n: int, prefix: str = "SYN") -> List[str]:
+    """N made-up tickers for load tests at any universe size."""
+    width = max(3, len(str(n)))
+    return [f"{prefix}{i:0{width}d}" for i in range(n)]
+
+
+def _rng(symbol: str, seed: int, stream: int) -> np.random.Generator:
+    return np.random.default_rng([seed, zlib.crc32(symbol.upper().encode()), stream])
+
+
+def _regime_path(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Regime index per day: geometric durations, transitions from _TRANSITIONS."""
+    names = list(REGIMES)
+    out = np.empty(n, dtype=np.int8)
+    i, state = 0, int(rng.integers(len(names)))
+    while i < n:
+        length = int(rng.geometric(1.0 / REGIMES[names[state]][2]))
+        out[i: i + length] = state
+        i += length
+        state = int(rng.choice(len(names), p=_TRANSITIONS[state]))
+    return out
+
+
+@lru_cache(maxsize=16)
+def _trading_days(end: date) -> pd.DatetimeIndex:
+    """Weekdays from SYNTHETIC_EPOCH to end (pd.bdate_range is ~50x slower)."""
+    days = np.arange(np.datetime64(SYNTHETIC_EPOCH), np.datetime64(end) + 1, dtype="datetime64[D]")
+    return pd.DatetimeIndex(days[np.is_busday(days)])
+
+
+def _simulate(symbol: str, seed: int, end: date) -> Dict[str, np.ndarray]:
+    """Full history from SYNTHETIC_EPOCH to end: daily OHLCV plus the regular-session log paths."""
+    rng = _rng(symbol, seed, 0)
+    days = _trading_days(end)
+    n = len(days)
+    base_price = float(np.exp(rng.uniform(np.log(10), np.log(500))))
+    base_vol = float(rng.uniform(0.012, 0.035))
+    base_volume = float(np.exp(rng.uniform(np.log(2e5), np.log(5e7))))
+
+    regimes = _regime_path(rng, n)
+    drift = np.array([r[0] for r in REGIMES.values()])[regimes]
+    sigma = base_vol * np.array([r[1] for r in REGIMES.values()])[regimes]
+
+    # Overnight gap: small noise, plus a jump (earnings / news) on ~2% of days
+    gaps = rng.normal(0, 0.25 * sigma)
+    jumps = rng.random(n) < 0.02
+    gaps[jumps] += rng.normal(0, 4 * sigma[jumps])
+    session = drift - 0.5 * sigma ** 2 + sigma * rng.standard_normal(n)
+
+    log_open = np.empty(n)
+    log_close = np.empty(n)
+    moves = np.cumsum(gaps + session)
+    log_close[:] = np.log(base_price) + moves
+    log_open[:] = log_close - session
+
+    # Regular session: Brownian bridge from open to close per day
+    steps = np.linspace(0.0, 1.0, REGULAR_BARS + 1)
+    walk = np.zeros((n, REGULAR_BARS + 1))
+    walk[:, 1:] = np.cumsum(rng.standard_normal((n, REGULAR_BARS)), axis=1)
+    walk *= (sigma / np.sqrt(REGULAR_BARS))[:, None]
+    bridge = walk - steps * walk[:, -1:]
+    paths = log_open[:, None] + steps * (log_close - log_open)[:, None] + bridge
+
+    wick = np.abs(rng.normal(0, 0.1, (n, REGULAR_BARS))) * (sigma / np.sqrt(REGULAR_BARS))[:, None]
+    bar_high = np.maximum(paths[:, :-1], paths[:, 1:]) + wick
+    bar_low = np.minimum(paths[:, :-1], paths[:, 1:]) - wick
+
+    move_size = np.abs(gaps + session) / sigma
+    volume = (
+        base_volume
+        * _WEEKDAY_VOLUME[days.weekday]
+        * (0.6 + 0.4 * move_size)
+        * np.exp(rng.normal(0, 0.25, n))
+    )
+    return {
+        "days": days,
+        "sigma": sigma,
+        "open": np.exp(log_open),
+        "high": np.exp(bar_high.max(axis=1)),
+        "low": np.exp(bar_low.min(axis=1)),
+        "close": np.exp(log_close),
+        "volume": np.round(volume),
+        "paths": paths,
+        "bar_high": bar_high,
+        "bar_low": bar_low,
+    }
+
+
+@lru_cache(maxsize=512)
+def _daily(symbol: str, seed: int, end: date) -> Dict[str, np.ndarray]:
+    """Daily arrays only (the 5m paths are ~80x larger, so they are not kept)."""
+    sim = _simulate(symbol, seed, end)
+    return {k: sim[k] for k in ("days", "open", "high", "low", "close", "volume")}
+
+
+@lru_cache(maxsize=8)
+def _intraday(symbol: str, seed: int, end: date) -> Dict[str, np.ndarray]:
+    return _simulate(symbol, seed, end)
+
+
+def _resolve_end(end: Optional[Any]) -> date:
+    return pd.Timestamp(end).date() if end is not None else date.today()
+
+
+def daily_bars(symbol: str, days: int = 60, seed: Optional[int] = None, end: Optional[Any] = None) -> pd.DataFrame:
+    """The last `days` trading days of daily OHLCV up to end (default today), yfinance layout."""
+    sim = _daily(symbol.upper(), default_seed() if seed is None else seed, _resolve_end(end))
+    sl = slice(max(0, len(sim["days"]) - days), None)
+    index = sim["days"][sl].tz_localize(MARKET_TZ)
+    index.name = "Date"
+    return pd.DataFrame(
+        {
+            "Open": sim["open"][sl],
+            "High": sim["high"][sl],
+            "Low": sim["low"][sl],
+            "Close": sim["close"][sl],
+            "Volume": sim["volume"][sl],
+        },
+        index=index,
+    )
+
+
+def _u_shape(n_bars: int) -> np.ndarray:
+    x = np.linspace(-1.0, 1.0, n_bars)
+    w = 1.0 + 2.0 * x ** 2
+    return w / w.sum()
+
+
+def intraday_bars(
+    symbol: str,
+    days: int = 5,
+    seed: Optional[int] = None,
+    end: Optional[Any] = None,
+    prepost: bool = False,
+) -> pd.DataFrame:
+    """5m OHLCV for the last `days` trading days; regular bars agree with daily_bars()."""
+    symbol = symbol.upper()
+    seed = default_seed() if seed is None else seed
+    sim = _intraday(symbol, seed, _resolve_end(end))
+    total = len(sim["days"])
+    sl = slice(max(0, total - days), total)
+    n = sl.stop - sl.start
+    paths, sigma = sim["paths"][sl], sim["sigma"][sl]
+
+    log_o = paths[:, :-1]
+    log_c = paths[:, 1:]
+    log_h = sim["bar_high"][sl]
+    log_l = sim["bar_low"][sl]
+    volume = sim["volume"][sl, None] * 0.9 * _u_shape(REGULAR_BARS)
+    minutes = 570 + BAR_MINUTES * np.arange(REGULAR_BARS)
+
+    if prepost:
+        rng = _rng(symbol, seed, 1)
+        ext_sigma = (0.3 * sigma / np.sqrt(REGULAR_BARS))[:, None]
+        prev_close = np.log(np.concatenate([[sim["open"][sl][0]], sim["close"][sl][:-1]]))
+        steps = np.linspace(0.0, 1.0, PRE_BARS + 1)
+        walk = np.zeros((n, PRE_BARS + 1))
+        walk[:, 1:] = np.cumsum(rng.standard_normal((n, PRE_BARS)), axis=1) * ext_sigma
+        pre = prev_close[:, None] + steps * (paths[:, :1] - prev_close[:, None]) + walk - steps * walk[:, -1:]
+        post = np.empty((n, POST_BARS + 1))
+        post[:, 0] = paths[:, -1]
+        post[:, 1:] = paths[:, -1:] + np.cumsum(rng.standard_normal((n, POST_BARS)), axis=1) * ext_sigma
+
+        def _ext(p):
+            o, c = p[:, :-1], p[:, 1:]
+            w = np.abs(rng.normal(0, 0.1, o.shape)) * ext_sigma
+            return o, c, np.maximum(o, c) + w, np.minimum(o, c) - w
+
+        pre_o, pre_c, pre_h, pre_l = _ext(pre)
+        post_o, post_c, post_h, post_l = _ext(post)
+        log_o = np.hstack([pre_o, log_o, post_o])
+        log_c = np.hstack([pre_c, log_c, post_c])
+        log_h = np.hstack([pre_h, log_h, post_h])
+        log_l = np.hstack([pre_l, log_l, post_l])
+        ext_volume = sim["volume"][sl, None] * 0.05
+        volume = np.hstack([
+            ext_volume * np.full(PRE_BARS, 1.0 / PRE_BARS),
+            volume,
+            ext_volume * np.full(POST_BARS, 1.0 / POST_BARS),
+        ])
+        minutes = np.concatenate([
+            240 + BAR_MINUTES * np.arange(PRE_BARS),
+            minutes,
+            960 + BAR_MINUTES * np.arange(POST_BARS),
+        ])
+
+    stamps = (
+        sim["days"][sl].values[:, None] + (minutes * 60_000_000_000).astype("timedelta64[ns]")
+    ).ravel()
+    index = pd.DatetimeIndex(stamps).tz_localize(MARKET_TZ)
+    index.name = "Datetime"
+    return pd.DataFrame(
+        {
+            "Open": np.exp(log_o).ravel(),
+            "High": np.exp(log_h).ravel(),
+            "Low": np.exp(log_l).ravel(),
+            "Close": np.exp(log_c).ravel(),
+            "Volume": np.round(volume).ravel(),
+        },
+        index=index,
+    )
+
+
+def _period_days(period: str) -> int:
+    """yfinance period string -> calendar days."""
+    period = (period or "1mo").strip().lower()
+    if period == "max":
+        return (date.today() - pd.Timestamp(SYNTHETIC_EPOCH).date()).days
+    if period == "ytd":
+        return date.today().timetuple().tm_yday
+    for suffix, mult in (("mo", 30), ("wk", 7), ("d", 1), ("y", 365)):
+        if period.endswith(suffix):
+            return int(period[: -len(suffix)]) * mult
+    raise ValueError(f"Unsupported period {period!r}")
+
+
+class SyntheticTicker:
+    """Subset of yfinance.Ticker used in this repo: history(period, interval, prepost)."""
+
+    def __init__(self, symbol: str, seed: Optional[int] = None, end: Optional[Any] = None):
+        self.ticker = symbol.upper()
+        self.seed = default_seed() if seed is None else seed
+        self.end = _resolve_end(end)
+
+    def history(self, period: str = "1mo", interval: str = "1d", prepost: bool = False, **_: Any) -> pd.DataFrame:
+        start = self.end - timedelta(days=max(1, _period_days(period)) - 1)
+        # Like Yahoo, a period that covers no session (weekend) still returns the last one
+        days = max(1, int(np.busday_count(start, self.end + timedelta(days=1))))
+        if interval == "1d":
+            return daily_bars(self.ticker, days, self.seed, self.end)
+        minutes = 60 if interval == "1h" else int(interval.rstrip("m")) if interval.endswith("m") else 0
+        if minutes <= 0 or minutes % BAR_MINUTES:
+            raise ValueError(f"Unsupported interval {interval!r}")
+        df = intraday_bars(self.ticker, days, self.seed, self.end, prepost=prepost)
+        if minutes == BAR_MINUTES:
+            return df
+        return (
+            df.resample(f"{minutes}min")
+            .agg({"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"})
+            .dropna(subset=["Open"])
+        )
@@ -0,0 +1,230 @@
+"""
+Trade Ledger - trades in SQLite (WAL) instead of loading / rewriting trades_history.json.
+One row per trade, indexed on (symbol, status), status, date, exit date and strategy, so
+the open position for a symbol and the open positions are single queries; win rate and
+per-strategy totals come from the rollups instead of scans of the whole history.
+WAL lets the bot write while the Streamlit dashboard reads. On first open an empty ledger
+imports trades_history.json once (the file is left in place as a backup; a meta flag stops
+a second import).
+Fields beyond the indexed columns (e.g. the dashboard's "price") are kept in an extra JSON column.
+Every close also updates the P&L rollups (core/rollups.py) in the same transaction.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from . import rollups
+from .config import TRADES_FILE
+
+LEDGER_DB = Path(os.getenv("TRADE_LEDGER_DB", "trades.db"))
+
+COLUMNS = ("id", "type", "symbol", "strategy", "status", "entry_price", "quantity", "date",
+           "exit_price", "exit_date", "profit", "profit_pct")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trades (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT, type TEXT, symbol TEXT, strategy TEXT, status TEXT,
+    entry_price REAL, quantity NUMERIC, date TEXT,
+    exit_price REAL, exit_date TEXT, profit REAL, profit_pct REAL,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_trades_symbol_status ON trades(symbol, status);
+CREATE INDEX IF NOT EXISTS idx_trades_status ON trades(status);
+CREATE INDEX IF NOT EXISTS idx_trades_date ON trades(date);
+CREATE INDEX IF NOT EXISTS idx_trades_exit_date ON trades(exit_date);
+CREATE INDEX IF NOT EXISTS idx_trades_strategy ON trades(strategy, status);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def connect(path: Path) -> sqlite3.Connection:
+    """Autocommit connection in WAL mode, shared across threads (callers hold a lock)."""
+    db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+    db.row_factory = sqlite3.Row
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.execute("PRAGMA busy_timeout=5000")
+    return db
+
+
+def transaction(db: sqlite3.Connection, fn):
+    """Run fn() inside BEGIN IMMEDIATE / COMMIT, rolling back on any error (caller holds the lock)."""
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        result = fn()
+        db.execute("COMMIT")
+        return result
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+
+
+class TradeLedger:
+    """Trades as dicts (same shape as trades_history.json, plus "seq" = row id)."""
+
+    def __init__(self, path: Path = LEDGER_DB, json_file: Optional[Path] = TRADES_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._db = connect(self.path)
+        self._db.executescript(_SCHEMA + rollups.SCHEMA)
+        if json_file is not None:
+            self.migrate_json(Path(json_file))
+        if not self._query("SELECT 1 FROM rollups LIMIT 1") and self._query(
+                "SELECT 1 FROM trades WHERE status='closed' LIMIT 1"):
+            with self._lock:
+                self._transaction(lambda: rollups.rebuild(self._db))
+
+    # --- rows <-> dicts ---
+    @staticmethod
+    def _row(trade: Dict[str, Any]) -> Tuple:
+        extra = {k: v for k, v in trade.items() if k not in COLUMNS and k != "seq"}
+        return tuple(trade.get(c) for c in COLUMNS) + (json.dumps(extra, default=str) if extra else None,)
+
+    @staticmethod
+    def _dict(row: sqlite3.Row) -> Dict[str, Any]:
+        trade = json.loads(row["extra"]) if row["extra"] else {}
+        trade.update({c: row[c] for c in COLUMNS if row[c] is not None})
+        trade["seq"] = row["seq"]
+        return trade
+
+    def _query(self, sql: str, args: Iterable = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            return self._db.execute(sql, tuple(args)).fetchall()
+
+    def _transaction(self, fn):
+        return transaction(self._db, fn)
+
+    # --- writes ---
+    def add(self, trade: Dict[str, Any]) -> int:
+        """Insert one trade (a closed one also updates the rollups); returns its seq."""
+        placeholders = ", ".join("?" * (len(COLUMNS) + 1))
+
+        def insert():
+            cur = self._db.execute(
+                f"INSERT INTO trades ({', '.join(COLUMNS)}, extra) VALUES ({placeholders})", self._row(trade)
+            )
+            if trade.get("status") == "closed":
+                rollups.apply(self._db, trade.get("profit"), trade.get("exit_date") or trade.get("date"),
+                              trade.get("strategy"))
+            return cur.lastrowid
+
+        with self._lock:
+            return self._transaction(insert)
+
+    def close_trade(self, seq: int, exit_price: float, profit: float, profit_pct: float, exit_date: str) -> bool:
+        def update():
+            cur = self._db.execute(
+                "UPDATE trades SET status='closed', exit_price=?, profit=?, profit_pct=?, exit_date=? "
+                "WHERE seq=? AND status='open'",
+                (exit_price, profit, profit_pct, exit_date, seq),
+            )
+            if cur.rowcount != 1:
+                return False
+            strategy = self._db.execute("SELECT strategy FROM trades WHERE seq=?", (seq,)).fetchone()[0]
+            rollups.apply(self._db, profit, exit_date, strategy)
+            return True
+
+        with self._lock:
+            return self._transaction(update)
+
+    def replace_all(self, trades: List[Dict[str, Any]]) -> None:
+        """Whole-list save (legacy save_trades) in one transaction."""
+        placeholders = ", ".join("?" * (len(COLUMNS) + 1))
+        def replace():
+            self._db.execute("DELETE FROM trades")
+            self._db.executemany(
+                f"INSERT INTO trades ({', '.join(COLUMNS)}, extra) VALUES ({placeholders})",
+                [self._row(t) for t in trades],
+            )
+            rollups.rebuild(self._db)
+
+        with self._lock:
+            self._transaction(replace)
+
+    def migrate_json(self, json_file: Path) -> int:
+        """Import trades_history.json once into an empty ledger. Returns the number imported."""
+        if self._query("SELECT 1 FROM meta WHERE key='json_migrated'") or not json_file.exists():
+            return 0
+        imported = 0
+        if not self._query("SELECT 1 FROM trades LIMIT 1"):
+            try:
+                trades = json.loads(json_file.read_text(encoding="utf-8"))
+            except Exception as e:
+                print(f"⚠️ Trade ledger: could not read {json_file}: {e}")
+                return 0
+            self.replace_all(trades)
+            imported = len(trades)
+            print(f"✅ Trade ledger: imported {imported} trades from {json_file}")
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('json_migrated', ?)", (str(json_file),))
+        return imported
+
+    # --- reads ---
+    def all(self) -> List[Dict[str, Any]]:
+        return [self._dict(r) for r in self._query("SELECT * FROM trades ORDER BY seq")]
+
+    def recent(self, n: int = 5) -> List[Dict[str, Any]]:
+        rows = self._query("SELECT * FROM trades ORDER BY seq DESC LIMIT ?", (n,))
+        return [self._dict(r) for r in reversed(rows)]
+
+    def open_trade(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Latest open trade for symbol (what a sell closes)."""
+        rows = self._query(
+            "SELECT * FROM trades WHERE symbol=? AND status='open' ORDER BY seq DESC LIMIT 1", (symbol,)
+        )
+        return self._dict(rows[0]) if rows else None
+
+    def open_positions(self) -> List[Dict[str, Any]]:
+        return [self._dict(r) for r in self._query("SELECT * FROM trades WHERE status='open' ORDER BY seq")]
+
+    def win_rate(self) -> Tuple[float, int, int]:
+        """(win_rate_pct, wins, total) over closed trades (all-time rollup)."""
+        bucket = self.current("all")
+        return rollups.win_rate(bucket), bucket["wins"], bucket["count"]
+
+    def strategy_stats(self) -> Dict[str, Dict[str, Any]]:
+        """{strategy: {"trades", "wins", "losses", "profit"}} over closed trades."""
+        return {name: {"trades": b["count"], "wins": b["wins"], "losses": b["count"] - b["wins"], "profit": b["pnl"]}
+                for name, b in self.buckets("strategy").items()}
+
+    def rollup(self, scope: str, key: str) -> Dict[str, Any]:
+        """One P&L bucket, e.g. rollup("week", "2025-W10") (empty bucket if nothing closed there)."""
+        with self._lock:
+            return rollups.get(self._db, scope, key) or rollups.new_bucket()
+
+    def current(self, scope: str) -> Dict[str, Any]:
+        """Today's / this week's / this month's bucket (scope "day" / "week" / "month"), or "all"."""
+        return self.rollup(scope, "all" if scope == "all" else rollups.current_keys()[scope])
+
+    def buckets(self, scope: str) -> Dict[str, Dict[str, Any]]:
+        """{key: bucket} for a scope ("day", "week", "month", "strategy")."""
+        with self._lock:
+            return rollups.scope(self._db, scope)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_ledger: Optional[TradeLedger] = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger() -> TradeLedger:
+    """Process-wide ledger on LEDGER_DB (created and migrated on first use)."""
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = TradeLedger()
+        return _ledger
+
+
+def set_ledger(ledger: Optional[TradeLedger]) -> None:
+    global _ledger
+    with _ledger_lock:
+        _ledger = ledger
@@ -29,19 +29,25 @@ def _ensure_df(trades: List[Dict]) -> Optional["pd.DataFrame"]:
         return None
 
 
-def create_equity_curve(trades: List[Dict], weekly_goal: float = 10000) -> Optional[Any]:
+def create_equity_curve(trades: List[Dict], weekly_goal: float = 10000,
+                        daily: Optional[Dict[str, float]] = None) -> Optional[Any]:
     """
     Cumulative P&L over time (equity curve).
     trades: list of trade dicts with 'date' or 'exit_date', 'profit'.
+    daily: {"YYYY-MM-DD": P&L} (core/rollups.py day buckets); used instead of trades when given.
     """
     if not PLOTLY_AVAILABLE or not go:
         return None
+    if daily is not None:
+        dates = sorted(daily)
+        equity, total = [], 0.0
+        for d in dates:
+            total += float(daily[d])
+            equity.append(total)
+        return _equity_figure(dates, equity, weekly_goal)
     closed = [t for t in trades if t.get("status") == "closed" and t.get("profit") is not None]
     if not closed:
-        fig = go.Figure()
-        fig.add_annotation(text="No closed trades yet", xref="paper", yref="paper", x=0.5, y=0.5, showarrow=False)
-        fig.update_layout(title="Equity Curve", height=300, margin=dict(t=40, b=30, l=40, r=20))
-        return fig
+        return _equity_figure([], [], weekly_goal)
     df = _ensure_df(closed)
     if df is None:
         return None
@@ -52,8 +58,17 @@ def create_equity_curve(trades: List[Dict], weekly_goal: float = 10000) -> Optio
     df = df.dropna(subset=["date", "profit"])
     df = df.sort_values("date")
     df["cumulative_pnl"] = df["profit"].cumsum()
+    return _equity_figure(df["date"], df["cumulative_pnl"], weekly_goal)
+
+
+def _equity_figure(dates, equity, weekly_goal: float) -> Any:
+    if len(dates) == 0:
+        fig = go.Figure()
+        fig.add_annotation(text="No closed trades yet", xref="paper", yref="paper", x=0.5, y=0.5, showarrow=False)
+        fig.update_layout(title="Equity Curve", height=300, margin=dict(t=40, b=30, l=40, r=20))
+        return fig
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=df["date"], y=df["cumulative_pnl"], mode="lines+markers", name="Cumulative P&L", line=dict(color="#667eea", width=2)))
+    fig.add_trace(go.Scatter(x=dates, y=equity, mode="lines+markers", name="Cumulative P&L", line=dict(color="#667eea", width=2)))
     if weekly_goal and weekly_goal > 0:
         fig.add_hline(y=weekly_goal, line_dash="dash", line_color="gray", annotation_text="Weekly goal")
     fig.update_layout(title="Equity Curve", xaxis_title="Date", yaxis_title="Cumulative P&L ($)", height=320, margin=dict(t=40, b=30, l=50, r=20), template="plotly_white")
@@ -84,23 +99,25 @@ def create_strategy_performance_chart(strategies: Dict[str, Dict[str, Any]]) ->
     return fig
 
 
-def create_daily_pnl_chart(trades: List[Dict]) -> Optional[Any]:
+def create_daily_pnl_chart(trades: List[Dict], daily: Optional[Dict[str, float]] = None) -> Optional[Any]:
     """
     Bar chart: daily P&L (each day one bar).
+    daily: {"YYYY-MM-DD": P&L} (core/rollups.py day buckets); used instead of trades when given.
     """
     if not PLOTLY_AVAILABLE or not go:
         return None
     closed = [t for t in trades if t.get("status") == "closed" and t.get("profit") is not None]
-    if not closed:
+    if not closed and not daily:
         fig = go.Figure()
         fig.add_annotation(text="No closed trades yet", xref="paper", yref="paper", x=0.5, y=0.5, showarrow=False)
         fig.update_layout(title="Daily P&L", height=280, margin=dict(t=40, b=30, l=50, r=20))
         return fig
-    daily = defaultdict(float)
-    for t in closed:
-        d = (t.get("exit_date") or t.get("date") or "")[:10]
-        if d:
-            daily[d] += float(t.get("profit", 0))
+    if daily is None:
+        daily = defaultdict(float)
+        for t in closed:
+            d = (t.get("exit_date") or t.get("date") or "")[:10]
+            if d:
+                daily[d] += float(t.get("profit", 0))
     dates = sorted(daily.keys())
     pnls = [daily[d] for d in dates]
     colors = ["#22c55e" if p >= 0 else "#ef4444" for p in pnls]
@@ -0,0 +1,410 @@
+"""
+Intraday Backtester - Event-driven replay of stored 5-minute bars.
+The skills are written for 5m-1h trading, so this replays bar by bar the way the
+bot sees the market: indicators are updated incrementally (StreamingIndicators,
+O(1) per bar), agents decide on each bar close, entries fill at the next bar's open,
+stops / targets are checked on every bar's High / Low, and positions are flattened
+at the end of the last tradable session of the day (pre 04:00-09:30, regular
+09:30-16:00, post 16:00-20:00 New York time).
+
+Bars are kept in a local store (BAR_STORE_DIR/<SYMBOL>_5m.csv) that update_bar_store()
+extends from Yahoo; Yahoo only serves ~60 days of 5m bars, so run it regularly.
+"""
+
+import math
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Sequence
+
+try:
+    import yfinance as yf
+except ImportError:
+    yf = None
+
+try:
+    import numpy as np
+    import pandas as pd
+except ImportError:
+    np = None
+    pd = None
+
+from backtester import BacktestCosts, compute_metrics
+
+BAR_STORE_DIR = Path("data/bars_5m")
+MARKET_TZ = "America/New_York"
+BARS_PER_YEAR = 252 * 78  # regular-session 5m bars
+
+SESSION_CODES = {"pre": 0, "regular": 1, "post": 2}
+# Session boundaries in minutes after midnight, New York time
+_SESSION_BOUNDS = ((240, 570, 0), (570, 960, 1), (960, 1200, 2))
+
+
+def session_codes(index: "pd.DatetimeIndex") -> "np.ndarray":
+    """0 pre / 1 regular / 2 post / -1 outside, per bar (index converted to New York time)."""
+    if index.tz is None:
+        index = index.tz_localize(MARKET_TZ)
+    local = index.tz_convert(MARKET_TZ)
+    minutes = np.asarray(local.hour * 60 + local.minute)
+    codes = np.full(len(index), -1, dtype=np.int8)
+    for lo, hi, code in _SESSION_BOUNDS:
+        codes[(minutes >= lo) & (minutes < hi)] = code
+    return codes
+
+
+class _RollingExtreme:
+    """Rolling max (or min) over the last n values, amortized O(1) via a monotonic deque."""
+
+    __slots__ = ("n", "is_max", "q", "i")
+
+    def __init__(self, n: int, is_max: bool):
+        self.n = n
+        self.is_max = is_max
+        self.q: deque = deque()
+        self.i = 0
+
+    def push(self, x: float) -> float:
+        q = self.q
+        if self.is_max:
+            while q and q[-1][1] <= x:
+                q.pop()
+        else:
+            while q and q[-1][1] >= x:
+                q.pop()
+        i = self.i
+        q.append((i, x))
+        if q[0][0] <= i - self.n:
+            q.popleft()
+        self.i = i + 1
+        return q[0][1] if i + 1 >= self.n else math.nan
+
+
+class _RollingMean:
+    """Rolling mean (and sample std) over the last n values with running sums."""
+
+    __slots__ = ("n", "buf", "count", "s", "ss")
+
+    def __init__(self, n: int):
+        self.n = n
+        self.buf: deque = deque()
+        self.count = 0
+        self.s = 0.0
+        self.ss = 0.0
+
+    def push(self, x: float) -> float:
+        self.buf.append(x)
+        self.s += x
+        self.ss += x * x
+        if self.count == self.n:
+            old = self.buf.popleft()
+            self.s -= old
+            self.ss -= old * old
+            return self.s / self.n
+        self.count += 1
+        return self.s / self.n if self.count == self.n else math.nan
+
+    def std(self) -> float:
+        n = self.n
+        if self.count < n:
+            return math.nan
+        var = (self.ss - self.s * self.s / n) / (n - 1)
+        return math.sqrt(var) if var > 0 else 0.0
+
+
+class StreamingIndicators:
+    """
+    Incremental version of backtester.add_indicators: same definitions (EMA 5/9/21,
+    RSI 14, volume ratio 20, support/resistance 20, Bollinger 20/2, Donchian 20/40
+    on prior bars, ATR 14), updated one bar at a time. update() refreshes self.data,
+    a market_data dict in the shape the strategy agents read (NaN -> agent defaults).
+    """
+
+    _A5, _A9, _A21 = 2.0 / 6, 2.0 / 10, 2.0 / 22
+
+    def __init__(self):
+        self._ema5 = self._ema9 = self._ema21 = None
+        self._gain = _RollingMean(14)
+        self._loss = _RollingMean(14)
+        self._vol = _RollingMean(20)
+        self._close = _RollingMean(20)
+        self._tr = _RollingMean(14)
+        self._sup = _RollingExtreme(20, False)
+        self._res = _RollingExtreme(20, True)
+        self._dc_hi_40 = _RollingExtreme(40, True)
+        self._dc_lo_40 = _RollingExtreme(40, False)
+        self._prev_close: Optional[float] = None
+        self._prev_high = self._prev_low = 0.0
+        self.bars = 0
+        self.data: Dict[str, Any] = {
+            "support": 0.0, "resistance": 0.0,
+            "donchian_upper_20": 0.0, "donchian_lower_20": 0.0,
+            "donchian_upper_40": 0.0, "donchian_lower_40": 0.0,
+            "week_52_high": 0.0, "week_52_low": 0.0,
+        }
+
+    def update(self, o: float, h: float, l: float, c: float, v: float) -> Dict[str, Any]:
+        d = self.data
+        prev = self._prev_close
+
+        if prev is None:
+            self._ema5 = self._ema9 = self._ema21 = c
+            # add_indicators counts the first bar's missing change as 0 gain / 0 loss
+            gain = loss = 0.0
+            tr = h - l
+        else:
+            self._ema5 += self._A5 * (c - self._ema5)
+            self._ema9 += self._A9 * (c - self._ema9)
+            self._ema21 += self._A21 * (c - self._ema21)
+            delta = c - prev
+            gain, loss = (delta, 0.0) if delta > 0 else (0.0, -delta)
+            tr = max(h - l, abs(h - prev), abs(l - prev))
+            # Donchian on prior bars: the 20-bar channel is the previous bar's support /
+            # resistance; the 40-bar one gets the previous bar pushed before this one counts
+            d["donchian_upper_20"] = d["resistance"]
+            d["donchian_lower_20"] = d["support"]
+            up = self._dc_hi_40.push(self._prev_high)
+            dn = self._dc_lo_40.push(self._prev_low)
+            d["donchian_upper_40"] = up if up == up else 0.0
+            d["donchian_lower_40"] = dn if dn == dn else 0.0
+
+        g = self._gain.push(gain)
+        lo = self._loss.push(loss)
+        vol_mean = self._vol.push(v)
+        sma = self._close.push(c)
+        atr = self._tr.push(tr)
+        sup = self._sup.push(l)
+        res = self._res.push(h)
+
+        ema_9 = self._ema9
+        d["current_price"] = c
+        d["ema_5"] = self._ema5
+        d["ema_9"] = ema_9
+        d["ema_21"] = self._ema21
+        d["rsi"] = 100 - 100 / (1 + g / (lo if lo != 0 else 1e-10)) if g == g else 50.0
+        d["volume_ratio"] = v / (vol_mean if vol_mean != 0 else 1) if vol_mean == vol_mean else 1.0
+        d["support"] = sup if sup == sup else 0.0
+        d["resistance"] = res if res == res else 0.0
+        if sma == sma:
+            std = self._close.std()
+            d["bb_upper"], d["bb_middle"], d["bb_lower"] = sma + 2 * std, sma, sma - 2 * std
+        else:
+            d["bb_upper"] = d["bb_middle"] = d["bb_lower"] = 0.0
+        d["atr"] = atr if atr == atr else 0.0
+        d["trend_en"] = "bullish" if c > ema_9 else "bearish"
+
+        self._prev_close, self._prev_high, self._prev_low = c, h, l
+        self.bars += 1
+        return d
+
+
+def bar_store_path(symbol: str, store_dir: Optional[Path] = None) -> Path:
+    return Path(store_dir or BAR_STORE_DIR) / f"{symbol.upper()}_5m.csv"
+
+
+def load_bars(
+    symbol: str,
+    store_dir: Optional[Path] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+) -> Optional["pd.DataFrame"]:
+    """Stored 5m OHLCV for symbol (New York time index), optionally sliced by date. None if missing."""
+    path = bar_store_path(symbol, store_dir)
+    if pd is None or not path.exists():
+        return None
+    try:
+        df = pd.read_csv(path, index_col=0)
+        df.index = pd.to_datetime(df.index, utc=True).tz_convert(MARKET_TZ)
+        if start or end:
+            df = df.loc[start:end]
+        return df
+    except Exception as e:
+        print(f"Bar store read error {symbol}: {e}")
+        return None
+
+
+def save_bars(symbol: str, df: "pd.DataFrame", store_dir: Optional[Path] = None) -> int:
+    """Merge df into the stored bars (newest wins on duplicate timestamps). Returns stored bar count."""
+    path = bar_store_path(symbol, store_dir)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    df = df[["Open", "High", "Low", "Close", "Volume"]].copy()
+    df.index = pd.to_datetime(df.index, utc=True).tz_convert(MARKET_TZ)
+    existing = load_bars(symbol, store_dir)
+    if existing is not None and len(existing):
+        df = pd.concat([existing, df])
+        df = df[~df.index.duplicated(keep="last")]
+    df = df.sort_index()
+    df.to_csv(path)
+    return len(df)
+
+
+def update_bar_store(symbols: Sequence[str], store_dir: Optional[Path] = None) -> Dict[str, int]:
+    """Append the latest ~60 days of Yahoo 5m bars (pre/post included) to the store."""
+    counts = {}
+    if not yf:
+        return counts
+    for symbol in symbols:
+        try:
+            df = yf.Ticker(symbol).history(period="60d", interval="5m", prepost=True)
+            if df is None or df.empty:
+                continue
+            counts[symbol] = save_bars(symbol, df, store_dir)
+        except Exception as e:
+            print(f"Bar store update error {symbol}: {e}")
+    return counts
+
+
+def replay_symbol(
+    df: "pd.DataFrame",
+    agent: Any,
+    *,
+    sessions: Sequence[str] = ("regular",),
+    costs: Optional[BacktestCosts] = None,
+    initial_capital: float = 10_000.0,
+    position_pct: float = 100.0,
+    warmup_bars: int = 41,
+) -> Dict[str, Any]:
+    """
+    Event-driven replay of one symbol's 5m bars with one agent (long-only, like the daily engine).
+    Every bar updates the indicators (pre/post included); the agent only trades in `sessions`.
+    Per bar: pending entry fills at the open -> SELL exit at the open -> stop -> target
+    -> flatten if this is the day's last tradable bar -> agent decides on the close.
+    Returns {"trades", "equity" (per bar), "metrics", "bars"}.
+    """
+    costs = costs or BacktestCosts()
+    slip = costs.slippage_bps / 10_000.0
+    allowed = {SESSION_CODES[s] for s in sessions}
+
+    times = df.index.tz_localize(MARKET_TZ) if df.index.tz is None else df.index.tz_convert(MARKET_TZ)
+    codes = session_codes(times)
+    tradable = np.isin(codes, list(allowed))
+    day = np.asarray(times.normalize().asi8)
+    # Last tradable bar of each day: next tradable bar is on another day (or none)
+    trad_idx = np.flatnonzero(tradable)
+    last_of_day = np.zeros(len(df), dtype=bool)
+    if len(trad_idx):
+        ends = np.append(day[trad_idx][1:] != day[trad_idx][:-1], True)
+        last_of_day[trad_idx[ends]] = True
+
+    opens = df["Open"].to_numpy(dtype=float).tolist()
+    highs = df["High"].to_numpy(dtype=float).tolist()
+    lows = df["Low"].to_numpy(dtype=float).tolist()
+    closes = df["Close"].to_numpy(dtype=float).tolist()
+    volumes = df["Volume"].to_numpy(dtype=float).tolist()
+    tradable_l = tradable.tolist()
+    last_l = last_of_day.tolist()
+
+    ind = StreamingIndicators()
+    decide, build_signal = agent.decide, agent.build_signal
+    commission = costs.commission
+
+    cash = float(initial_capital)
+    qty = 0
+    entry_px = stop = target = 0.0
+    entry_bar = -1
+    pending_buy: Optional[tuple] = None
+    pending_sell = False
+    equity = np.empty(len(df))
+    trades: List[Dict[str, Any]] = []
+
+    def close(i: int, px: float, reason: str) -> None:
+        nonlocal cash, qty
+        c = commission(qty)
+        cash += qty * px - c
+        pnl = qty * (px - entry_px) - c - commission(qty)
+        trades.append({
+            "entry_bar": entry_bar,
+            "exit_bar": i,
+            "entry_time": str(times[entry_bar]),
+            "exit_time": str(times[i]),
+            "entry_price": round(entry_px, 4),
+            "exit_price": round(px, 4),
+            "shares": qty,
+            "pnl": round(pnl, 2),
+            "return_pct": round(pnl / (qty * entry_px) * 100, 3),
+            "exit_reason": reason,
+        })
+        qty = 0
+
+    for i in range(len(opens)):
+        o, h, l, c = opens[i], highs[i], lows[i], closes[i]
+        md = ind.update(o, h, l, c, volumes[i])
+        if tradable_l[i]:
+            if pending_buy is not None and qty == 0:
+                px = o * (1 + slip)
+                n = int(cash * position_pct / 100.0 // px) if px > 0 else 0
+                while n > 0 and n * px + commission(n) > cash:
+                    n -= 1
+                if n > 0:
+                    qty, entry_px, entry_bar = n, px, i
+                    stop, target = pending_buy
+                    cash -= n * px + commission(n)
+            elif pending_sell and qty:
+                close(i, o * (1 - slip), "signal")
+            pending_buy, pending_sell = None, False
+            if qty and stop and l <= stop:
+                close(i, min(o, stop) * (1 - slip), "stop")
+            if qty and target and h >= target:
+                close(i, max(o, target), "target")
+            if last_l[i]:
+                if qty:
+                    close(i, c * (1 - slip), "session_end")
+            elif ind.bars > warmup_bars:
+                action, conf, reason = decide(md)
+                if action == "BUY" and qty == 0:
+                    sig = build_signal(action, conf, reason, md)
+                    pending_buy = (sig.stop_loss or 0.0, sig.target or 0.0)
+                elif action == "SELL" and qty:
+                    pending_sell = True
+        equity[i] = cash + qty * c
+
+    if qty:
+        close(len(opens) - 1, closes[-1] * (1 - slip), "end")
+        equity[-1] = cash
+    return {
+        "trades": trades,
+        "equity": equity,
+        "metrics": compute_metrics(equity, trades, initial_capital, periods_per_year=BARS_PER_YEAR),
+        "bars": len(opens),
+    }
+
+
+def run_intraday_backtest(
+    symbols: Sequence[str],
+    agent: Any,
+    *,
+    bars: Optional[Dict[str, "pd.DataFrame"]] = None,
+    store_dir: Optional[Path] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    sessions: Sequence[str] = ("regular",),
+    costs: Optional[BacktestCosts] = None,
+    initial_capital: float = 10_000.0,
+) -> Dict[str, Any]:
+    """
+    Replay stored 5m bars (or the given bars dict) for each symbol with one agent.
+    Each symbol has its own initial_capital account. Returns per-symbol metrics,
+    trades and a combined summary.
+    """
+    per_symbol = {}
+    trades = []
+    total_bars = 0
+    for symbol in symbols:
+        df = bars.get(symbol) if bars else load_bars(symbol, store_dir, start, end)
+        if df is None or len(df) == 0:
+            print(f"⚠️ No 5m bars for {symbol}")
+            continue
+        out = replay_symbol(df, agent, sessions=sessions, costs=costs, initial_capital=initial_capital)
+        per_symbol[symbol] = out["metrics"]
+        trades.extend(dict(t, symbol=symbol) for t in out["trades"])
+        total_bars += out["bars"]
+    if not per_symbol:
+        return {"error": "No 5m bars for any symbol"}
+    pnl = sum(t["pnl"] for t in trades)
+    return {
+        "strategy": agent.skill_name,
+        "sessions": list(sessions),
+        "bars": total_bars,
+        "per_symbol": per_symbol,
+        "trades": trades,
+        "total_pnl": round(pnl, 2),
+        "win_rate": round(sum(t["pnl"] > 0 for t in trades) / len(trades) * 100, 1) if trades else 0.0,
+    }
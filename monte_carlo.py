@@ -0,0 +1,203 @@
+"""
+Monte Carlo - Robustness of a backtest's trade sequence.
+Resamples the per-trade returns (i.i.d. bootstrap, or circular block bootstrap to keep
+streaks together) into thousands of alternative paths and reports the distribution of
+final equity, max drawdown, risk of ruin and the probability of reaching weekly_goal.
+All paths are built as one (n_paths, n_trades) NumPy array; no per-path Python loop.
+"""
+
+import math
+from typing import Dict, List, Any, Optional, Sequence
+
+import numpy as np
+
+from core.config import load_config
+
+_PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def resample_returns(
+    returns: Sequence[float],
+    n_paths: int,
+    n_trades: Optional[int] = None,
+    *,
+    method: str = "bootstrap",
+    block_size: int = 5,
+    seed: Optional[int] = None,
+) -> np.ndarray:
+    """
+    (n_paths, n_trades) array of trade returns drawn from returns.
+    bootstrap: each trade drawn independently.
+    block: circular blocks of block_size consecutive trades (keeps win/loss streaks).
+    """
+    r = np.asarray(returns, dtype=float)
+    n = len(r)
+    if n == 0:
+        raise ValueError("need at least one trade return")
+    n_trades = n_trades or n
+    rng = np.random.default_rng(seed)
+    if method == "bootstrap":
+        idx = rng.integers(0, n, size=(n_paths, n_trades))
+    elif method == "block":
+        block_size = max(1, min(block_size, n))
+        n_blocks = math.ceil(n_trades / block_size)
+        starts = rng.integers(0, n, size=(n_paths, n_blocks, 1))
+        idx = ((starts + np.arange(block_size)) % n).reshape(n_paths, -1)[:, :n_trades]
+    else:
+        raise ValueError(f"method must be 'bootstrap' or 'block', got {method!r}")
+    return r[idx]
+
+
+def equity_paths(
+    sampled: np.ndarray,
+    initial_capital: float,
+    position_pct: float = 100.0,
+) -> np.ndarray:
+    """Compounded equity after each trade: (n_paths, n_trades + 1), first column = initial_capital."""
+    growth = 1.0 + sampled * (position_pct / 100.0)
+    np.maximum(growth, 0.0, out=growth)  # can't lose more than the account
+    paths = np.empty((sampled.shape[0], sampled.shape[1] + 1))
+    paths[:, 0] = initial_capital
+    np.cumprod(growth, axis=1, out=paths[:, 1:])
+    paths[:, 1:] *= initial_capital
+    return paths
+
+
+def max_drawdowns(paths: np.ndarray) -> np.ndarray:
+    """Max peak-to-trough drawdown (%) of each path."""
+    peaks = np.maximum.accumulate(paths, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dd = np.where(peaks > 0, (peaks - paths) / peaks, 0.0)
+    return dd.max(axis=1) * 100
+
+
+def _percentiles(values: np.ndarray) -> Dict[str, float]:
+    return {f"p{p}": round(float(v), 2) for p, v in zip(_PERCENTILES, np.percentile(values, _PERCENTILES))}
+
+
+def run_monte_carlo(
+    trade_returns_pct: Sequence[float],
+    *,
+    initial_capital: float = 10_000.0,
+    position_pct: float = 100.0,
+    weekly_goal: Optional[float] = None,
+    trades_per_week: float = 5.0,
+    horizon_trades: Optional[int] = None,
+    n_paths: int = 10_000,
+    method: str = "bootstrap",
+    block_size: int = 5,
+    ruin_pct: float = 50.0,
+    seed: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Monte Carlo over per-trade returns in % (backtester trades' "return_pct").
+    Horizon: horizon_trades (default: as many trades as the backtest had).
+    Weekly goal (default: config weekly_goal): fraction of paths whose profit reaches the goal
+    within the first round(trades_per_week) trades (touching counts), and at week end.
+    Risk of ruin: fraction of paths with a drawdown of ruin_pct or more over the horizon.
+    """
+    returns = np.asarray(trade_returns_pct, dtype=float) / 100.0
+    if len(returns) == 0:
+        return {"error": "No trades to resample"}
+    if weekly_goal is None:
+        weekly_goal = float(load_config().get("weekly_goal", 0) or 0)
+    horizon = horizon_trades or len(returns)
+    week = max(1, int(round(trades_per_week)))
+
+    sampled = resample_returns(
+        returns, n_paths, max(horizon, week), method=method, block_size=block_size, seed=seed
+    )
+    paths = equity_paths(sampled, initial_capital, position_pct)
+    horizon_paths = paths[:, : horizon + 1]
+    final = horizon_paths[:, -1]
+    dd = max_drawdowns(horizon_paths)
+    week_profit = paths[:, 1: week + 1] - initial_capital
+
+    return {
+        "method": method,
+        "block_size": block_size if method == "block" else None,
+        "n_paths": n_paths,
+        "n_trades": int(len(returns)),
+        "horizon_trades": int(horizon),
+        "initial_capital": initial_capital,
+        "final_equity": {
+            **_percentiles(final),
+            "mean": round(float(final.mean()), 2),
+        },
+        "max_drawdown_pct": {
+            **_percentiles(dd),
+            "mean": round(float(dd.mean()), 2),
+        },
+        "prob_profit": round(float((final > initial_capital).mean()), 4),
+        "risk_of_ruin": round(float((dd >= ruin_pct).mean()), 4),
+        "ruin_pct": ruin_pct,
+        "weekly_goal": weekly_goal,
+        "trades_per_week": week,
+        "prob_hit_weekly_goal": round(float((week_profit.max(axis=1) >= weekly_goal).mean()), 4) if weekly_goal > 0 else None,
+        "prob_weekly_goal_at_close": round(float((week_profit[:, -1] >= weekly_goal).mean()), 4) if weekly_goal > 0 else None,
+    }
+
+
+def monte_carlo_from_backtest(
+    backtest: Dict[str, Any],
+    *,
+    initial_capital: float = 10_000.0,
+    **kwargs: Any,
+) -> Dict[str, Any]:
+    """
+    run_monte_carlo() on a backtester.run_pnl_backtest() (or backtest_frame) result.
+    trades_per_week defaults to the backtest's own trade frequency (5 bars per week).
+    """
+    trades: List[Dict[str, Any]] = backtest.get("trades") or []
+    if not trades:
+        return {"error": "No trades to resample"}
+    bars = backtest.get("total_days") or len(backtest.get("equity_curve", []))
+    if "trades_per_week" not in kwargs and bars:
+        kwargs["trades_per_week"] = max(1.0, len(trades) / (bars / 5))
+    return run_monte_carlo([t["return_pct"] for t in trades], initial_capital=initial_capital, **kwargs)
+
+
+def format_monte_carlo(result: Dict[str, Any]) -> str:
+    """Short text summary."""
+    if result.get("error"):
+        return f"⚠️ {result['error']}"
+    fe, dd = result["final_equity"], result["max_drawdown_pct"]
+    lines = [
+        f"Monte Carlo ({result['method']}, {result['n_paths']:,} paths x {result['horizon_trades']} trades)",
+        f"Final equity p5/p50/p95: ${fe['p5']:,.0f} / ${fe['p50']:,.0f} / ${fe['p95']:,.0f}",
+        f"Max drawdown p50/p95: {dd['p50']:.1f}% / {dd['p95']:.1f}%",
+        f"P(profit) {result['prob_profit'] * 100:.1f}% | Risk of ruin (DD>={result['ruin_pct']:.0f}%) {result['risk_of_ruin'] * 100:.1f}%",
+    ]
+    if result.get("prob_hit_weekly_goal") is not None:
+        lines.append(
+            f"Weekly goal ${result['weekly_goal']:,.0f} in {result['trades_per_week']} trades: "
+            f"touch {result['prob_hit_weekly_goal'] * 100:.1f}% | at week end {result['prob_weekly_goal_at_close'] * 100:.1f}%"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from backtester import run_pnl_backtest
+    from strategy_agents.base_agent import StrategyAgent
+
+    parser = argparse.ArgumentParser(description="Monte Carlo resampling of a strategy backtest")
+    parser.add_argument("symbol")
+    parser.add_argument("--strategy", default="EMA Crossover")
+    parser.add_argument("--days", type=int, default=756)
+    parser.add_argument("--capital", type=float, default=10_000.0)
+    parser.add_argument("--paths", type=int, default=10_000)
+    parser.add_argument("--method", choices=["bootstrap", "block"], default="bootstrap")
+    parser.add_argument("--block-size", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    bt = run_pnl_backtest(args.symbol.upper(), StrategyAgent(args.strategy, {}), args.days, initial_capital=args.capital)
+    if bt.get("error"):
+        print(f"⚠️ {bt['error']}")
+    else:
+        print(format_monte_carlo(monte_carlo_from_backtest(
+            bt, initial_capital=args.capital, n_paths=args.paths,
+            method=args.method, block_size=args.block_size, seed=args.seed,
+        )))
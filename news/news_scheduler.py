@@ -29,13 +29,13 @@ async def _run_morning_digest():
         return
     try:
         from core import load_config
-        from openai import OpenAI
+        from core.llm_gateway import get_gateway
         from news.news_system import NewsSystem
 
         config = load_config()
         watchlist = config.get("priority") or config.get("watchlist") or ["NVDA", "PLTR", "RKLB"]
-        client = OpenAI(api_key=os.getenv("OPENAI_KEY"))
-        if not os.getenv("OPENAI_KEY"):
+        client = get_gateway()  # same pooled client as the bot
+        if not client:
             print("⚠️ News scheduler: OPENAI_KEY missing")
             return
 
@@ -103,7 +103,7 @@ class NewsSystem:
 {{ "important_news": [1, 5, 8], "reasons": ["原因1", "原因2"] }}
 """
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=300,
@@ -131,7 +131,7 @@ class NewsSystem:
         prompt = f"""分析以下新闻的情绪。标题: {news['title']}\n摘要: {news['summary']}
 返回 JSON: {{ "sentiment": "bullish 或 bearish 或 neutral", "reason": "一句话" }}"""
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=150,
@@ -191,7 +191,7 @@ Headlines:
 
 Reply with the digest only, no bullet list."""
         try:
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=200,
@@ -0,0 +1,400 @@
+"""
+Portfolio Backtester - Several strategies over a whole watchlist (or screener universe)
+sharing one capital pool, under the `risk` settings from core.config.
+
+Signal generation is the expensive part (agents run bar by bar), so symbols are
+sharded across a process pool; each worker returns compact per-strategy signal
+arrays. The portfolio accounting (cash, sizing, stops, daily loss limit) then runs
+once in the parent over a common calendar, vectorized across symbols per day.
+"""
+
+import csv
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Sequence
+
+import numpy as np
+
+from backtester import (
+    BacktestCosts,
+    add_indicators,
+    compute_metrics,
+    fetch_historical,
+    generate_signals,
+    market_data_rows,
+    signal_arrays,
+)
+from core.config import DEFAULT_CONFIG, load_config
+from strategy_agents.base_agent import StrategyAgent
+
+_PROJECT_ROOT = Path(__file__).resolve().parent
+_NASDAQ_SCREENER_GLOB = "nasdaq_screener_*.csv"
+_START_IDX = 41
+
+
+def screener_universe(
+    min_market_cap: float = 2e9,
+    sectors: Optional[Sequence[str]] = None,
+    min_volume: float = 1e6,
+    limit: int = 100,
+) -> List[str]:
+    """
+    Symbols from the newest nasdaq_screener_*.csv in project root, filtered by market cap,
+    sector and volume, largest market cap first. Empty list if no CSV.
+    """
+    csv_files = sorted(_PROJECT_ROOT.glob(_NASDAQ_SCREENER_GLOB), key=lambda p: p.stat().st_mtime, reverse=True)
+    if not csv_files:
+        return []
+    wanted = {s.lower() for s in sectors} if sectors else None
+    rows = []
+    with open(csv_files[0], "r", encoding="utf-8", errors="ignore") as f:
+        for row in csv.DictReader(f):
+            try:
+                cap = float(row.get("Market Cap") or 0)
+                volume = float(row.get("Volume") or 0)
+            except ValueError:
+                continue
+            symbol = (row.get("Symbol") or "").strip()
+            if not symbol or "^" in symbol or "/" in symbol:
+                continue
+            if cap < min_market_cap or volume < min_volume:
+                continue
+            if wanted and (row.get("Sector") or "").strip().lower() not in wanted:
+                continue
+            rows.append((cap, symbol))
+    rows.sort(reverse=True)
+    return [symbol for _, symbol in rows[:limit]]
+
+
+def resolve_agents(strategies: Sequence[str]) -> List[StrategyAgent]:
+    """Skill agents by name (case-insensitive); code-only strategies (e.g. Sigma Series) are built by name."""
+    from strategy_orchestrator import StrategyOrchestrator
+
+    by_name = {a.skill_name.lower(): a for a in StrategyOrchestrator().agents}
+    return [by_name.get(name.lower()) or StrategyAgent(name, {}) for name in strategies]
+
+
+def _shard_signals(
+    shard: List[tuple],
+    agents: List[StrategyAgent],
+    days: int,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Worker: for each (symbol, frame or None) fetch if needed, then run every agent.
+    Returns symbol -> {dates, open, high, low, close, actions, stops, targets, confidence}
+    with per-strategy arrays stacked as (n_strategies, n_bars).
+    """
+    out = {}
+    for symbol, df in shard:
+        if df is None:
+            df = fetch_historical(symbol, days)
+        elif "bb_std" not in df.columns:
+            df = add_indicators(df.copy())
+        if df is None or len(df) <= _START_IDX + 1:
+            continue
+        n = len(df)
+        rows = market_data_rows(df, _START_IDX)
+        actions = np.zeros((len(agents), n), dtype=np.int8)
+        stops = np.full((len(agents), n), np.nan)
+        targets = np.full((len(agents), n), np.nan)
+        confidence = np.zeros((len(agents), n))
+        for k, agent in enumerate(agents):
+            signals = generate_signals(agent, rows)
+            actions[k], stops[k], targets[k] = signal_arrays(signals, n, _START_IDX)
+            confidence[k, _START_IDX:] = [s.confidence if s is not None else 0.0 for s in signals]
+        out[symbol] = {
+            "dates": df.index.strftime("%Y-%m-%d").to_numpy().astype("datetime64[D]"),
+            "open": df["Open"].to_numpy(dtype=float),
+            "high": df["High"].to_numpy(dtype=float),
+            "low": df["Low"].to_numpy(dtype=float),
+            "close": df["Close"].to_numpy(dtype=float),
+            "actions": actions,
+            "stops": stops,
+            "targets": targets,
+            "confidence": confidence,
+        }
+    return out
+
+
+def _align(per_symbol: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Put every symbol on the union calendar: (n_symbols, n_days) arrays, NaN / 0 where no bar."""
+    symbols = list(per_symbol)
+    calendar = np.unique(np.concatenate([d["dates"] for d in per_symbol.values()]))
+    n_sym, n_days = len(symbols), len(calendar)
+    n_strat = next(iter(per_symbol.values()))["actions"].shape[0]
+    aligned = {
+        "symbols": symbols,
+        "calendar": calendar,
+        "open": np.full((n_sym, n_days), np.nan),
+        "high": np.full((n_sym, n_days), np.nan),
+        "low": np.full((n_sym, n_days), np.nan),
+        "close": np.full((n_sym, n_days), np.nan),
+        "actions": np.zeros((n_strat, n_sym, n_days), dtype=np.int8),
+        "stops": np.full((n_strat, n_sym, n_days), np.nan),
+        "targets": np.full((n_strat, n_sym, n_days), np.nan),
+        "confidence": np.zeros((n_strat, n_sym, n_days)),
+    }
+    for i, symbol in enumerate(symbols):
+        d = per_symbol[symbol]
+        cols = np.searchsorted(calendar, d["dates"])
+        for key in ("open", "high", "low", "close"):
+            aligned[key][i, cols] = d[key]
+        for key in ("actions", "stops", "targets", "confidence"):
+            aligned[key][:, i, cols] = d[key]
+    return aligned
+
+
+def simulate_portfolio(
+    aligned: Dict[str, Any],
+    strategies: Sequence[str],
+    *,
+    risk: Dict[str, Any],
+    costs: BacktestCosts,
+    initial_capital: float,
+) -> Dict[str, Any]:
+    """
+    Shared-cash, long-only accounting over the aligned arrays. Per day:
+    1) SELL signals from the strategy that opened a position exit at the open;
+    2) yesterday's BUY signals enter at the open, highest confidence first, each sized to
+       max_position_pct of yesterday's closing equity (whole shares, cash permitting), stop no wider than
+       stop_loss_pct below entry;
+    3) stops then targets are checked on the day's Low / High;
+    4) if the day's P&L is at or below -max_daily_loss, everything is flattened at the close
+       and that day's new signals are skipped.
+    """
+    slip = costs.slippage_bps / 10_000.0
+    max_pos = float(risk.get("max_position_pct", 5)) / 100.0
+    stop_cap = float(risk.get("stop_loss_pct", 2)) / 100.0
+    max_daily_loss = float(risk.get("max_daily_loss", 0) or 0)
+
+    symbols = aligned["symbols"]
+    calendar = aligned["calendar"]
+    open_, high, low, close = aligned["open"], aligned["high"], aligned["low"], aligned["close"]
+    actions, stops, targets, confidence = (
+        aligned["actions"], aligned["stops"], aligned["targets"], aligned["confidence"]
+    )
+    n_sym, n_days = close.shape
+
+    # Last known close for mark-to-market on days a symbol has no bar
+    mark = close.copy()
+    for d in range(1, n_days):
+        missing = np.isnan(mark[:, d])
+        mark[missing, d] = mark[missing, d - 1]
+    mark = np.nan_to_num(mark)
+
+    cash = float(initial_capital)
+    shares = np.zeros(n_sym, dtype=np.int64)
+    entry_px = np.zeros(n_sym)
+    pos_stop = np.full(n_sym, np.nan)
+    pos_target = np.full(n_sym, np.nan)
+    pos_strategy = np.full(n_sym, -1)
+    entry_day = np.zeros(n_sym, dtype=np.int64)
+    equity = np.zeros(n_days)
+    trades: List[Dict[str, Any]] = []
+    halted_days = 0
+    prev_equity = float(initial_capital)
+    blocked = False
+
+    def close_position(i: int, d: int, px: float, reason: str) -> None:
+        nonlocal cash
+        qty = int(shares[i])
+        cash += qty * px - costs.commission(qty)
+        pnl = qty * (px - entry_px[i]) - 2 * costs.commission(qty)
+        trades.append({
+            "symbol": symbols[i],
+            "strategy": strategies[pos_strategy[i]],
+            "entry_bar": int(entry_day[i]),
+            "exit_bar": d,
+            "entry_date": str(calendar[entry_day[i]])[:10],
+            "exit_date": str(calendar[d])[:10],
+            "entry_price": round(float(entry_px[i]), 4),
+            "exit_price": round(px, 4),
+            "shares": qty,
+            "pnl": round(pnl, 2),
+            "return_pct": round(pnl / (qty * entry_px[i]) * 100, 3),
+            "exit_reason": reason,
+        })
+        shares[i] = 0
+        pos_strategy[i] = -1
+
+    for d in range(n_days):
+        trading = ~np.isnan(open_[:, d])
+        if d > 0:
+            # 1) signal exits at the open
+            held = np.flatnonzero((shares > 0) & trading)
+            for i in held:
+                if actions[pos_strategy[i], i, d - 1] == -1:
+                    close_position(i, d, float(open_[i, d]) * (1 - slip), "signal")
+
+            # 2) entries at the open
+            if not blocked:
+                buy = actions[:, :, d - 1] == 1
+                candidates = np.flatnonzero(buy.any(axis=0) & (shares == 0) & trading)
+                if len(candidates):
+                    conf = np.where(buy[:, candidates], confidence[:, candidates, d - 1], -1.0)
+                    best_strategy = conf.argmax(axis=0)
+                    order = np.argsort(-conf.max(axis=0), kind="stable")
+                    for j in order:
+                        i, k = candidates[j], best_strategy[j]
+                        px = float(open_[i, d]) * (1 + slip)
+                        qty = int(min(equity[d - 1] * max_pos, cash) // px) if px > 0 else 0
+                        while qty > 0 and qty * px + costs.commission(qty) > cash:
+                            qty -= 1
+                        if qty <= 0:
+                            continue
+                        cash -= qty * px + costs.commission(qty)
+                        shares[i] = qty
+                        entry_px[i] = px
+                        entry_day[i] = d
+                        pos_strategy[i] = k
+                        stop = stops[k, i, d - 1]
+                        if stop_cap > 0 and not stop >= px * (1 - stop_cap):
+                            stop = px * (1 - stop_cap)
+                        pos_stop[i] = stop
+                        pos_target[i] = targets[k, i, d - 1]
+
+        # 3) stops, then targets, on today's range
+        held = (shares > 0) & trading
+        stop_hit = held & (low[:, d] <= pos_stop)
+        for i in np.flatnonzero(stop_hit):
+            close_position(i, d, min(float(open_[i, d]), float(pos_stop[i])) * (1 - slip), "stop")
+        target_hit = (shares > 0) & trading & (high[:, d] >= pos_target)
+        for i in np.flatnonzero(target_hit):
+            close_position(i, d, max(float(open_[i, d]), float(pos_target[i])), "target")
+
+        # 4) daily loss limit
+        equity[d] = cash + float((shares * mark[:, d]).sum())
+        blocked = False
+        if max_daily_loss > 0 and equity[d] - prev_equity <= -max_daily_loss:
+            halted_days += 1
+            blocked = True
+            for i in np.flatnonzero((shares > 0) & trading):
+                close_position(i, d, float(close[i, d]) * (1 - slip), "daily_loss")
+            equity[d] = cash + float((shares * mark[:, d]).sum())
+        prev_equity = equity[d]
+
+    last = n_days - 1
+    for i in np.flatnonzero(shares > 0):
+        close_position(i, last, float(mark[i, last]) * (1 - slip), "end")
+    equity[last] = cash
+    return {"equity": equity, "trades": trades, "halted_days": halted_days}
+
+
+def run_portfolio_backtest(
+    strategies: Sequence[str],
+    symbols: Optional[Sequence[str]] = None,
+    *,
+    days: int = 756,
+    history: Optional[Dict[str, Any]] = None,
+    risk: Optional[Dict[str, Any]] = None,
+    costs: Optional[BacktestCosts] = None,
+    initial_capital: float = 100_000.0,
+    max_workers: Optional[int] = None,
+    shards_per_worker: int = 4,
+) -> Dict[str, Any]:
+    """
+    Backtest strategies over symbols (default: config watchlist) with one cash pool.
+    history: optional symbol -> OHLCV DataFrame (skips the Yahoo fetch).
+    risk: defaults to load_config()["risk"] (DEFAULT_CONFIG risk keys).
+    max_workers=0 generates signals in-process.
+    Returns metrics, trades, equity curve, per-symbol / per-strategy P&L and throughput.
+    """
+    config = load_config()
+    symbols = list(symbols or (history.keys() if history else config.get("watchlist", [])))
+    risk = {**DEFAULT_CONFIG["risk"], **config.get("risk", {}), **(risk or {})}
+    costs = costs or BacktestCosts()
+    agents = resolve_agents(strategies)
+    if not symbols or not agents:
+        return {"error": "No symbols or strategies"}
+
+    t0 = time.perf_counter()
+    items = [(s, history.get(s) if history else None) for s in symbols]
+    per_symbol: Dict[str, Dict[str, Any]] = {}
+    if max_workers == 0:
+        per_symbol = _shard_signals(items, agents, days)
+    else:
+        workers = max_workers or os.cpu_count() or 1
+        n_shards = max(1, min(len(items), workers * shards_per_worker))
+        shard_size = math.ceil(len(items) / n_shards)
+        shards = [items[i:i + shard_size] for i in range(0, len(items), shard_size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for part in pool.map(_shard_signals, shards, [agents] * len(shards), [days] * len(shards)):
+                per_symbol.update(part)
+    signal_seconds = time.perf_counter() - t0
+    if not per_symbol:
+        return {"error": "No history for any symbol"}
+
+    t1 = time.perf_counter()
+    aligned = _align(per_symbol)
+    sim = simulate_portfolio(
+        aligned, [a.skill_name for a in agents], risk=risk, costs=costs, initial_capital=initial_capital
+    )
+    merge_seconds = time.perf_counter() - t1
+    elapsed = signal_seconds + merge_seconds
+
+    symbol_years = sum(len(d["close"]) for d in per_symbol.values()) / 252
+    by_symbol: Dict[str, float] = {}
+    by_strategy: Dict[str, float] = {}
+    for t in sim["trades"]:
+        by_symbol[t["symbol"]] = round(by_symbol.get(t["symbol"], 0.0) + t["pnl"], 2)
+        by_strategy[t["strategy"]] = round(by_strategy.get(t["strategy"], 0.0) + t["pnl"], 2)
+
+    return {
+        "strategies": [a.skill_name for a in agents],
+        "symbols": aligned["symbols"],
+        "risk": risk,
+        "metrics": {**compute_metrics(sim["equity"], sim["trades"], initial_capital), "halted_days": sim["halted_days"]},
+        "pnl_by_symbol": by_symbol,
+        "pnl_by_strategy": by_strategy,
+        "trades": sim["trades"],
+        "equity_curve": [round(float(x), 2) for x in sim["equity"]],
+        "dates": [str(d)[:10] for d in aligned["calendar"]],
+        "throughput": {
+            "symbol_years": round(symbol_years, 2),
+            "signal_seconds": round(signal_seconds, 3),
+            "merge_seconds": round(merge_seconds, 3),
+            "symbol_years_per_sec": round(symbol_years / elapsed, 1) if elapsed > 0 else 0.0,
+        },
+    }
+
+
+def format_portfolio_report(result: Dict[str, Any]) -> str:
+    """Short text summary of run_portfolio_backtest()."""
+    if result.get("error"):
+        return f"⚠️ {result['error']}"
+    m = result["metrics"]
+    tp = result["throughput"]
+    lines = [
+        f"Portfolio: {len(result['symbols'])} symbols x {', '.join(result['strategies'])}",
+        f"Return {m['total_return_pct']:+.2f}% | Sharpe {m['sharpe']} | MaxDD {m['max_drawdown_pct']:.1f}% | "
+        f"{m['trades']} trades | Win {m['win_rate']:.0f}% | PF {m['profit_factor']} | halted {m['halted_days']}d",
+        f"Throughput: {tp['symbol_years']} symbol-years in {tp['signal_seconds'] + tp['merge_seconds']:.2f}s "
+        f"({tp['symbol_years_per_sec']} symbol-years/sec)",
+    ]
+    top = sorted(result["pnl_by_symbol"].items(), key=lambda kv: kv[1], reverse=True)
+    if top:
+        lines.append("By symbol: " + ", ".join(f"{s} {p:+.0f}" for s, p in top[:10]))
+    if result["pnl_by_strategy"]:
+        lines.append("By strategy: " + ", ".join(f"{s} {p:+.0f}" for s, p in result["pnl_by_strategy"].items()))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Multi-symbol portfolio backtest")
+    parser.add_argument("--strategies", nargs="+", default=DEFAULT_CONFIG["enabled_strategies"])
+    parser.add_argument("--symbols", nargs="*", help="default: config watchlist")
+    parser.add_argument("--screener", type=int, default=0, help="use the top N screener symbols by market cap")
+    parser.add_argument("--days", type=int, default=756)
+    parser.add_argument("--capital", type=float, default=100_000.0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    universe = screener_universe(limit=args.screener) if args.screener else args.symbols
+    print(format_portfolio_report(run_portfolio_backtest(
+        args.strategies, universe, days=args.days, initial_capital=args.capital, max_workers=args.workers
+    )))
@@ -17,6 +17,52 @@ class RulesEngine:
     we load rules once (~2,500 tokens) and send only relevant rules per request (~300-500 tokens).
     """
     
+    # Rule files per intent, most important first
+    RULE_MAP = {
+        'stock_analysis': [
+            'bot_rules',
+            'personal_preference',
+            'strategy_rules',
+            'market_rules',
+            'indicator_rules',
+            'response_templates'
+        ],
+        'news': [
+            'bot_rules',
+            'response_templates',
+            'language_rules'
+        ],
+        'strategy': [
+            'bot_rules',
+            'personal_preference',
+            'strategy_rules',
+            'market_rules',
+            'response_templates'
+        ],
+        'positions': [
+            'bot_rules',
+            'risk_rules',
+            'response_templates',
+            'language_rules'
+        ],
+        'performance': [
+            'bot_rules',
+            'risk_rules',
+            'response_templates',
+            'language_rules'
+        ],
+        'help': [
+            'bot_rules',
+            'response_templates',
+            'language_rules'
+        ],
+        'general': [
+            'bot_rules',
+            'personal_preference',
+            'language_rules'
+        ]
+    }
+
     def __init__(self, rules_dir='ai_rules', verbose=False):
         self.rules_dir = Path(rules_dir)
         self.rules = {}
@@ -55,53 +101,8 @@ class RulesEngine:
         
         This reduces context from ~2,500 tokens to ~300-800 tokens per request
         """
-        rule_map = {
-            'stock_analysis': [
-                'bot_rules',
-                'personal_preference',
-                'strategy_rules',
-                'market_rules',
-                'indicator_rules',
-                'response_templates'
-            ],
-            'news': [
-                'bot_rules',
-                'response_templates',
-                'language_rules'
-            ],
-            'strategy': [
-                'bot_rules',
-                'personal_preference',
-                'strategy_rules',
-                'market_rules',
-                'response_templates'
-            ],
-            'positions': [
-                'bot_rules',
-                'risk_rules',
-                'response_templates',
-                'language_rules'
-            ],
-            'performance': [
-                'bot_rules',
-                'risk_rules',
-                'response_templates',
-                'language_rules'
-            ],
-            'help': [
-                'bot_rules',
-                'response_templates',
-                'language_rules'
-            ],
-            'general': [
-                'bot_rules',
-                'personal_preference',
-                'language_rules'
-            ]
-        }
-        
         # Get rules for this intent
-        relevant_rule_names = rule_map.get(intent, ['bot_rules'])
+        relevant_rule_names = self.get_rule_names(intent)
         
         # Combine relevant rules
         combined_rules = "\n\n".join([
@@ -112,6 +113,10 @@ class RulesEngine:
         
         return combined_rules
     
+    def get_rule_names(self, intent: str) -> List[str]:
+        """Rule files used for this intent, most important first"""
+        return self.RULE_MAP.get(intent, ['bot_rules'])
+
     def get_rule(self, rule_name: str) -> str:
         """Get a specific rule by name"""
         return self.rules.get(rule_name, "")
@@ -18,7 +18,7 @@ class ScheduledPushSystem:
         self.bot = Bot(token=telegram_token)
         self.chat_id = chat_id
         self.skills_manager = skills_manager
-        self.client = client  # OpenAI client
+        self.client = client  # core.llm_gateway.LLMGateway
         self.scheduler = AsyncIOScheduler(timezone=pytz.timezone('Asia/Kuala_Lumpur'))
         
     async def start(self):
@@ -92,7 +92,7 @@ class ScheduledPushSystem:
 💡 今日建议: [一句话]
 """
             
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=400,
@@ -154,7 +154,7 @@ class ScheduledPushSystem:
 简短专业，中文回复。
 """
             
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=500,
@@ -224,7 +224,7 @@ class ScheduledPushSystem:
 ⏰ {datetime.now().strftime('%H:%M')} | 自动推送
 """
             
-            response = self.client.chat.completions.create(
+            response = await self.client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=400,
@@ -265,8 +265,11 @@ async def main():
     telegram_token = os.getenv("TELEGRAM_TOKEN")
     chat_id = os.getenv("TELEGRAM_CHAT_ID")  # 你的 Telegram Chat ID
     
-    from openai import OpenAI
-    client = OpenAI(api_key=os.getenv("OPENAI_KEY"))
+    from core.cassette import install as install_cassette
+    install_cassette()  # CASSETTE_MODE=record|replay
+    
+    from core.llm_gateway import get_gateway
+    client = get_gateway()  # shared async client (OPENAI_KEY)
     
     from skillset_manager import SkillsetManager
     skills_manager = SkillsetManager("skills")
@@ -0,0 +1,62 @@
+"""
+Benchmark the event-driven intraday backtester: replay a year of 5m bars for the
+config watchlist and report bars/sec.
+Run from project root: python scripts/bench_intraday.py [--store] [--max-seconds 10]
+- Default: core.synthetic_data bars (04:00-20:00 New York, 192 bars/day, 252 days, --seed).
+- --store: use the stored bars in data/bars_5m instead (see intraday_backtester.update_bar_store).
+- --max-seconds: exit 1 if the replay takes longer (for CI / regression tracking).
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from core.config import DEFAULT_CONFIG
+from core.synthetic_data import intraday_bars
+from intraday_backtester import load_bars, run_intraday_backtest
+from strategy_agents.base_agent import StrategyAgent
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--strategy", default="EMA Crossover")
+    parser.add_argument("--symbols", nargs="*", default=DEFAULT_CONFIG["watchlist"] + ["BMNR"])
+    parser.add_argument("--days", type=int, default=252)
+    parser.add_argument("--sessions", nargs="+", default=["regular"], choices=["pre", "regular", "post"])
+    parser.add_argument("--store", action="store_true", help="replay stored bars instead of synthetic ones")
+    parser.add_argument("--max-seconds", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.store:
+        bars = {s: load_bars(s) for s in args.symbols}
+        bars = {s: df for s, df in bars.items() if df is not None}
+    else:
+        bars = {s: intraday_bars(s, args.days, seed=args.seed, prepost=True) for s in args.symbols}
+    if not bars:
+        print("No bars to replay.")
+        return 1
+
+    agent = StrategyAgent(args.strategy, {})
+    t0 = time.perf_counter()
+    result = run_intraday_backtest(list(bars), agent, bars=bars, sessions=args.sessions)
+    elapsed = time.perf_counter() - t0
+
+    n_bars = result.get("bars", 0)
+    print(
+        f"{args.strategy} | {len(bars)} symbols | {n_bars:,} bars | sessions {','.join(args.sessions)} | "
+        f"{elapsed:.2f}s | {n_bars / elapsed:,.0f} bars/sec | {len(result.get('trades', []))} trades"
+    )
+    if args.max_seconds and elapsed > args.max_seconds:
+        print(f"FAIL: {elapsed:.2f}s > {args.max_seconds:.2f}s budget")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
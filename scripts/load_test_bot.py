@@ -0,0 +1,317 @@
+"""
+Load test for the Telegram message pipeline: N simulated users send messages and press
+buttons concurrently; reports p50/p95/p99 per handler and per ai_brain stage, plus
+event-loop lag and throughput.
+Run from project root: python scripts/load_test_bot.py [--users 20] [--messages 5]
+- Telegram: real Update objects on a stub Bot (no network, --telegram-ms per API call).
+- OpenAI: stub async client (--llm-ms per call; streamed replies send the first token after
+  30% of it) behind core.llm_gateway, as in production.
+- Market data: core.synthetic_data; other HTTP/RSS is served from cassettes/<--cassette>.jsonl
+  (core.cassette replay; unrecorded calls fail fast like a network error).
+- Runs in a scratch copy of the config/strategy JSON files, so the repo's files are untouched.
+- --json PATH writes the full report; --max-p95-ms fails (exit 1) if any handler p95 is higher.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+SYMBOLS = ["NVDA", "PLTR", "RKLB", "SOFI", "OKLO", "TSLA", "AAPL", "AMD"]
+STOCK_QUESTIONS = ["{sym} entry?", "{sym} 可以买吗", "{sym} 今天怎么样", "should I sell {sym}", "{sym} price?", "{sym} signal"]
+CHAT_QUESTIONS = ["今天市场怎么样?", "what is a good stop loss?", "explain RSI divergence", "本周策略建议"]
+# (scenario, weight)
+SCENARIOS = [("stock", 40), ("chat", 25), ("strategy", 20), ("compare_all", 5), ("usage", 10)]
+
+_update_ids = itertools.count(1)
+_message_ids = itertools.count(1)
+
+
+def _sandbox_workdir() -> Path:
+    """Scratch cwd with copies of the JSON state files and links to the rules/skills folders."""
+    workdir = Path(tempfile.mkdtemp(prefix="load_test_bot_"))
+    for path in PROJECT_ROOT.glob("*.json"):
+        shutil.copy(path, workdir / path.name)
+    for name in ("skills", "ai_rules", "cassettes", "data"):
+        if (PROJECT_ROOT / name).exists():
+            (workdir / name).symlink_to(PROJECT_ROOT / name, target_is_directory=True)
+    return workdir
+
+
+def _make_stub_bot(telegram_latency: float):
+    from telegram import Bot
+
+    class StubBot(Bot):
+        """Bot whose API calls return canned results after telegram_latency."""
+
+        async def _do_post(self, endpoint, data, **kwargs):
+            await asyncio.sleep(telegram_latency)
+            if endpoint in ("sendMessage", "editMessageText"):
+                return {
+                    "message_id": next(_message_ids),
+                    "date": int(time.time()),
+                    "chat": {"id": int(data.get("chat_id") or 1), "type": "private"},
+                    "text": data.get("text", ""),
+                }
+            return True
+
+    return StubBot("123456:LOADTEST")
+
+
+class StubOpenAI:
+    """Async chat.completions.create() that answers after `latency` seconds.
+    Reports usage like the API, including prompt caching: prompts of 1024+ tokens (~4 chars
+    each) get the prefix they share with a recent prompt as cached_tokens, in 128-token steps."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+        self._recent = collections.deque(maxlen=64)
+
+    def _usage(self, kwargs) -> SimpleNamespace:
+        prompt = json.dumps(kwargs.get("tools") or [], ensure_ascii=False) + "".join(
+            f"{m['role']}:{m.get('content') or ''}" for m in kwargs.get("messages", []))
+        tokens = len(prompt) // 4
+        shared = max((len(os.path.commonprefix([prompt, p])) for p in self._recent), default=0) // 4
+        cached = shared // 128 * 128 if tokens >= 1024 and shared >= 1024 else 0
+        self._recent.append(prompt)
+        return SimpleNamespace(prompt_tokens=tokens, completion_tokens=60, total_tokens=tokens + 60,
+                               prompt_tokens_details=SimpleNamespace(cached_tokens=cached))
+
+    async def _create(self, **kwargs):
+        self.calls += 1
+        text = "① 建議: 觀望 ② 入場 $100.00 ③ 目標 $105.00 ④ 止損 $98.00 ⑤ 等待突破確認"
+        usage = self._usage(kwargs)
+        if kwargs.get("stream"):
+            return self._stream(text, usage)
+        await asyncio.sleep(self.latency)
+        message = SimpleNamespace(content=text, tool_calls=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")], usage=usage)
+
+    async def _stream(self, text: str, usage: SimpleNamespace):
+        words = text.split(" ")
+        await asyncio.sleep(self.latency * 0.3)
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(self.latency * 0.7 / (len(words) - 1))
+            delta = SimpleNamespace(content=word if i == 0 else " " + word)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta, finish_reason=None)], usage=None)
+        yield SimpleNamespace(choices=[], usage=usage)
+
+
+def _user(user_id: int) -> dict:
+    return {"id": user_id, "is_bot": False, "first_name": f"load{user_id}"}
+
+
+def _message_update(bot, user_id: int, text: str):
+    from telegram import Update
+    data = {
+        "update_id": next(_update_ids),
+        "message": {
+            "message_id": next(_message_ids),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": _user(user_id),
+            "text": text,
+        },
+    }
+    if text.startswith("/"):
+        data["message"]["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return Update.de_json(data, bot)
+
+
+def _callback_update(bot, user_id: int, callback_data: str):
+    from telegram import Update
+    return Update.de_json({
+        "update_id": next(_update_ids),
+        "callback_query": {
+            "id": str(next(_update_ids)),
+            "chat_instance": str(user_id),
+            "data": callback_data,
+            "from": _user(user_id),
+            "message": {
+                "message_id": next(_message_ids),
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private"},
+                "text": "選擇策略",
+            },
+        },
+    }, bot)
+
+
+async def _timed(name: str, coro, errors: dict) -> None:
+    from core import metrics
+    t0 = time.perf_counter()
+    try:
+        await coro
+    except Exception as e:
+        errors[name] = errors.get(name, 0) + 1
+        print(f"⚠️ {name}: {type(e).__name__}: {e}")
+    finally:
+        metrics.record(f"handler.{name}", time.perf_counter() - t0)
+
+
+async def _simulate_user(tb, bot, user_id: int, n_messages: int, think: float, rng: random.Random,
+                         strategies: list, errors: dict) -> None:
+    context = SimpleNamespace(user_data={}, chat_data={}, bot=bot, args=[])
+    names, weights = zip(*SCENARIOS)
+    for _ in range(n_messages):
+        scenario = rng.choices(names, weights)[0]
+        if scenario in ("strategy", "compare_all") and "pending_symbol" not in context.user_data:
+            scenario = "stock"  # buttons only exist after a stock question
+        if scenario == "stock":
+            text = rng.choice(STOCK_QUESTIONS).format(sym=rng.choice(SYMBOLS))
+            await _timed("route_message", tb.route_message(_message_update(bot, user_id, text), context), errors)
+        elif scenario == "chat":
+            text = rng.choice(CHAT_QUESTIONS)
+            await _timed("route_message", tb.route_message(_message_update(bot, user_id, text), context), errors)
+        elif scenario == "strategy":
+            data = f"strat:{rng.choice(strategies)}"
+            await _timed("button_callback", tb.button_callback(_callback_update(bot, user_id, data), context), errors)
+        elif scenario == "compare_all":
+            update = _callback_update(bot, user_id, "strat:compare_all")
+            await _timed("button_callback.compare_all", tb.button_callback(update, context), errors)
+        else:
+            await _timed("usage_command", tb.usage_command(_message_update(bot, user_id, "/usage"), context), errors)
+        if think:
+            await asyncio.sleep(rng.uniform(0, 2 * think))
+
+
+async def run_load_test(
+    users: int = 20,
+    messages: int = 5,
+    *,
+    llm_latency: float = 0.8,
+    telegram_latency: float = 0.05,
+    think: float = 0.2,
+    sequential: bool = False,
+    seed: int = 0,
+) -> dict:
+    """Drive the handlers for `users` simulated chats and return the latency report."""
+    import telegram_bot as tb
+    from core import metrics
+    from core.llm_gateway import LLMGateway
+
+    bot = _make_stub_bot(telegram_latency)
+    llm = StubOpenAI(llm_latency)
+    gateway = tb.client = LLMGateway(client=llm)
+    tb.ai_usage_today = 0
+    tb.daily_limit = 10 ** 9
+    strategies = tb.strategy_orchestrator.list_all_strategies() if tb.strategy_orchestrator else ["EMA Crossover"]
+    errors: dict = {}
+    metrics.reset()
+
+    lag_task = asyncio.create_task(metrics.monitor_event_loop_lag())
+    t0 = time.perf_counter()
+    sessions = [
+        _simulate_user(tb, bot, 10_000 + i, messages, think, random.Random(seed * 100_003 + i), strategies, errors)
+        for i in range(users)
+    ]
+    if sequential:  # python-telegram-bot's default: one update at a time
+        for session in sessions:
+            await session
+    else:
+        await asyncio.gather(*sessions)
+    elapsed = time.perf_counter() - t0
+    lag_task.cancel()
+
+    stats = metrics.summary()
+    handled = sum(s["count"] for k, s in stats.items() if k.startswith("handler."))
+    return {
+        "users": users,
+        "messages_per_user": messages,
+        "mode": "sequential" if sequential else "concurrent",
+        "llm_latency_ms": llm_latency * 1000,
+        "telegram_latency_ms": telegram_latency * 1000,
+        "elapsed_s": round(elapsed, 2),
+        "updates": handled,
+        "updates_per_sec": round(handled / elapsed, 2) if elapsed else 0.0,
+        "llm_calls": llm.calls,
+        "prompt_tokens": gateway.stats["prompt_tokens"],
+        "cached_prompt_share": round(gateway.cached_share(), 3),
+        "errors": errors,
+        "handlers": {k: v for k, v in stats.items() if k.startswith("handler.")},
+        "stages": {k: v for k, v in stats.items() if k.startswith("ai_brain.")},
+        "llm": {k: v for k, v in stats.items() if k.startswith("llm.")},
+        "event_loop_lag": stats.get("event_loop.lag", {}),
+    }
+
+
+def format_report(report: dict) -> str:
+    from core.metrics import format_summary
+    lag = report["event_loop_lag"]
+    return "\n".join([
+        f"Load test: {report['users']} users x {report['messages_per_user']} msgs ({report['mode']}), "
+        f"LLM {report['llm_latency_ms']:.0f}ms, Telegram {report['telegram_latency_ms']:.0f}ms",
+        f"{report['updates']} updates in {report['elapsed_s']}s = {report['updates_per_sec']}/s | "
+        f"LLM calls {report['llm_calls']} | prompt tokens {report['prompt_tokens']:,} "
+        f"({report['cached_prompt_share']:.0%} cached) | errors {sum(report['errors'].values())}",
+        "",
+        "Handlers",
+        format_summary(report["handlers"]),
+        "",
+        "ai_brain stages",
+        format_summary(report["stages"]),
+        "",
+        "LLM (time to first token / full stream)",
+        format_summary(report["llm"]),
+        "",
+        f"Event-loop lag p50 {lag.get('p50_ms', 0):.1f}ms | p95 {lag.get('p95_ms', 0):.1f}ms | "
+        f"p99 {lag.get('p99_ms', 0):.1f}ms | max {lag.get('max_ms', 0):.1f}ms",
+    ])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=5, help="updates per user")
+    parser.add_argument("--llm-ms", type=float, default=800.0)
+    parser.add_argument("--telegram-ms", type=float, default=50.0)
+    parser.add_argument("--think-ms", type=float, default=200.0, help="mean pause between a user's updates")
+    parser.add_argument("--sequential", action="store_true", help="one update at a time (PTB default)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cassette", default="load_test", help="cassettes/<name>.jsonl to replay")
+    parser.add_argument("--json", type=Path, default=None)
+    parser.add_argument("--max-p95-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    # Offline before the bot module is imported: synthetic bars, replayed HTTP, no real keys
+    os.environ.update(STOCK_DATA_PROVIDER="synthetic", SYNTHETIC_SEED=str(args.seed),
+                      CASSETTE_MODE="replay", CASSETTE_NAME=args.cassette,
+                      CASSETTE_DIR=str(PROJECT_ROOT / "cassettes"))
+    for key in ("OPENAI_KEY", "OPENAI_API_KEY", "FINNHUB_API_KEY", "TELEGRAM_TOKEN", "TELEGRAM_TOKEN_LOCAL"):
+        os.environ.pop(key, None)
+    json_path = args.json.resolve() if args.json else None
+    os.chdir(_sandbox_workdir())
+
+    report = asyncio.run(run_load_test(
+        args.users, args.messages,
+        llm_latency=args.llm_ms / 1000, telegram_latency=args.telegram_ms / 1000,
+        think=args.think_ms / 1000, sequential=args.sequential, seed=args.seed,
+    ))
+    print(format_report(report))
+    if json_path:
+        json_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    worst = max((h["p95_ms"] for h in report["handlers"].values()), default=0.0)
+    if args.max_p95_ms and worst > args.max_p95_ms:
+        print(f"FAIL: handler p95 {worst:.0f}ms > {args.max_p95_ms:.0f}ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
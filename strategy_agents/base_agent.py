@@ -19,6 +19,15 @@ class TradingSignal:
     target: Optional[float] = None
 
 
+def _num(market_data: Dict[str, Any], key: str, default: float = 0) -> float:
+    """Read a numeric field; missing / None / 0 fall back to default."""
+    return float(market_data.get(key, default) or default)
+
+
+def _trend(market_data: Dict[str, Any]) -> str:
+    return (market_data.get('trend_en') or 'neutral').lower()
+
+
 class StrategyAgent:
     """
     One agent = one strategy (skill). Evaluates market_data against skill rules
@@ -31,43 +40,54 @@ class StrategyAgent:
         self.rules = skill_data.get('rules', {})
         self.params = skill_data.get('parameters', {})
         self.performance = skill_data.get('performance', {})
-        self.market_data_cache = {}  # Cache for accessing new indicators in _evaluate
 
     def analyze(self, market_data: Dict[str, Any]) -> TradingSignal:
         """
         Evaluate market_data against this strategy's rules.
         market_data should have: current_price, ema_9, ema_21, rsi, volume_ratio,
         support, resistance, trend_en (bullish/bearish/neutral), and optional new indicators.
+        Reentrant: no per-call state is stored on the agent, so one instance can be
+        shared across threads / tasks.
         """
-        # Cache market_data for _evaluate to access new indicators
-        self.market_data_cache = market_data
-        
-        price = float(market_data.get('current_price', 0) or 0)
-        ema_9 = float(market_data.get('ema_9', 0) or 0)
-        ema_21 = float(market_data.get('ema_21', 0) or 0)
-        rsi = float(market_data.get('rsi', 50) or 50)
-        vol_ratio = float(market_data.get('volume_ratio', 1) or 1)
-        support = float(market_data.get('support', 0) or 0)
-        resistance = float(market_data.get('resistance', 0) or 0)
-        trend_en = (market_data.get('trend_en') or 'neutral').lower()
-
-        if price <= 0:
+        if _num(market_data, 'current_price') <= 0:
             return TradingSignal("HOLD", 0, "No valid price", self.skill_name)
 
         # Strategy-specific logic (rule-based)
-        action, confidence, reasoning = self._evaluate(
-            price, ema_9, ema_21, rsi, vol_ratio, support, resistance, trend_en
-        )
+        action, confidence, reasoning = self.decide(market_data)
+        return self.build_signal(action, confidence, reasoning, market_data)
+
+    def decide(self, market_data: Dict[str, Any]) -> tuple:
+        """
+        Rule evaluation only: (action, confidence, reasoning).
+        Reads just the market_data fields the matching rule branch uses, so callers
+        can track each strategy's inputs (see StrategyOrchestrator.get_incremental_consensus).
+        """
+        return self._evaluate(market_data)
 
+    def build_signal(
+        self,
+        action: str,
+        confidence: float,
+        reasoning: str,
+        market_data: Dict[str, Any],
+    ) -> TradingSignal:
+        """Attach entry / stop / target for the current price to a decision."""
+        price = _num(market_data, 'current_price')
         entry_price = price
         stop_loss = None
         target = None
-        if action == "BUY" and support > 0:
-            stop_loss = round(support * 0.98, 2)
-            target = round(resistance * 1.02, 2) if resistance > price else round(price * 1.03, 2)
-        elif action == "SELL" and resistance > 0:
-            stop_loss = round(resistance * 1.02, 2)
-            target = round(support * 0.98, 2) if support < price else round(price * 0.97, 2)
+        if action == "BUY":
+            support = _num(market_data, 'support')
+            if support > 0:
+                resistance = _num(market_data, 'resistance')
+                stop_loss = round(support * 0.98, 2)
+                target = round(resistance * 1.02, 2) if resistance > price else round(price * 1.03, 2)
+        elif action == "SELL":
+            resistance = _num(market_data, 'resistance')
+            if resistance > 0:
+                support = _num(market_data, 'support')
+                stop_loss = round(resistance * 1.02, 2)
+                target = round(support * 0.98, 2) if support < price else round(price * 0.97, 2)
 
         return TradingSignal(
             action=action,
@@ -79,41 +99,29 @@ class StrategyAgent:
             target=target,
         )
 
-    def _evaluate(
-        self,
-        price: float,
-        ema_9: float,
-        ema_21: float,
-        rsi: float,
-        vol_ratio: float,
-        support: float,
-        resistance: float,
-        trend_en: str,
-    ) -> tuple:
-        """Return (action, confidence, reasoning) based on skill name and params."""
+    def _evaluate(self, market_data: Dict[str, Any]) -> tuple:
+        """
+        Return (action, confidence, reasoning) based on skill name and params.
+        Each branch reads only its own indicators from market_data.
+        """
         name = self.skill_name.lower()
+        md = market_data
         rsi_min = self.params.get('rsi_min', 40)
         rsi_max = self.params.get('rsi_max', 70)
         vol_min = self.params.get('volume_ratio', 1.5)
-        
-        # Get additional indicators from cached market_data if available
-        bb_upper = float(self.market_data_cache.get('bb_upper', 0) or 0)
-        bb_middle = float(self.market_data_cache.get('bb_middle', 0) or 0)
-        bb_lower = float(self.market_data_cache.get('bb_lower', 0) or 0)
-        donchian_upper_20 = float(self.market_data_cache.get('donchian_upper_20', 0) or 0)
-        donchian_lower_20 = float(self.market_data_cache.get('donchian_lower_20', 0) or 0)
-        donchian_upper_40 = float(self.market_data_cache.get('donchian_upper_40', 0) or 0)
-        atr = float(self.market_data_cache.get('atr', 0) or 0)
-        week_52_high = float(self.market_data_cache.get('week_52_high', 0) or 0)
-        ema_5 = float(self.market_data_cache.get('ema_5', 0) or 0)
-        
+        oversold = self.params.get('rsi_oversold')
+        overbought = self.params.get('rsi_overbought')
+
         # Mean Reversion (Bollinger Bands + RSI)
         if 'bollinger' in name or (name.startswith('mean reversion') and 'bollinger' in name):
-            if bb_lower > 0 and price < bb_lower and rsi < 30:
-                conf = min(85, 60 + (30 - rsi))
+            price, rsi = _num(md, 'current_price'), _num(md, 'rsi', 50)
+            bb_middle, bb_lower = _num(md, 'bb_middle'), _num(md, 'bb_lower')
+            low, high = oversold or 30, overbought or 70
+            if bb_lower > 0 and price < bb_lower and rsi < low:
+                conf = min(85, 60 + (low - rsi))
                 return "BUY", conf, "Price < lower BB AND RSI oversold, mean reversion setup"
-            if bb_middle > 0 and (price > bb_middle or rsi > 70):
-                if price > bb_middle and rsi > 70:
+            if bb_middle > 0 and (price > bb_middle or rsi > high):
+                if price > bb_middle and rsi > high:
                     return "SELL", 75, "Price > middle BB AND RSI overbought, taking profit"
                 elif price > bb_middle:
                     return "SELL", 60, "Price > middle BB, reverting to mean"
@@ -124,7 +132,12 @@ class StrategyAgent:
         # Momentum Breakout (Donchian Channels + 52-week high)
         if 'donchian' in name or 'momentum breakout' in name:
             # Buy signal: close > upper Donchian(20 or 40) AND near/at 52-week high
-            at_52w_high = (price >= week_52_high * 0.98) if week_52_high > 0 else False
+            price, week_52_high = _num(md, 'current_price'), _num(md, 'week_52_high')
+            donchian_upper_20 = _num(md, 'donchian_upper_20')
+            donchian_upper_40 = _num(md, 'donchian_upper_40')
+            donchian_lower_20 = _num(md, 'donchian_lower_20')
+            near_high = self.params.get('week_52_threshold', 0.98)
+            at_52w_high = (price >= week_52_high * near_high) if week_52_high > 0 else False
             if donchian_upper_20 > 0 and price > donchian_upper_20:
                 if at_52w_high:
                     return "BUY", 90, "Breakout above Donchian + new 52w high, strong momentum"
@@ -143,14 +156,18 @@ class StrategyAgent:
         # Sigma Series (StockHero-inspired: EMA5/9/21 + RSI + volume + trend)
         if 'sigma' in name or 'stockhero' in name:
             # Bull-optimized: EMA5 > EMA9 > EMA21, RSI 40-65, volume >= 1.5x, trend bullish
-            ema_5_above = (ema_5 > ema_9) if ema_5 > 0 else (price > ema_9)
+            ema_5, ema_9, ema_21 = _num(md, 'ema_5'), _num(md, 'ema_9'), _num(md, 'ema_21')
+            ema_5_above = (ema_5 > ema_9) if ema_5 > 0 else (_num(md, 'current_price') > ema_9)
+            trend_en = _trend(md)
+            rsi, vol_ratio = _num(md, 'rsi', 50), _num(md, 'volume_ratio', 1)
+            low, high = rsi_min, self.params.get('rsi_max', 65)
             if ema_5_above and ema_9 > ema_21 and trend_en == 'bullish':
-                if 40 <= rsi <= 65 and vol_ratio >= 1.5:
+                if low <= rsi <= high and vol_ratio >= vol_min:
                     conf = min(95, 70 + (vol_ratio - 1) * 10 + (60 - abs(rsi - 50)) / 2)
                     return "BUY", conf, "Sigma: EMA5>9>21, RSI optimal, volume strong, bullish"
-                elif 40 <= rsi <= 65:
+                elif low <= rsi <= high:
                     return "BUY", 75, "Sigma: EMA alignment, RSI optimal, volume moderate"
-                elif vol_ratio >= 1.5:
+                elif vol_ratio >= vol_min:
                     return "BUY", 70, "Sigma: EMA alignment, volume strong"
                 else:
                     return "HOLD", 55, "Sigma: EMA aligned but RSI/volume not ideal"
@@ -160,6 +177,8 @@ class StrategyAgent:
 
         # EMA Crossover
         if 'ema' in name and 'crossover' in name:
+            price, ema_9, ema_21 = _num(md, 'current_price'), _num(md, 'ema_9'), _num(md, 'ema_21')
+            rsi, vol_ratio = _num(md, 'rsi', 50), _num(md, 'volume_ratio', 1)
             if ema_9 > ema_21 and price > ema_9:
                 if rsi_min <= rsi <= rsi_max and vol_ratio >= vol_min:
                     return "BUY", min(90, 50 + (rsi - 40) + (vol_ratio - 1) * 10), "EMA9>EMA21, price above EMA9, RSI and volume OK"
@@ -173,6 +192,8 @@ class StrategyAgent:
 
         # Volume Breakout
         if 'volume' in name or 'breakout' in name:
+            price, resistance, ema_9 = _num(md, 'current_price'), _num(md, 'resistance'), _num(md, 'ema_9')
+            rsi, vol_ratio = _num(md, 'rsi', 50), _num(md, 'volume_ratio', 1)
             if vol_ratio >= 2.0 and price > resistance * 0.99 and resistance > 0:
                 return "BUY", min(85, 60 + (vol_ratio - 2) * 10), "Volume breakout above resistance"
             if vol_ratio >= vol_min and price > ema_9 and rsi > 50:
@@ -181,24 +202,29 @@ class StrategyAgent:
 
         # Support / Resistance (skill name e.g. "Support Resistance Bounce")
         if 'support' in name and 'resistance' in name:
+            price, support, resistance = _num(md, 'current_price'), _num(md, 'support'), _num(md, 'resistance')
+            rsi = _num(md, 'rsi', 50)
             dist_sup = (price - support) / support if support > 0 else 1
             dist_res = (resistance - price) / resistance if resistance > 0 else 1
-            if dist_sup < 0.02 and rsi < 45:
+            near = self.params.get('distance_threshold', 0.02)
+            if dist_sup < near and rsi < (oversold or 45):
                 return "BUY", 70, "Near support, RSI oversold"
-            if dist_res < 0.02 and rsi > 55:
+            if dist_res < near and rsi > (overbought or 55):
                 return "SELL", 65, "Near resistance, RSI elevated"
             return "HOLD", 40, "Not at key level"
 
         # RSI Divergence (simplified: use RSI extremes)
         if 'rsi' in name:
-            if rsi < 30:
+            rsi = _num(md, 'rsi', 50)
+            if rsi < (oversold or 30):
                 return "BUY", 65, "RSI oversold"
-            if rsi > 70:
+            if rsi > (overbought or 70):
                 return "SELL", 65, "RSI overbought"
             return "HOLD", 40, "RSI neutral"
 
         # Trend Following
         if 'trend' in name:
+            price, ema_9, trend_en = _num(md, 'current_price'), _num(md, 'ema_9'), _trend(md)
             if trend_en == 'bullish' and price > ema_9:
                 return "BUY", 70, "Trend following: bullish, price above EMA9"
             if trend_en == 'bearish' and price < ema_9:
@@ -207,13 +233,15 @@ class StrategyAgent:
 
         # Mean Reversion
         if 'mean' in name or 'reversion' in name:
-            if rsi < 35:
+            rsi = _num(md, 'rsi', 50)
+            if rsi < (oversold or 35):
                 return "BUY", 65, "Mean reversion: RSI oversold"
-            if rsi > 65:
+            if rsi > (overbought or 65):
                 return "SELL", 60, "Mean reversion: RSI overbought"
             return "HOLD", 40, "No extreme"
 
         # Default: generic trend + RSI
+        trend_en, rsi, vol_ratio = _trend(md), _num(md, 'rsi', 50), _num(md, 'volume_ratio', 1)
         if trend_en == 'bullish' and rsi_min <= rsi <= rsi_max and vol_ratio >= 1:
             return "BUY", 55, "Bullish trend, RSI and volume OK"
         if trend_en == 'bearish':
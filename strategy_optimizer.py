@@ -0,0 +1,414 @@
+"""
+Strategy Optimizer - Parameter sweep for strategy_params.json.
+Grid or random search per strategy, each combination backtested (P&L engine in
+backtester.py) over the same history for a set of symbols, fanned out over a
+process pool and ranked by a chosen metric.
+
+Indicators are computed once per symbol in the parent and shipped to each worker
+once (pool initializer); workers also reuse market_data rows across combinations
+that share the same indicator settings.
+"""
+
+import itertools
+import json
+import random
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+
+from backtester import (
+    BacktestCosts,
+    add_indicators,
+    backtest_frame,
+    load_historical,
+    market_data_rows,
+)
+from strategy_agents.base_agent import StrategyAgent
+
+PARAMS_FILE = Path("strategy_params.json")
+
+# Default search spaces (lists = grid values, (low, high) tuples = random range)
+DEFAULT_SPACES: Dict[str, Dict[str, Any]] = {
+    "EMA Crossover": {
+        "rsi_min": [30, 35, 40, 45, 50],
+        "rsi_max": [60, 65, 70, 75, 80],
+        "volume_ratio": [1.0, 1.25, 1.5, 2.0, 2.5],
+    },
+    "Volume Breakout": {
+        "volume_ratio": [1.0, 1.25, 1.5, 2.0, 2.5],
+    },
+    "Support/Resistance": {
+        "rsi_oversold": [35, 40, 45, 50],
+        "rsi_overbought": [50, 55, 60, 65],
+        "distance_threshold": [0.01, 0.015, 0.02, 0.03, 0.05],
+    },
+    "RSI Divergence": {
+        "rsi_oversold": [20, 25, 30, 35, 40],
+        "rsi_overbought": [60, 65, 70, 75, 80],
+    },
+    "Mean Reversion": {
+        "rsi_oversold": [20, 25, 30, 35, 40],
+        "rsi_overbought": [60, 65, 70, 75, 80],
+    },
+    "Mean Reversion (Bollinger+RSI)": {
+        "rsi_oversold": [20, 25, 30, 35],
+        "rsi_overbought": [65, 70, 75, 80],
+        "bb_std_dev": [1.5, 2, 2.5],
+    },
+    "Momentum Breakout (Donchian)": {
+        "donchian_period_short": [10, 15, 20, 30],
+        "donchian_period_long": [40, 55, 80],
+        "week_52_threshold": [0.9, 0.95, 0.98, 1.0],
+    },
+    "Sigma Series": {
+        "rsi_min": [30, 35, 40, 45],
+        "rsi_max": [60, 65, 70, 75],
+        "volume_ratio": [1.0, 1.25, 1.5, 2.0],
+    },
+}
+
+# Params that change indicator columns rather than agent rules
+INDICATOR_PARAMS = ("bb_std_dev", "donchian_period_short", "donchian_period_long")
+
+# Metrics where lower is better
+_LOWER_IS_BETTER = {"max_drawdown_pct"}
+
+_START_IDX = 41
+
+# Worker state, set once per process by _init_worker
+_HISTORY: Dict[str, Any] = {}
+_ROWS_CACHE: Dict[Tuple, Any] = {}
+
+
+def grid_combinations(space: Dict[str, Sequence]) -> List[Dict[str, Any]]:
+    """Every combination of the grid values in space."""
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+
+
+def random_combinations(space: Dict[str, Any], n: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    n random draws from space. A list picks one of its values, a (low, high) tuple
+    draws uniformly (integers when both bounds are ints). Duplicates are dropped.
+    """
+    rng = random.Random(seed)
+    seen = set()
+    combos = []
+    for _ in range(n * 10):
+        if len(combos) >= n:
+            break
+        combo = {}
+        for key, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    combo[key] = rng.randint(low, high)
+                else:
+                    combo[key] = round(rng.uniform(low, high), 4)
+            else:
+                combo[key] = rng.choice(list(values))
+        marker = tuple(sorted(combo.items()))
+        if marker not in seen:
+            seen.add(marker)
+            combos.append(combo)
+    return combos
+
+
+def _indicator_key(params: Dict[str, Any]) -> Tuple:
+    return tuple((k, params[k]) for k in INDICATOR_PARAMS if k in params)
+
+
+def _add_variant_columns(df, combos: List[Dict[str, Any]]):
+    """Precompute the BB / Donchian columns needed by any combination in the sweep."""
+    for std in {c["bb_std_dev"] for c in combos if "bb_std_dev" in c}:
+        df[f"bb_upper_{std}"] = df["sma_20"] + std * df["bb_std"]
+        df[f"bb_lower_{std}"] = df["sma_20"] - std * df["bb_std"]
+    periods = {c[k] for c in combos for k in ("donchian_period_short", "donchian_period_long") if k in c}
+    for p in periods:
+        df[f"donchian_upper_{p}"] = df["High"].shift(1).rolling(int(p)).max()
+        df[f"donchian_lower_{p}"] = df["Low"].shift(1).rolling(int(p)).min()
+    return df
+
+
+def _variant_frame(df, params: Dict[str, Any]):
+    """View of df where the standard indicator columns follow this combination's settings."""
+    cols = {}
+    if "bb_std_dev" in params:
+        std = params["bb_std_dev"]
+        cols["bb_upper"] = df[f"bb_upper_{std}"]
+        cols["bb_lower"] = df[f"bb_lower_{std}"]
+    if "donchian_period_short" in params:
+        p = params["donchian_period_short"]
+        cols["donchian_upper_20"] = df[f"donchian_upper_{p}"]
+        cols["donchian_lower_20"] = df[f"donchian_lower_{p}"]
+    if "donchian_period_long" in params:
+        p = params["donchian_period_long"]
+        cols["donchian_upper_40"] = df[f"donchian_upper_{p}"]
+        cols["donchian_lower_40"] = df[f"donchian_lower_{p}"]
+    return df.assign(**cols) if cols else df
+
+
+def load_history(symbols: Sequence[str], days: int = 756) -> Dict[str, Any]:
+    """Fetch daily history + indicators once per symbol. Symbols without data are skipped."""
+    history = {}
+    for symbol in symbols:
+        df = load_historical(symbol, days)
+        if df is not None and len(df) > _START_IDX + 1:
+            history[symbol] = df
+        else:
+            print(f"⚠️ Optimizer: no history for {symbol}")
+    return history
+
+
+def init_worker(history: Dict[str, Any]) -> None:
+    """Pool initializer: install the prepared history (see prepare_history) in this process."""
+    global _HISTORY
+    _HISTORY = history
+    _ROWS_CACHE.clear()
+
+
+def prepare_history(history: Dict[str, Any], combos: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Copy of history with indicators plus every BB / Donchian variant the combinations need."""
+    prepared = {}
+    for symbol, df in history.items():
+        if "bb_std" not in df.columns:
+            df = add_indicators(df.copy())
+        prepared[symbol] = _add_variant_columns(df.copy(), combos)
+    return prepared
+
+
+def make_combinations(
+    space: Dict[str, Any], search: str = "grid", n_random: int = 100, seed: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """Expand space into combinations: full grid, or n_random random draws."""
+    if search == "grid":
+        return grid_combinations(space)
+    if search == "random":
+        return random_combinations(space, n_random, seed)
+    raise ValueError(f"search must be 'grid' or 'random', got {search!r}")
+
+
+def _frame_rows(symbol: str, params: Dict[str, Any]) -> Tuple[Any, List[Dict[str, Any]]]:
+    """(variant frame, market_data rows from bar 0) for symbol, cached per indicator settings."""
+    key = (symbol, _indicator_key(params))
+    cached = _ROWS_CACHE.get(key)
+    if cached is None:
+        frame = _variant_frame(_HISTORY[symbol], params)
+        cached = _ROWS_CACHE[key] = (frame, market_data_rows(frame))
+    return cached
+
+
+def _backtest_slice(
+    symbol: str,
+    agent: StrategyAgent,
+    params: Dict[str, Any],
+    bars: Optional[Tuple[int, int]],
+    costs: Optional[BacktestCosts],
+    initial_capital: float = 10_000.0,
+) -> Dict[str, Any]:
+    frame, rows = _frame_rows(symbol, params)
+    lo, hi = bars or (_START_IDX, len(frame))
+    return backtest_frame(
+        frame.iloc[lo:hi], agent, 0, costs=costs, initial_capital=initial_capital, rows=rows[lo:hi]
+    )
+
+
+def summarize_metrics(per_symbol: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Combine per-symbol metrics: trade counts are summed, everything else averaged."""
+    summary: Dict[str, Any] = {}
+    if per_symbol:
+        keys = [k for k, v in next(iter(per_symbol.values())).items() if isinstance(v, (int, float))]
+        for key in keys:
+            values = [m[key] for m in per_symbol.values()]
+            summary[key] = sum(values) if key in ("trades", "wins", "losses") else round(sum(values) / len(values), 3)
+    return summary
+
+
+def _evaluate(
+    strategy: str,
+    params: Dict[str, Any],
+    costs: Optional[BacktestCosts],
+    bars: Optional[Tuple[int, int]] = None,
+) -> Dict[str, Any]:
+    """Backtest one combination on every symbol in _HISTORY (bars lo:hi, default all after warm-up)."""
+    agent = StrategyAgent(strategy, {"parameters": dict(params)})
+    per_symbol = {
+        symbol: _backtest_slice(symbol, agent, params, bars, costs)["metrics"] for symbol in _HISTORY
+    }
+    return {"params": dict(params), "metrics": summarize_metrics(per_symbol), "per_symbol": per_symbol}
+
+
+def _evaluate_chunk(strategy: str, combos: List[Dict[str, Any]], costs: Optional[BacktestCosts]) -> List[Dict[str, Any]]:
+    return [_evaluate(strategy, params, costs) for params in combos]
+
+
+def _rank_value(result: Dict[str, Any], metric: str) -> float:
+    value = result["metrics"].get(metric, 0.0)
+    if value != value:  # NaN
+        value = 0.0
+    return -value if metric in _LOWER_IS_BETTER else value
+
+
+def rank_results(results: List[Dict[str, Any]], metric: str, min_trades: int = 1) -> List[Dict[str, Any]]:
+    """Sort best-first by metric (combinations under min_trades last) and number them."""
+    results.sort(
+        key=lambda r: (r["metrics"].get("trades", 0) >= min_trades, _rank_value(r, metric)),
+        reverse=True,
+    )
+    for rank, r in enumerate(results, 1):
+        r["rank"] = rank
+    return results
+
+
+def optimize_window(
+    strategy: str,
+    combos: List[Dict[str, Any]],
+    in_sample: Tuple[int, int],
+    out_sample: Tuple[int, int],
+    metric: str = "sharpe",
+    min_trades: int = 1,
+    costs: Optional[BacktestCosts] = None,
+    initial_capital: float = 10_000.0,
+) -> Dict[str, Any]:
+    """
+    One walk-forward step (runs wherever init_worker was called): pick the best
+    combination on bars in_sample, then backtest it untouched on bars out_sample.
+    """
+    ranked = rank_results([_evaluate(strategy, p, costs, in_sample) for p in combos], metric, min_trades)
+    best = ranked[0]
+    agent = StrategyAgent(strategy, {"parameters": dict(best["params"])})
+    oos = {}
+    for symbol in _HISTORY:
+        bt = _backtest_slice(symbol, agent, best["params"], out_sample, costs, initial_capital)
+        oos[symbol] = {
+            "metrics": bt["metrics"],
+            "equity_curve": bt["equity_curve"],
+            "trades": bt["trades"],
+        }
+    return {
+        "in_sample": in_sample,
+        "out_sample": out_sample,
+        "params": best["params"],
+        "in_sample_metrics": best["metrics"],
+        "oos": oos,
+    }
+
+
+def optimize_strategy(
+    strategy: str,
+    symbols: Sequence[str],
+    space: Optional[Dict[str, Any]] = None,
+    *,
+    metric: str = "sharpe",
+    search: str = "grid",
+    n_random: int = 100,
+    seed: Optional[int] = None,
+    days: int = 756,
+    history: Optional[Dict[str, Any]] = None,
+    costs: Optional[BacktestCosts] = None,
+    min_trades: int = 1,
+    max_workers: Optional[int] = None,
+    chunk_size: int = 8,
+    top: int = 10,
+) -> Dict[str, Any]:
+    """
+    Sweep the parameter space for one strategy and rank combinations by metric
+    (any key of backtester.compute_metrics, e.g. sharpe, total_return_pct, profit_factor,
+    win_rate, max_drawdown_pct). Combinations with fewer than min_trades trades in total
+    rank last. Pass history (from load_history) to reuse fetched data across sweeps;
+    max_workers=0 runs in-process.
+    Returns {"strategy", "metric", "evaluated", "best", "results": top N}.
+    """
+    space = space if space is not None else DEFAULT_SPACES.get(strategy)
+    if not space:
+        return {"error": f"No search space for {strategy}", "results": []}
+    combos = make_combinations(space, search, n_random, seed)
+
+    history = history if history is not None else load_history(symbols, days)
+    history = {s: history[s] for s in symbols if s in history}
+    if not history:
+        return {"error": "No history for any symbol", "results": []}
+    prepared = prepare_history(history, combos)
+
+    # Group combinations sharing indicator settings so each chunk reuses the same frames
+    combos.sort(key=lambda c: repr(_indicator_key(c)))
+    chunks = [combos[i:i + chunk_size] for i in range(0, len(combos), chunk_size)]
+
+    results: List[Dict[str, Any]] = []
+    if max_workers == 0:
+        init_worker(prepared)
+        for chunk in chunks:
+            results.extend(_evaluate_chunk(strategy, chunk, costs))
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers, initializer=init_worker, initargs=(prepared,)
+        ) as pool:
+            for chunk_results in pool.map(
+                _evaluate_chunk, [strategy] * len(chunks), chunks, [costs] * len(chunks)
+            ):
+                results.extend(chunk_results)
+
+    rank_results(results, metric, min_trades)
+    return {
+        "strategy": strategy,
+        "metric": metric,
+        "symbols": list(history),
+        "evaluated": len(results),
+        "best": results[0] if results else None,
+        "results": results[:top],
+    }
+
+
+def save_best_params(strategy: str, params: Dict[str, Any], params_file: Path = PARAMS_FILE) -> Dict[str, Any]:
+    """Merge params into strategy_params.json under strategy (same file /tune edits)."""
+    data = json.loads(params_file.read_text()) if params_file.exists() else {}
+    data.setdefault(strategy, {}).update(params)
+    params_file.write_text(json.dumps(data, indent=2))
+    return data[strategy]
+
+
+def format_optimization_report(result: Dict[str, Any], limit: int = 5) -> str:
+    """Short text table of the top combinations."""
+    if result.get("error"):
+        return f"⚠️ {result['error']}"
+    metric = result["metric"]
+    lines = [
+        f"{result['strategy']}: {result['evaluated']} combinations on {', '.join(result['symbols'])} (by {metric})"
+    ]
+    for r in result["results"][:limit]:
+        m = r["metrics"]
+        params = ", ".join(f"{k}={v}" for k, v in r["params"].items())
+        lines.append(
+            f"#{r['rank']} {metric}={m.get(metric, 0)} | ret {m.get('total_return_pct', 0):+.1f}% | "
+            f"win {m.get('win_rate', 0):.0f}% | dd {m.get('max_drawdown_pct', 0):.1f}% | "
+            f"{m.get('trades', 0)} trades | {params}"
+        )
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Parameter sweep for strategy_params.json")
+    parser.add_argument("strategy", choices=sorted(DEFAULT_SPACES))
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--metric", default="sharpe")
+    parser.add_argument("--random", type=int, default=0, help="random search with N draws (default: full grid)")
+    parser.add_argument("--days", type=int, default=756)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--save", action="store_true", help="write the best params to strategy_params.json")
+    args = parser.parse_args()
+
+    out = optimize_strategy(
+        args.strategy,
+        args.symbols,
+        metric=args.metric,
+        search="random" if args.random else "grid",
+        n_random=args.random,
+        days=args.days,
+        max_workers=args.workers,
+    )
+    print(format_optimization_report(out))
+    if args.save and out.get("best"):
+        saved = save_best_params(args.strategy, out["best"]["params"])
+        print(f"Saved {args.strategy}: {saved}")
@@ -2,7 +2,10 @@
 Strategy Orchestrator - Coordinates all strategy agents and returns consensus signals.
 """
 
-from typing import Dict, List, Any, Optional
+import threading
+from collections.abc import Mapping
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Any, Optional, Tuple
 from pathlib import Path
 
 # Optional: use skills from skillset_manager
@@ -19,10 +22,31 @@ class StrategyOrchestrator:
     """
     Holds one agent per strategy. Given a symbol, fetches market data,
     runs all agents, and returns weighted consensus (BUY/SELL/HOLD + confidence).
+
+    Agents are stateless per call, so one orchestrator can be shared by every chat.
+    executor: None (serial, default), "thread" or "process" to fan agent evaluation
+    out across a pool of max_workers. "thread" fans every call out one agent per task;
+    "process" is for get_consensus_batch only (chunks of items per worker) - a single
+    get_consensus_signal runs serially there, since shipping the agents to a worker
+    costs more than evaluating them.
     """
 
-    def __init__(self, skills_dir: str = "skills"):
+    def __init__(
+        self,
+        skills_dir: str = "skills",
+        executor: Optional[str] = None,
+        max_workers: Optional[int] = None,
+    ):
+        if executor not in (None, "thread", "process"):
+            raise ValueError(f"executor must be None, 'thread' or 'process', got {executor!r}")
         self.agents: List[StrategyAgent] = []
+        self.executor = executor
+        self.max_workers = max_workers
+        self._pool: Optional[Executor] = None
+        self._pool_lock = threading.Lock()
+        # symbol -> strategy -> (fields read with their values, params snapshot, decision)
+        self._decision_cache: Dict[str, Dict[str, Tuple[Dict[str, Any], tuple, tuple]]] = {}
+        self._cache_lock = threading.Lock()
         self._load_agents(skills_dir)
 
     def _load_agents(self, skills_dir: str):
@@ -59,69 +83,115 @@ class StrategyOrchestrator:
         Returns dict: buy_count, sell_count, hold_count, avg_confidence, action (BUY/SELL/HOLD), top_signals[].
         """
         if not market_data or not self.agents:
-            return {
-                "action": "HOLD",
-                "buy_count": 0,
-                "sell_count": 0,
-                "hold_count": 0,
-                "total_agents": 0,
-                "avg_confidence": 0,
-                "top_signals": [],
-                "summary": "No agents or no data",
-            }
+            return _empty_consensus()
+        return _build_consensus(self._run_agents(market_data))
+
+    def get_incremental_consensus(
+        self,
+        market_data: Dict[str, Any],
+        symbol: str,
+    ) -> Dict[str, Any]:
+        """
+        Consensus for a live update of one symbol, re-evaluating only agents whose inputs changed.
+        Each agent's last decision is cached per symbol together with the market_data fields
+        its rule branch read and its params; if none of those changed the decision is reused
+        and only entry/stop/target are re-derived from the current price.
+        Same result as get_consensus_signal, plus "reevaluated" (agents actually run).
+        """
+        if not market_data or not self.agents:
+            return _empty_consensus()
+        if float(market_data.get("current_price", 0) or 0) <= 0:
+            consensus = self.get_consensus_signal(market_data, symbol)
+            consensus["reevaluated"] = consensus["total_agents"]
+            return consensus
+
+        key = (symbol or "").upper()
+        with self._cache_lock:
+            cached = dict(self._decision_cache.get(key, {}))
 
         signals: List[TradingSignal] = []
+        fresh: Dict[str, Tuple[Dict[str, Any], tuple, tuple]] = {}
         for agent in self.agents:
-            try:
-                sig = agent.analyze(market_data)
-                signals.append(sig)
-            except Exception as e:
-                print(f"⚠️ Agent {agent.skill_name} error: {e}")
-
-        buy_count = sum(1 for s in signals if s.action == "BUY")
-        sell_count = sum(1 for s in signals if s.action == "SELL")
-        hold_count = sum(1 for s in signals if s.action == "HOLD")
-        total = len(signals)
-
-        # Weight by confidence
-        buy_conf = sum(s.confidence for s in signals if s.action == "BUY") or 0
-        sell_conf = sum(s.confidence for s in signals if s.action == "SELL") or 0
-        if buy_count > 0:
-            buy_conf /= buy_count
-        if sell_count > 0:
-            sell_conf /= sell_count
-
-        if buy_count > sell_count and buy_count >= total / 3:
-            action = "BUY"
-            avg_confidence = buy_conf
-        elif sell_count > buy_count and sell_count >= total / 3:
-            action = "SELL"
-            avg_confidence = sell_conf
-        else:
-            action = "HOLD"
-            avg_confidence = 50.0
-
-        # Top 3 by confidence for the chosen action
-        top = [s for s in signals if s.action == action]
-        top.sort(key=lambda s: s.confidence, reverse=True)
-        top_signals = [
-            {"strategy": s.strategy_name, "confidence": s.confidence, "reasoning": s.reasoning}
-            for s in top[:3]
-        ]
-
-        summary = f"{buy_count}/{total} BUY, {sell_count}/{total} SELL, {hold_count}/{total} HOLD. Consensus: {action} (conf ~{avg_confidence:.0f})"
-
-        return {
-            "action": action,
-            "buy_count": buy_count,
-            "sell_count": sell_count,
-            "hold_count": hold_count,
-            "total_agents": total,
-            "avg_confidence": round(avg_confidence, 1),
-            "top_signals": top_signals,
-            "summary": summary,
-            "all_signals": [{"strategy": s.strategy_name, "action": s.action, "confidence": s.confidence} for s in signals],
-        }
+            params_key = tuple(sorted(agent.params.items()))
+            entry = cached.get(agent.skill_name)
+            if entry and entry[1] == params_key and _inputs_unchanged(entry[0], market_data):
+                decision = entry[2]
+            else:
+                view = _RecordingView(market_data)
+                try:
+                    decision = tuple(agent.decide(view))
+                except Exception as e:
+                    print(f"⚠️ Agent {agent.skill_name} error: {e}")
+                    continue
+                fresh[agent.skill_name] = (view.reads, params_key, decision)
+            signals.append(agent.build_signal(*decision, market_data))
+
+        if fresh:
+            with self._cache_lock:
+                self._decision_cache.setdefault(key, {}).update(fresh)
+        consensus = _build_consensus(signals)
+        consensus["reevaluated"] = len(fresh)
+        return consensus
+
+    def invalidate_decision_cache(self, symbol: Optional[str] = None):
+        """Drop cached decisions for one symbol (or all), e.g. after reloading skills."""
+        with self._cache_lock:
+            if symbol is None:
+                self._decision_cache.clear()
+            else:
+                self._decision_cache.pop(symbol.upper(), None)
+
+    def get_consensus_batch(
+        self,
+        items: List[Tuple[Dict[str, Any], str]],
+        chunk_size: int = 256,
+    ) -> List[Dict[str, Any]]:
+        """
+        Consensus for many (market_data, symbol) pairs, e.g. a watchlist scan or a backtest.
+        With a pool configured, items are split into chunks and fanned out across workers.
+        Results are returned in input order.
+        """
+        if not items:
+            return []
+        pool = self._get_pool()
+        if pool is None or not self.agents:
+            return [self.get_consensus_signal(md, sym) for md, sym in items]
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        futures = [pool.submit(_consensus_chunk, self.agents, chunk) for chunk in chunks]
+        results: List[Dict[str, Any]] = []
+        for fut in futures:
+            results.extend(fut.result())
+        return results
+
+    def _run_agents(self, market_data: Dict[str, Any]) -> List[TradingSignal]:
+        """Run every agent on market_data: serially, or one agent per task on the thread pool."""
+        if self.executor != "thread":
+            return _analyze_agents(self.agents, market_data)
+        pool = self._get_pool()
+        futures = [pool.submit(_analyze_agent, agent, market_data) for agent in self.agents]
+        return [sig for sig in (f.result() for f in futures) if sig is not None]
+
+    def _get_pool(self) -> Optional[Executor]:
+        """Lazily create the shared pool (None when evaluation is serial)."""
+        if not self.executor:
+            return None
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    if self.executor == "process":
+                        self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+                    else:
+                        self._pool = ThreadPoolExecutor(
+                            max_workers=self.max_workers, thread_name_prefix="strategy-agent"
+                        )
+        return self._pool
+
+    def shutdown(self, wait: bool = True):
+        """Release the worker pool, if one was created."""
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait)
+                self._pool = None
 
     def get_rankings(self) -> List[Dict[str, Any]]:
         """Return strategies ranked by performance (win_rate, total_pnl). Uses skills' performance if available."""
@@ -140,7 +210,7 @@ class StrategyOrchestrator:
             })
         rankings.sort(key=lambda x: (x["win_rate"], x["total_pnl"]), reverse=True)
         return rankings
-    
+
     def get_signal_by_strategy(
         self,
         market_data: Dict[str, Any],
@@ -159,7 +229,132 @@ class StrategyOrchestrator:
         except Exception as e:
             print(f"⚠️ Error running strategy {strategy_name}: {e}")
             return None
-    
+
     def list_all_strategies(self) -> List[str]:
         """Return list of all available strategy names."""
         return [a.skill_name for a in self.agents]
+
+
+_MISSING = object()
+
+
+class _RecordingView(Mapping):
+    """Read-only view of market_data that records every field (and value) a strategy reads."""
+
+    __slots__ = ("_data", "reads")
+
+    def __init__(self, data: Dict[str, Any]):
+        self._data = data
+        self.reads: Dict[str, Any] = {}
+
+    def __getitem__(self, key):
+        value = self._data[key]
+        self.reads[key] = value
+        return value
+
+    def get(self, key, default=None):
+        value = self._data.get(key, _MISSING)
+        self.reads[key] = value
+        return default if value is _MISSING else value
+
+    def __contains__(self, key):
+        self.reads[key] = self._data.get(key, _MISSING)
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+
+def _inputs_unchanged(reads: Dict[str, Any], market_data: Dict[str, Any]) -> bool:
+    return all(market_data.get(k, _MISSING) == v for k, v in reads.items())
+
+
+def _empty_consensus() -> Dict[str, Any]:
+    """Consensus returned when there is no data or no agents."""
+    return {
+        "action": "HOLD",
+        "buy_count": 0,
+        "sell_count": 0,
+        "hold_count": 0,
+        "total_agents": 0,
+        "avg_confidence": 0,
+        "top_signals": [],
+        "summary": "No agents or no data",
+    }
+
+
+def _analyze_agent(agent: StrategyAgent, market_data: Dict[str, Any]) -> Optional[TradingSignal]:
+    """Run one agent; errors are logged and dropped so one bad skill cannot sink the consensus."""
+    try:
+        return agent.analyze(market_data)
+    except Exception as e:
+        print(f"⚠️ Agent {agent.skill_name} error: {e}")
+        return None
+
+
+def _analyze_agents(agents: List[StrategyAgent], market_data: Dict[str, Any]) -> List[TradingSignal]:
+    """Run all agents serially on market_data."""
+    signals = (_analyze_agent(agent, market_data) for agent in agents)
+    return [sig for sig in signals if sig is not None]
+
+
+def _consensus_chunk(
+    agents: List[StrategyAgent],
+    items: List[Tuple[Dict[str, Any], str]],
+) -> List[Dict[str, Any]]:
+    """Worker entry point for get_consensus_batch."""
+    return [
+        _build_consensus(_analyze_agents(agents, md)) if md and agents else _empty_consensus()
+        for md, _sym in items
+    ]
+
+
+def _build_consensus(signals: List[TradingSignal]) -> Dict[str, Any]:
+    """Aggregate agent signals into the consensus dict returned by get_consensus_signal."""
+    buy_count = sum(1 for s in signals if s.action == "BUY")
+    sell_count = sum(1 for s in signals if s.action == "SELL")
+    hold_count = sum(1 for s in signals if s.action == "HOLD")
+    total = len(signals)
+
+    # Weight by confidence
+    buy_conf = sum(s.confidence for s in signals if s.action == "BUY") or 0
+    sell_conf = sum(s.confidence for s in signals if s.action == "SELL") or 0
+    if buy_count > 0:
+        buy_conf /= buy_count
+    if sell_count > 0:
+        sell_conf /= sell_count
+
+    if buy_count > sell_count and buy_count >= total / 3:
+        action = "BUY"
+        avg_confidence = buy_conf
+    elif sell_count > buy_count and sell_count >= total / 3:
+        action = "SELL"
+        avg_confidence = sell_conf
+    else:
+        action = "HOLD"
+        avg_confidence = 50.0
+
+    # Top 3 by confidence for the chosen action
+    top = [s for s in signals if s.action == action]
+    top.sort(key=lambda s: s.confidence, reverse=True)
+    top_signals = [
+        {"strategy": s.strategy_name, "confidence": s.confidence, "reasoning": s.reasoning}
+        for s in top[:3]
+    ]
+
+    summary = f"{buy_count}/{total} BUY, {sell_count}/{total} SELL, {hold_count}/{total} HOLD. Consensus: {action} (conf ~{avg_confidence:.0f})"
+
+    return {
+        "action": action,
+        "buy_count": buy_count,
+        "sell_count": sell_count,
+        "hold_count": hold_count,
+        "total_agents": total,
+        "avg_confidence": round(avg_confidence, 1),
+        "top_signals": top_signals,
+        "summary": summary,
+        "all_signals": [{"strategy": s.strategy_name, "action": s.action, "confidence": s.confidence} for s in signals],
+    }
@@ -1,5 +1,6 @@
 import logging
 import re
+import html
 import pandas as pd
 import numpy as np
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
@@ -8,16 +9,16 @@ import yfinance as yf
 import json
 from pathlib import Path
 import os
-import httpx
 
 # Unset proxy env vars so OpenAI client does not get proxies= (avoids TypeError in some envs)
 for _k in list(os.environ.keys()):
     if "proxy" in _k.lower():
         os.environ.pop(_k, None)
 
-from openai import OpenAI
 from datetime import datetime, timedelta
 import asyncio
+import atexit
+import functools
 import pytz
 import nest_asyncio
 nest_asyncio.apply()  # 🔥 FIXES EVENT LOOP IN DOCKER
@@ -71,22 +72,35 @@ try:
         strategy_generator_get_line,
         backtester_agent_run_line,
         final_decision_build_prompts,
+        fast_path_match,
+        fast_path_answer,
+        fast_path_stats,
     )
+    from agents.final_decision import STOCK_DECISION_RULE, CLOSING_RULE
     AGENTS_PIPELINE_ENABLED = True
 except ImportError as e:
     print(f"⚠️ Agents pipeline not available: {e}")
     AGENTS_PIPELINE_ENABLED = False
     analyzer_run = technical_analyst_get_block = strategy_generator_get_line = None
     backtester_agent_run_line = final_decision_build_prompts = None
+    fast_path_match = fast_path_answer = fast_path_stats = None
+    STOCK_DECISION_RULE = CLOSING_RULE = ""
 
 try:
-    from agents.tools import OPENAI_TOOLS, execute_tool
+    from agents.context_builder import ContextBuilder
+except ImportError as e:
+    print(f"⚠️ Context builder not available: {e}")
+    ContextBuilder = None
+
+try:
+    from agents.tools import OPENAI_TOOLS, execute_tool, execute_tools
+    from agents.prefetch import ToolPrefetcher, stats as prefetch_stats
     FUNCTION_CALLING_AVAILABLE = True
 except ImportError as e:
     print(f"⚠️ Function calling tools not available: {e}")
     FUNCTION_CALLING_AVAILABLE = False
     OPENAI_TOOLS = []
-    execute_tool = None
+    execute_tool = execute_tools = ToolPrefetcher = prefetch_stats = None
 
 # Use OpenAI tools for stock questions when available (model can call get_stock_data, run_backtest, get_news)
 USE_FUNCTION_CALLING = True
@@ -112,6 +126,13 @@ def load_env_file():
 
 load_env_file()
 
+# Record / replay all outbound traffic when CASSETTE_MODE is set (core/cassette.py)
+try:
+    from core.cassette import install as install_cassette
+    install_cassette()
+except ImportError:
+    pass
+
 # 直接从环境变量读取（无论是 .env 还是系统变量）
 # Prefer TELEGRAM_TOKEN_LOCAL when set (e.g. local dev) so prod (Zeabur) and local use different bots
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN_LOCAL") or os.getenv("TELEGRAM_TOKEN")
@@ -145,17 +166,21 @@ from core import (
     CONFIG_FILE,
     TRADES_FILE,
     STRATEGIES_FILE,
-    load_config,
-    save_config,
-    load_trades,
-    save_trades,
     save_trade,
     load_strategies,
     save_strategies,
     calculate_win_rate,
     update_strategy_performance,
 )
-AI_LEARNING_FILE = Path("ai_learning.json")
+from core.metrics import Stopwatch
+from core.stage_runner import run_stage, format_stage_report
+from core.llm_gateway import get_gateway
+from core.live_message import LiveMessage
+from core import answer_cache
+from core.config_store import ConfigStore
+from core.trade_ledger import get_ledger
+from core import rollups
+from core.learning_log import get_learning_log
 
 ai_usage_today = 0
 daily_limit = 1000
@@ -189,19 +214,8 @@ if OPENAI_KEY:
             for _k in list(os.environ.keys()):
                 if "proxy" in _k.lower():
                     os.environ.pop(_k, None)
-            try:
-                http_client = httpx.Client(trust_env=False)  
-                client = OpenAI(api_key=api_key_clean, http_client=http_client)
-            except TypeError as te:
-                if "proxies" in str(te):
-                    os.environ.pop("HTTP_PROXY", None)
-                    os.environ.pop("HTTPS_PROXY", None)
-                    os.environ.pop("http_proxy", None)
-                    os.environ.pop("https_proxy", None)
-                    http_client = httpx.Client(trust_env=False)  # ✅ Ignore all env vars including proxies
-                    client = OpenAI(api_key=api_key_clean, http_client=http_client)
-                else:
-                    raise
+            # Async client with pooled connections, concurrency cap and retries (core.llm_gateway)
+            client = get_gateway(api_key_clean)
             print(f"✅ Client 创建成功")
             
             # 测试 API（可选，但会消耗 1 次调用）
@@ -254,6 +268,17 @@ if RULES_SYSTEM_ENABLED and IntentDetector and RulesEngine:
         intent_detector = None
         rules_engine = None
 
+# Token-budgeted rules per intent (precomputed) + data packing for the Final Decision prompt
+context_builder = None
+if rules_engine and ContextBuilder:
+    try:
+        context_builder = ContextBuilder(rules_engine)
+        full, packed = context_builder.summary()["stock_analysis"]
+        print(f"✅ Context builder: stock_analysis rules {full} → {packed} tokens")
+    except Exception as e:
+        print(f"⚠️ Context builder init failed: {e}")
+        context_builder = None
+
 # 🆕 Phase 2: Strategy Orchestrator
 strategy_orchestrator = None
 if ORCHESTRATOR_ENABLED and StrategyOrchestrator:
@@ -266,163 +291,67 @@ if ORCHESTRATOR_ENABLED and StrategyOrchestrator:
 print(f"🧠 GEEWONI AI 交易大脑 v7.1 - with Skills")
 print(f"{'✅ gpt-4o-mini LIVE' if client else '⚠️ OpenAI 未连接 (检查 .env 中 OPENAI_KEY 或上方错误)'}")
 
-# AI Learning System
-def load_ai_learning():
-    """Load AI learning data - tracks recommendations and outcomes"""
-    if AI_LEARNING_FILE.exists():
-        return json.loads(AI_LEARNING_FILE.read_text())
-    return {
-        'recommendations': [],  # All AI recommendations
-        'followed_trades': [],  # Trades user actually made after AI suggestion
-        'learning_insights': {
-            'best_rsi_range': {'min': 40, 'max': 60},
-            'best_volume_ratio': 1.5,
-            'best_ema_setup': 'bullish_crossover',
-            'preferred_strategies': [],
-            'success_patterns': []
-        },
-        'total_recommendations': 0,
-        'recommendations_followed': 0,
-        'follow_rate': 0
-    }
-
-def save_ai_learning(learning_data):
-    AI_LEARNING_FILE.write_text(json.dumps(learning_data, indent=2))
-
+# AI Learning System (core/learning_log.py: indexed SQLite rows + an in-memory summary)
 def log_ai_recommendation(symbol, recommendation_data):
     """Log when AI makes a recommendation"""
-    learning = load_ai_learning()
-    
-    rec = {
-        'id': datetime.now().strftime('%Y%m%d%H%M%S'),
-        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-        'symbol': symbol,
-        'entry_price': recommendation_data.get('entry_price'),
-        'target_price': recommendation_data.get('target_price'),
-        'stop_loss': recommendation_data.get('stop_loss'),
-        'strategy': recommendation_data.get('strategy'),
-        'rsi': recommendation_data.get('rsi'),
-        'volume_ratio': recommendation_data.get('volume_ratio'),
-        'ema_setup': recommendation_data.get('ema_setup'),
-        'followed': False,
-        'outcome': None  # Will be filled when trade closes
-    }
-    
-    learning['recommendations'].append(rec)
-    learning['total_recommendations'] += 1
-    save_ai_learning(learning)
-    
+    try:
+        rec_id = get_learning_log().log_recommendation(symbol, recommendation_data)
+    except Exception as e:
+        print(f"⚠️ AI 推荐记录失败 {symbol}: {e}")
+        return None
     print(f"📝 AI 推荐已记录: {symbol} @ ${recommendation_data.get('entry_price')}")
-    
-    return rec['id']
+    return rec_id
 
 def mark_recommendation_followed(symbol, entry_price, recommendation_id=None):
-    """Mark that user followed an AI recommendation"""
-    learning = load_ai_learning()
-    
-    # Find matching recommendation (by symbol and similar entry price)
-    for rec in reversed(learning['recommendations']):
-        if rec['symbol'] == symbol and not rec['followed']:
-            # Check if entry price is within 2% of recommendation
-            if abs(entry_price - rec['entry_price']) / rec['entry_price'] < 0.02:
-                rec['followed'] = True
-                learning['recommendations_followed'] += 1
-                learning['follow_rate'] = (learning['recommendations_followed'] / learning['total_recommendations'] * 100)
-                
-                learning['followed_trades'].append({
-                    'recommendation_id': rec['id'],
-                    'symbol': symbol,
-                    'entry_price': entry_price,
-                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                })
-                
-                save_ai_learning(learning)
-                print(f"✅ 用户跟随了 AI 推荐: {symbol}")
-                return True
-    
+    """Mark that user followed an AI recommendation (by symbol and entry within 2%)"""
+    try:
+        followed = get_learning_log().mark_followed(symbol, entry_price)
+    except Exception as e:
+        print(f"⚠️ AI 跟随记录失败 {symbol}: {e}")
+        return False
+    if followed:
+        print(f"✅ 用户跟随了 AI 推荐: {symbol}")
+        return True
     return False
 
 def update_recommendation_outcome(symbol, exit_price, profit):
     """Update outcome when trade closes"""
-    learning = load_ai_learning()
-    
-    # Find the followed recommendation
-    for rec in reversed(learning['recommendations']):
-        if rec['symbol'] == symbol and rec['followed'] and rec['outcome'] is None:
-            rec['outcome'] = {
-                'exit_price': exit_price,
-                'profit': profit,
-                'success': profit > 0,
-                'close_timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            }
-            
-            # Learn from this trade
-            if profit > 0:
-                # This was a successful pattern - remember it
-                pattern = {
-                    'rsi': rec['rsi'],
-                    'volume_ratio': rec['volume_ratio'],
-                    'ema_setup': rec['ema_setup'],
-                    'strategy': rec['strategy']
-                }
-                learning['learning_insights']['success_patterns'].append(pattern)
-                
-                # Update best parameters based on successful trades
-                update_learning_insights(learning, rec)
-            
-            save_ai_learning(learning)
-            print(f"📊 AI 学习更新: {symbol} 结果已记录 (盈亏: ${profit:+.2f})")
-            return True
-    
+    try:
+        recorded = get_learning_log().record_outcome(symbol, exit_price, profit)
+    except Exception as e:
+        print(f"⚠️ AI 学习更新失败 {symbol}: {e}")
+        return False
+    if recorded:
+        print(f"📊 AI 学习更新: {symbol} 结果已记录 (盈亏: ${profit:+.2f})")
+        return True
     return False
 
-def update_learning_insights(learning, successful_rec):
-    """Update AI's learning insights based on successful trades"""
-    insights = learning['learning_insights']
-    
-    # Adjust RSI range based on successful trades
-    if successful_rec['rsi']:
-        rsi = successful_rec['rsi']
-        # Narrow down to successful RSI range
-        if rsi > insights['best_rsi_range']['min'] and rsi < insights['best_rsi_range']['max']:
-            pass  # Already in range
-        else:
-            # Expand range slightly to include this success
-            if rsi < insights['best_rsi_range']['min']:
-                insights['best_rsi_range']['min'] = max(30, rsi - 5)
-            if rsi > insights['best_rsi_range']['max']:
-                insights['best_rsi_range']['max'] = min(70, rsi + 5)
-    
-    # Track best strategies
-    if successful_rec['strategy'] not in insights['preferred_strategies']:
-        insights['preferred_strategies'].append(successful_rec['strategy'])
-
 def get_ai_insights_summary():
     """Get summary of what AI has learned"""
-    learning = load_ai_learning()
+    learning = get_learning_log().summary()
     insights = learning['learning_insights']
     
-    successful_trades = [r for r in learning['recommendations'] if r.get('outcome') and r['outcome']['success']]
-    total_followed = len([r for r in learning['recommendations'] if r['followed']])
+    successes = learning['successes']
+    total_followed = learning['recommendations_followed']
     
-    if not successful_trades:
+    if not successes:
         return "AI 还在学习中... 需要更多交易数据"
     
-    success_rate = (len(successful_trades) / total_followed * 100) if total_followed > 0 else 0
+    success_rate = (successes / total_followed * 100) if total_followed > 0 else 0
     
     summary = f"""📚 <b>AI 学习总结</b>
 
 📊 <b>推荐统计:</b>
 - 总推荐: {learning['total_recommendations']}
 - 跟随率: {learning['follow_rate']:.1f}%
-- 成功率: {success_rate:.1f}% ({len(successful_trades)}/{total_followed})
+- 成功率: {success_rate:.1f}% ({successes}/{total_followed})
 
 🎯 <b>AI 学到的最佳设置:</b>
 - RSI 范围: {insights['best_rsi_range']['min']:.0f} - {insights['best_rsi_range']['max']:.0f}
 - 成交量倍数: >{insights['best_volume_ratio']:.1f}x
 - 最佳策略: {', '.join(insights['preferred_strategies'][:3]) if insights['preferred_strategies'] else '学习中'}
 
-💡 <b>成功模式数量:</b> {len(insights['success_patterns'])}
+💡 <b>成功模式数量:</b> {learning['success_patterns']}
 """
     
     return summary
@@ -490,7 +419,180 @@ def get_extended_stock_data(symbol):
         return out
     return _get_extended_stock_data_yahoo(symbol)
 
-config = load_config()
+# In-memory config, written behind (debounced, atomic); AI usage is a per-run counter as before
+config = ConfigStore(counters={"ai_usage": 0})
+atexit.register(config.close)
+
+
+def _on_config_change(key, value):
+    """Keep the intent detector's watchlist in step with watch buttons and dashboard edits."""
+    if key == "priority" and intent_detector and value:
+        intent_detector.watchlist = [s.upper() for s in value]
+
+
+config.subscribe(_on_config_change)
+
+
+# Context stages for ai_brain: each is a plain blocking function returning its context text
+def _data_block(symbols):
+    """[Data] block + {symbol: data} (same format as agents.technical_analyst.get_block)."""
+    stock_data = {}
+    lines = ["\n[Data]"]
+    for sym in symbols:
+        data = get_extended_stock_data(sym)
+        if data:
+            stock_data[sym] = data
+            sess = data.get("session", "regular")
+            lines.append(f"{sym}: ${data['current_price']:.2f} ({data['price_change_pct']:+.2f}%) {data['trend']} RSI{data['rsi']:.0f} sup${data['support']:.2f} res${data['resistance']:.2f} vol{data['volume_ratio']:.2f}x session:{sess}")
+    lines.append("")
+    return "\n".join(lines), stock_data
+
+
+def _consensus_line(symbol, data):
+    consensus = strategy_orchestrator.get_incremental_consensus(data, symbol)
+    line = f"[Consensus] {consensus['summary']}"
+    if consensus.get("top_signals"):
+        line += " Top: " + ", ".join([f"{s['strategy']}({s['confidence']}%)" for s in consensus["top_signals"][:3]])
+    return line + "\n"
+
+
+def _fit_line(stock_data):
+    recommended_skills = []
+    for sym, data in stock_data.items():
+        skills = skills_manager.match_skill_to_market({
+            "trend": data.get("trend_en", "neutral"),
+            "rsi": data.get("rsi", 50),
+            "volume_ratio": data.get("volume_ratio", 1.0),
+            "volatility": "normal",
+        })
+        recommended_skills.extend(skills)
+    rec = list(set(recommended_skills))[:3]
+    return "[Fit] " + ", ".join(rec) + "\n" if rec else ""
+
+
+def _strategy_pick_line():
+    strat_list = load_strategies()
+    if not strat_list:
+        return ""
+    def _score(s):
+        name, data = s
+        w, L = data.get("wins", 0), data.get("losses", 0)
+        total = w + L
+        wr = (w / total) if total > 0 else 0
+        return (wr, data.get("profit", 0))
+    ranked = sorted(strat_list.items(), key=_score, reverse=True)
+    top2 = [s[0] for s in ranked[:2]]
+    return "[Strategy pick] " + ", ".join(top2) + " (by win rate & P&L)\n"
+
+
+def _backtest_line(symbol, orchestrator):
+    from backtester import run_backtest
+    bt = run_backtest(symbol, orchestrator, days=60)
+    if "error" in bt:
+        return ""
+    total = bt.get("total_days", 0)
+    b, s, h = bt.get("buy_days", 0), bt.get("sell_days", 0), bt.get("hold_days", 0)
+    return f"[Backtest {symbol}] 60d: BUY {b}d SELL {s}d HOLD {h}d (total {total}d)\n"
+
+
+def _news_line(symbol):
+    import feedparser
+    rss = feedparser.parse(f"https://finance.yahoo.com/rss/headline?s={symbol}", request_headers={"User-Agent": "Mozilla/5.0"})
+    if rss.entries:
+        return f"[News {symbol}] {rss.entries[0].get('title', '')[:80]}\n"
+    return ""
+
+
+async def gather_stock_context(symbols):
+    """
+    Build the stock context for the LLM with every stage running concurrently under its own
+    deadline (core/stage_runner.py): data block, strategy pick, backtest and per-symbol RSS start
+    at once; consensus and skills fit start as soon as the data block is in.
+    Stages that fail or time out are left out of the context.
+    Returns (context, stock_data, {stage: StageResult}) in context order.
+    """
+    tasks = {
+        "technical": run_stage("technical", technical_analyst_get_block or _data_block, symbols),
+        "strategy_pick": run_stage("strategy_pick", strategy_generator_get_line or _strategy_pick_line),
+        "backtest": run_stage("backtest", (backtester_agent_run_line or _backtest_line) if strategy_orchestrator else None, symbols[0], strategy_orchestrator),
+    }
+    for sym in symbols[:2]:
+        tasks[f"news:{sym}"] = run_stage(f"news:{sym}", _news_line, sym)
+    tasks = {name: asyncio.ensure_future(coro) for name, coro in tasks.items()}
+
+    results = {"technical": await tasks.pop("technical")}
+    block, stock_data = results["technical"].value if results["technical"].ok else ("", {})
+    if stock_data:
+        first_sym = next(iter(stock_data))
+        dependent = await asyncio.gather(
+            run_stage("consensus", _consensus_line if strategy_orchestrator else None, first_sym, stock_data[first_sym]),
+            run_stage("skills_fit", _fit_line if skills_manager else None, stock_data),
+        )
+        results.update({r.name: r for r in dependent})
+    for name, task in tasks.items():
+        results[name] = await task
+
+    order = ["technical", "consensus", "skills_fit", "strategy_pick", "backtest"] + [n for n in results if n.startswith("news:")]
+    results = {name: results[name] for name in order if name in results}
+    context = block + "".join(
+        r.value for name, r in results.items() if name != "technical" and r.ok and r.value
+    )
+    return context, stock_data, results
+
+
+def _reply_frame(detected_intent, stock_symbols, has_context, has_realtime_data, data_sources):
+    """Header and buy/watch buttons around an ai_brain answer."""
+    if has_context and detected_intent == 'stock_analysis' and stock_symbols:
+        if has_realtime_data:
+            data_source_text = "\n".join(data_sources)
+            prefix = f"🧠 <b>AI 交易分析</b>\n\n<b>📡 数据来源:</b>\n{data_source_text}\n\n"
+        else:
+            prefix = f"🧠 <b>AI 交易分析</b>\n\n<b>📰 数据来源: AI 市场知识 + 新闻分析</b>\n⚠️ 实时数据不可用\n\n"
+        keyboard = []
+        for symbol in stock_symbols[:3]:
+            keyboard.append([
+                InlineKeyboardButton(f"买入 {symbol}", callback_data=f"buy_{symbol}"),
+                InlineKeyboardButton(f"观察 {symbol}", callback_data=f"watch_{symbol}")
+            ])
+        return prefix, InlineKeyboardMarkup(keyboard)
+    return "🤖 <b>GEEWONI AI</b>\n\n", None
+
+
+# Static per intent so it stays a cacheable prompt prefix; per-request lines go in the context message
+SYSTEM_TOOLS = """You are GEEWONI AI, a day trading analyst. You have tools: get_stock_data(symbol), run_backtest(symbol), get_news(symbol). Use them when the user asks about a stock. Then reply shortly in the user's language: ① 建議 BUY/SELL/觀望 ② 入場 ③ 目標 ④ 止損 ⑤ 一句理由."""
+
+
+def _prompt_messages(system, context, user):
+    """Static system prompt first (byte-identical per intent → provider prompt cache), then the
+    volatile account / learning context, then the question and data."""
+    messages = [{"role": "system", "content": system}]
+    if context and context.strip():
+        messages.append({"role": "system", "content": context.strip()})
+    messages.append({"role": "user", "content": user})
+    return messages
+
+
+def _relevant_rules(detected_intent):
+    """Rules for the intent within RULES_TOKEN_BUDGET (cached per intent), else the whole files."""
+    if context_builder:
+        return context_builder.rules_for(detected_intent)
+    return rules_engine.get_relevant_rules(detected_intent) if rules_engine else ""
+
+
+def _answer_cache_key(user_query, detected_intent, stock_symbols, stock_data):
+    """core/answer_cache.py key; None when the answer depends on state the snapshot doesn't cover."""
+    if detected_intent in ("positions", "performance") or (stock_symbols and not stock_data):
+        return None
+    actions = {}
+    if strategy_orchestrator:
+        for sym, data in stock_data.items():
+            try:
+                actions[sym] = strategy_orchestrator.get_incremental_consensus(data, sym).get("action", "")
+            except Exception:
+                pass
+    return answer_cache.make_key(user_query, detected_intent, stock_symbols,
+                                 answer_cache.snapshot(stock_data, actions))
+
 
 # AI Brain - handles everything
 async def ai_brain(update: Update, context):
@@ -499,21 +601,10 @@ async def ai_brain(update: Update, context):
     if not update.message or not update.message.text:
         return
     
-    if not client:  # 4 spaces
-        # 更详细的错误信息
-        await update.message.reply_text(  # 8 spaces
-            f"⚠️ AI 暂时不可用\n"
-            f"调试信息:\n"
-            f"OPENAI_KEY: {'找到' if OPENAI_KEY else '未找到'}\n"
-            f"Client: {'初始化失败' if OPENAI_KEY and not client else '未初始化'}"
-        )
-        return
-    
-    if ai_usage_today >= daily_limit:
-        await update.message.reply_text(f"⚠️ 今日额度已用完 ({daily_limit} 次)")
-        return
-    
     user_query = update.message.text.strip()
+    config.refresh()  # one stat(); reloads only if the dashboard rewrote the file
+    sw = Stopwatch("ai_brain")  # per-stage latency (core/metrics.py, scripts/load_test_bot.py)
+    intent_data = {}
 
     # Phase 1: Analyzer (or legacy intent detection)
     if AGENTS_PIPELINE_ENABLED and analyzer_run:
@@ -532,211 +623,164 @@ async def ai_brain(update: Update, context):
         except Exception:
             stock_symbols = []
         detected_intent = "stock_analysis" if stock_symbols else "general"
+    sw.lap("analyzer")
+
+    # Plain quote / signal lookups: data + ai_rules templates, no LLM and no quota (agents/fast_path.py)
+    fast = fast_path_match(user_query, intent_data) if fast_path_match and get_extended_stock_data else None
+    if fast:
+        kind, symbol = fast
+        result = await run_stage("fast_path", functools.partial(
+            fast_path_answer, get_stock_data_fn=get_extended_stock_data, orchestrator=strategy_orchestrator,
+        ), user_query, kind, symbol)
+        sw.lap("fast_path")
+        if result.ok and result.value:
+            fast_path_stats["served"] += 1
+            await update.message.reply_html(f"{result.value}\n⚡ 快速回复 (不计 AI 额度)")
+            sw.lap("reply")
+            sw.total()
+            return
+        fast_path_stats["fallback"] += 1
+
+    live = LiveMessage(update.message)  # placeholder now, filled in as the answer streams
+    await live.start()
+    sw.lap("placeholder")
+
+    use_function_calling = (
+        (detected_intent == "stock_analysis" or bool(stock_symbols))
+        and USE_FUNCTION_CALLING
+        and FUNCTION_CALLING_AVAILABLE
+        and execute_tool
+    )
+    # Start the model's likely tool calls now (agents/prefetch.py); skipped when the strategy buttons answer instead
+    prefetch = ToolPrefetcher(get_stock_data_fn=get_extended_stock_data, orchestrator=strategy_orchestrator) if use_function_calling else None
+    if prefetch and not (AGENTS_PIPELINE_ENABLED and technical_analyst_get_block and strategy_orchestrator):
+        prefetch.start(list(dict.fromkeys(resolve_symbol(s) for s in stock_symbols))[:3])
 
     stock_data = {}
     stock_data_context = ""
     data_sources = []
     has_realtime_data = False
+    stage_results = {}
 
     if (detected_intent == "stock_analysis" or stock_symbols) and stock_symbols:
-        if AGENTS_PIPELINE_ENABLED and technical_analyst_get_block:
-            # Pipeline: Technical Analyst block + Consensus + Fit + Strategy + Backtester + News
-            data_block, stock_data = technical_analyst_get_block(list(set(stock_symbols))[:3])
-            stock_data_context = data_block
-            for sym, data in stock_data.items():
-                data_sources.append(f"✅ {sym}: {data.get('data_source', 'Yahoo')} ({data.get('last_update', '')})")
-                has_realtime_data = True
-            for sym in (set(stock_symbols[:3]) - set(stock_data.keys())):
-                data_sources.append(f"⚠️ {sym}: 无实时数据")
+        symbols = list(dict.fromkeys(stock_symbols))[:3]
+        if AGENTS_PIPELINE_ENABLED and technical_analyst_get_block and strategy_orchestrator:
+            # Strategy selection UI only needs the data block
+            tech = await run_stage("technical", technical_analyst_get_block, symbols)
+            stage_results["technical"] = tech
+            if tech.ok:
+                stock_data_context, stock_data = tech.value
+        elif use_function_calling:
+            # The model pulls backtest / news through its tools (prefetched above); the reply frame
+            # and the cache key only need the data block
+            tech = await run_stage("technical", technical_analyst_get_block or _data_block, symbols)
+            stage_results["technical"] = tech
+            if tech.ok:
+                stock_data_context, stock_data = tech.value
+        else:
+            stock_data_context, stock_data, stage_results = await gather_stock_context(symbols)
+        sw.lap("technical")
+        for sym, data in stock_data.items():
+            data_sources.append(f"✅ {sym}: {data.get('data_source', 'Yahoo')} ({data.get('last_update', '')})")
+            has_realtime_data = True
+        for sym in (set(symbols) - set(stock_data.keys())):
+            data_sources.append(f"⚠️ {sym}: 无实时数据")
+
+        # Strategy selection UI - show buttons for user to pick strategies
+        if stock_data and strategy_orchestrator and AGENTS_PIPELINE_ENABLED:
+            first_sym = next(iter(stock_data))
+            first_data = stock_data[first_sym]
             
-            # NEW: Strategy selection UI - show buttons for user to pick strategies
-            if stock_data and strategy_orchestrator:
-                first_sym = next(iter(stock_data))
-                first_data = stock_data[first_sym]
-                
-                # Get list of all strategies
-                strategies = strategy_orchestrator.list_all_strategies()
-                
-                # Build strategy buttons (2 per row)
-                buttons = []
-                for i in range(0, len(strategies), 2):
-                    row = []
-                    for j in range(2):
-                        if i + j < len(strategies):
-                            strat = strategies[i + j]
-                            row.append(InlineKeyboardButton(strat, callback_data=f"strat:{strat}"))
-                    buttons.append(row)
-                
-                # Add "Compare All" button
-                buttons.append([InlineKeyboardButton("🔍 比較所有策略", callback_data="strat:compare_all")])
-                
-                reply_markup = InlineKeyboardMarkup(buttons)
-                
-                # Build summary message
-                summary_msg = f"📊 <b>{first_sym}</b> ${first_data['current_price']:.2f} ({first_data['price_change_pct']:+.2f}%)\n"
-                summary_msg += f"RSI {first_data['rsi']:.0f} | {first_data['trend']}\n\n"
-                summary_msg += f"<b>選擇策略</b> (pick 1-3 to see results):"
-                
-                # Store in context for callback handler
-                context.user_data['pending_symbol'] = first_sym
-                context.user_data['pending_stock_data'] = first_data
-                context.user_data['all_stock_data'] = stock_data
-                
-                # Send and return early (don't proceed to LLM)
-                await update.message.reply_html(summary_msg, reply_markup=reply_markup)
-                return
+            # Get list of all strategies
+            strategies = strategy_orchestrator.list_all_strategies()
             
-            if stock_data:
-                if strategy_orchestrator:
-                    try:
-                        first_sym = next(iter(stock_data))
-                        consensus = strategy_orchestrator.get_consensus_signal(stock_data[first_sym], first_sym)
-                        stock_data_context += f"[Consensus] {consensus['summary']}"
-                        if consensus.get("top_signals"):
-                            stock_data_context += " Top: " + ", ".join([f"{s['strategy']}({s['confidence']}%)" for s in consensus["top_signals"][:3]])
-                        stock_data_context += "\n"
-                    except Exception as e:
-                        print(f"Orchestrator consensus error: {e}")
-                if skills_manager:
-                    try:
-                        recommended_skills = []
-                        for sym, data in stock_data.items():
-                            skills = skills_manager.match_skill_to_market({
-                                "trend": data.get("trend_en", "neutral"),
-                                "rsi": data.get("rsi", 50),
-                                "volume_ratio": data.get("volume_ratio", 1.0),
-                                "volatility": "normal",
-                            })
-                            recommended_skills.extend(skills)
-                        rec = list(set(recommended_skills))[:3]
-                        if rec:
-                            stock_data_context += "[Fit] " + ", ".join(rec) + "\n"
-                    except Exception as e:
-                        print(f"Skills error: {e}")
-                if strategy_generator_get_line:
-                    stock_data_context += strategy_generator_get_line()
-                if backtester_agent_run_line and strategy_orchestrator:
-                    first_sym = next(iter(stock_data))
-                    stock_data_context += backtester_agent_run_line(first_sym, strategy_orchestrator)
-                try:
-                    import feedparser
-                    for sym in list(stock_data.keys())[:2]:
-                        try:
-                            rss = feedparser.parse(f"https://finance.yahoo.com/rss/headline?s={sym}", request_headers={"User-Agent": "Mozilla/5.0"})
-                            if rss.entries:
-                                stock_data_context += f"[News {sym}] {rss.entries[0].get('title', '')[:80]}\n"
-                        except Exception:
-                            pass
-                except Exception:
-                    pass
-            else:
-                stock_data_context = "\n\n⚠️ No real-time data - use your market knowledge and news.\n"
-        else:
-            # Legacy: inline fetch and build
-            for symbol in list(set(stock_symbols))[:3]:
-                data = get_extended_stock_data(symbol)
-                if data:
-                    stock_data[symbol] = data
-                    data_sources.append(f"✅ {symbol}: {data.get('data_source', 'Yahoo')} ({data.get('last_update', '')})")
-                    has_realtime_data = True
-                else:
-                    data_sources.append(f"⚠️ {symbol}: 无实时数据")
-            if stock_data:
-                stock_data_context = "\n[Data]\n"
-                for sym, data in stock_data.items():
-                    sess = data.get("session", "regular")
-                    stock_data_context += f"{sym}: ${data['current_price']:.2f} ({data['price_change_pct']:+.2f}%) {data['trend']} RSI{data['rsi']:.0f} sup${data['support']:.2f} res${data['resistance']:.2f} vol{data['volume_ratio']:.2f}x session:{sess}\n"
-                if strategy_orchestrator:
-                    try:
-                        first_sym = next(iter(stock_data))
-                        consensus = strategy_orchestrator.get_consensus_signal(stock_data[first_sym], first_sym)
-                        stock_data_context += f"[Consensus] {consensus['summary']}"
-                        if consensus.get("top_signals"):
-                            stock_data_context += " Top: " + ", ".join([f"{s['strategy']}({s['confidence']}%)" for s in consensus["top_signals"][:3]])
-                        stock_data_context += "\n"
-                    except Exception as e:
-                        print(f"Orchestrator consensus error: {e}")
-                if skills_manager:
-                    try:
-                        recommended_skills = []
-                        for sym, data in stock_data.items():
-                            skills = skills_manager.match_skill_to_market({
-                                "trend": data.get("trend_en", "neutral"),
-                                "rsi": data.get("rsi", 50),
-                                "volume_ratio": data.get("volume_ratio", 1.0),
-                                "volatility": "normal",
-                            })
-                            recommended_skills.extend(skills)
-                        rec = list(set(recommended_skills))[:3]
-                        if rec:
-                            stock_data_context += "[Fit] " + ", ".join(rec) + "\n"
-                    except Exception as e:
-                        print(f"Skills error: {e}")
-                if strategy_generator_get_line:
-                    stock_data_context += strategy_generator_get_line()
-                else:
-                    try:
-                        strat_list = load_strategies()
-                        if strat_list:
-                            def _score(s):
-                                name, data = s
-                                w, L = data.get("wins", 0), data.get("losses", 0)
-                                total = w + L
-                                wr = (w / total) if total > 0 else 0
-                                return (wr, data.get("profit", 0))
-                            ranked = sorted(strat_list.items(), key=_score, reverse=True)
-                            top2 = [s[0] for s in ranked[:2]]
-                            stock_data_context += "[Strategy pick] " + ", ".join(top2) + " (by win rate & P&L)\n"
-                    except Exception as e:
-                        print(f"Strategy pick error: {e}")
-                if backtester_agent_run_line and strategy_orchestrator:
-                    first_sym = next(iter(stock_data))
-                    stock_data_context += backtester_agent_run_line(first_sym, strategy_orchestrator)
-                else:
-                    try:
-                        from backtester import run_backtest
-                        first_sym = next(iter(stock_data))
-                        if strategy_orchestrator:
-                            bt = run_backtest(first_sym, strategy_orchestrator, days=60)
-                            if "error" not in bt:
-                                total = bt.get("total_days", 0)
-                                b, s, h = bt.get("buy_days", 0), bt.get("sell_days", 0), bt.get("hold_days", 0)
-                                stock_data_context += f"[Backtest {first_sym}] 60d: BUY {b}d SELL {s}d HOLD {h}d (total {total}d)\n"
-                    except Exception as e:
-                        print(f"Backtest error: {e}")
-                try:
-                    import feedparser
-                    for sym in list(stock_data.keys())[:2]:
-                        try:
-                            rss = feedparser.parse(f"https://finance.yahoo.com/rss/headline?s={sym}", request_headers={"User-Agent": "Mozilla/5.0"})
-                            if rss.entries:
-                                stock_data_context += f"[News {sym}] {rss.entries[0].get('title', '')[:80]}\n"
-                        except Exception:
-                            pass
-                except Exception:
-                    pass
-            else:
-                stock_data_context = "\n\n⚠️ No real-time data - use your market knowledge and news.\n"
+            # Build strategy buttons (2 per row)
+            buttons = []
+            for i in range(0, len(strategies), 2):
+                row = []
+                for j in range(2):
+                    if i + j < len(strategies):
+                        strat = strategies[i + j]
+                        row.append(InlineKeyboardButton(strat, callback_data=f"strat:{strat}"))
+                buttons.append(row)
+            
+            # Add "Compare All" button
+            buttons.append([InlineKeyboardButton("🔍 比較所有策略", callback_data="strat:compare_all")])
+            
+            reply_markup = InlineKeyboardMarkup(buttons)
+            
+            # Build summary message
+            summary_msg = f"📊 <b>{first_sym}</b> ${first_data['current_price']:.2f} ({first_data['price_change_pct']:+.2f}%)\n"
+            summary_msg += f"RSI {first_data['rsi']:.0f} | {first_data['trend']}\n\n"
+            summary_msg += f"<b>選擇策略</b> (pick 1-3 to see results):"
+            
+            # Store in context for callback handler
+            context.user_data['pending_symbol'] = first_sym
+            context.user_data['pending_stock_data'] = first_data
+            context.user_data['all_stock_data'] = stock_data
+            
+            # Send and return early (don't proceed to LLM)
+            if prefetch:
+                prefetch.close()
+            await live.finish(summary_msg, parse_mode='HTML', reply_markup=reply_markup)
+            sw.lap("reply")
+            sw.total()
+            return
+
+        if not stock_data:
+            stock_data_context = "\n\n⚠️ No real-time data - use your market knowledge and news.\n"
 
     if rules_engine and detected_intent == "positions":
-        trades = load_trades()
-        open_pos = [t for t in trades if t.get('status') == 'open']
+        open_pos = get_ledger().open_positions()
         stock_data_context = "\nOpen positions: " + json.dumps(open_pos, ensure_ascii=False, default=str) + "\n"
     elif rules_engine and detected_intent == 'performance':
         win_rate, wins, total = calculate_win_rate()
         stock_data_context = f"\nPerformance: {wins}/{total} wins ({win_rate:.1f}%), Weekly P&L: ${config['weekly_profit']}\n"
                 
-    # Call AI with rules-optimized prompt
+    sw.lap("context")
+
+    # Same question on the same market snapshot: answer from cache, no AI call
+    cache_key = _answer_cache_key(user_query, detected_intent, stock_symbols, stock_data)
+    cached = answer_cache.get(cache_key)
+    if cached is not None:
+        prefix, reply_markup = _reply_frame(detected_intent, stock_symbols, stock_data_context or stock_data,
+                                            has_realtime_data, data_sources)
+        stage_line = f"\n{format_stage_report(stage_results)}" if stage_results else ""
+        await live.finish(
+            f"{prefix}{cached}\n\n"
+            f"⚡ 缓存答案 (不计额度) · ⚙️ AI 使用: {ai_usage_today}/{daily_limit}{stage_line}",
+            parse_mode='HTML',
+            reply_markup=reply_markup
+        )
+        if prefetch:
+            prefetch.close()
+        sw.lap("cache")
+        sw.total()
+        return
+
+    # Call AI with rules-optimized prompt (fast path, strategy buttons and cache hits above need neither)
     try:
-        ai_usage_today += 1
-        config['ai_usage'] = ai_usage_today
-        save_config(config)
+        if not client:
+            # 更详细的错误信息
+            await live.finish(
+                f"⚠️ AI 暂时不可用\n"
+                f"调试信息:\n"
+                f"OPENAI_KEY: {'找到' if OPENAI_KEY else '未找到'}\n"
+                f"Client: {'初始化失败' if OPENAI_KEY and not client else '未初始化'}"
+            )
+            return
+
+        if ai_usage_today >= daily_limit:
+            await live.finish(f"⚠️ 今日额度已用完 ({daily_limit} 次)")
+            return
+
+        ai_usage_today = config.incr('ai_usage')
         
         print(f"🤖 OpenAI API (usage: {ai_usage_today}/{daily_limit})...")
         
         strategies = load_strategies()
         best_strategy = max(strategies.items(), key=lambda x: x[1]["profit"]) if strategies else None
-        learning = load_ai_learning()
+        learning = get_learning_log().summary()
         insights = learning["learning_insights"]
         learning_context = ""
         if learning.get("total_recommendations", 0) > 0:
@@ -746,57 +790,42 @@ async def ai_brain(update: Update, context):
         watchlist_hint = ", ".join(config.get("priority", [])[:5]) if config.get("priority") else "none"
         account_line = f"Account: P&L ${config['weekly_profit']}/{config['weekly_goal']}. Watchlist: {watchlist_hint}. Best strategy: {best_strategy[0] if best_strategy else 'N/A'}."
 
-        use_function_calling = (
-            (detected_intent == "stock_analysis" or bool(stock_symbols))
-            and USE_FUNCTION_CALLING
-            and FUNCTION_CALLING_AVAILABLE
-            and execute_tool
-        )
         response_text = ""
+        sw.lap("prompt")
         if use_function_calling:
-            system_tools = f"""You are GEEWONI AI, a day trading analyst. You have tools: get_stock_data(symbol), run_backtest(symbol), get_news(symbol). Use them when the user asks about a stock. Then reply shortly in the user's language: ① 建議 BUY/SELL/觀望 ② 入場 ③ 目標 ④ 止損 ⑤ 一句理由. {account_line} {learning_context}"""
-            messages = [
-                {"role": "system", "content": system_tools},
-                {"role": "user", "content": user_query},
-            ]
+            messages = _prompt_messages(SYSTEM_TOOLS, f"{account_line}\n{learning_context}", user_query)
             max_rounds = 3
-            last_resp = None
             for _round in range(max_rounds):
-                last_resp = client.chat.completions.create(
+                # Every round streams: the answer round fills the placeholder as it arrives
+                tool_calls = []
+                response_text = ""
+                async for delta in client.stream(
                     model="gpt-4o-mini",
                     messages=messages,
                     tools=OPENAI_TOOLS,
                     tool_choice="auto",
                     max_tokens=300,
                     temperature=0.3,
-                )
-                msg = last_resp.choices[0].message
-                if not (msg.tool_calls and len(msg.tool_calls) > 0):
-                    response_text = (msg.content or "").strip()
+                    tool_calls=tool_calls,
+                ):
+                    response_text += delta
+                    await live.update(response_text)
+                response_text = response_text.strip()
+                if not tool_calls:
                     break
-                messages.append({
-                    "role": "assistant",
-                    "content": msg.content or "",
-                    "tool_calls": [
-                        {"id": tc.id, "type": "function", "function": {"name": tc.function.name, "arguments": tc.function.arguments}}
-                        for tc in msg.tool_calls
-                    ],
-                })
-                for tc in msg.tool_calls:
-                    name = tc.function.name
-                    args = json.loads(tc.function.arguments) if getattr(tc.function, "arguments", None) else {}
+                messages.append({"role": "assistant", "content": response_text, "tool_calls": tool_calls})
+                calls = []
+                for tc in tool_calls:
+                    fn = tc["function"]
+                    args = json.loads(fn["arguments"]) if fn["arguments"] else {}
                     if args.get("symbol"):
                         args["symbol"] = resolve_symbol(args["symbol"])
-                    result = execute_tool(
-                        name,
-                        args,
-                        get_stock_data_fn=get_extended_stock_data,
-                        orchestrator=strategy_orchestrator,
-                    )
-                    messages.append({"role": "tool", "tool_call_id": tc.id, "content": result})
-            else:
-                if last_resp and last_resp.choices:
-                    response_text = (last_resp.choices[0].message.content or "").strip()
+                    calls.append((fn["name"], args))
+                # All calls of the round at once (agents/tools.py), prefetched results reused
+                results = await execute_tools(calls, runner=prefetch.run)
+                for tc, result in zip(tool_calls, results):
+                    messages.append({"role": "tool", "tool_call_id": tc["id"], "content": result})
+            sw.lap("llm")
             if stock_symbols and not stock_data and get_extended_stock_data:
                 try:
                     sym = resolve_symbol(stock_symbols[0])
@@ -809,9 +838,9 @@ async def ai_brain(update: Update, context):
                     pass
         else:
             if AGENTS_PIPELINE_ENABLED and final_decision_build_prompts and stock_data_context and (detected_intent == "stock_analysis" or stock_symbols):
-                relevant_rules = rules_engine.get_relevant_rules(detected_intent) if rules_engine else ""
+                relevant_rules = _relevant_rules(detected_intent)
                 prompts = final_decision_build_prompts(
-                    stock_data_context,
+                    context_builder.pack_data(stock_data_context) if context_builder else stock_data_context,
                     user_query,
                     detected_intent,
                     stock_symbols,
@@ -821,43 +850,40 @@ async def ai_brain(update: Update, context):
                     is_stock_analysis=True,
                 )
                 system_prompt = prompts["system"]
+                context_prompt = prompts["context"]
                 user_prompt = prompts["user"]
                 max_tok = prompts["max_tokens"]
             elif rules_engine:
-                relevant_rules = rules_engine.get_relevant_rules(detected_intent)
+                relevant_rules = _relevant_rules(detected_intent)
                 stock_decision_rule = ""
+                prompt_data = stock_data_context
                 if stock_data_context and (detected_intent == "stock_analysis" or stock_symbols):
-                    stock_decision_rule = """
-You are the Final Decision agent. You receive: [Data] technicals, [Consensus] and [Fit] strategies, [Strategy pick] top strategies by performance, [Backtest] 60d signal distribution, [News]. Use all of these. Output MUST be short and help the user decide (max 100 words).
-Required format: ① 建議: BUY / SELL / 觀望 ② 入場 $X.XX ③ 目標 $X.XX ④ 止損 $X.XX ⑤ 一句理由 (mention strategy if [Strategy pick] or [Fit] present).
-If consensus is all HOLD, do NOT say "neutral" and stop. Say 觀望 and give a CONCRETE trigger (e.g. 突破 $X 可考慮買入 / 跌破 $Y 止損). If there is important news in [News], summarize in one short line. Use support/resistance from data for entry/target/stop when possible. Session "extended" = pre-market or after-hours data."""
-                system_prompt = f"""{relevant_rules}
-{stock_decision_rule}
-
-{account_line}
-{learning_context}
-
-Respond in user language. Keep it short and decisive."""
-                user_prompt = user_query + (stock_data_context if stock_data_context else "")
+                    if context_builder:
+                        prompt_data = context_builder.pack_data(stock_data_context)
+                    stock_decision_rule = STOCK_DECISION_RULE
+                # Same layout as agents/final_decision.build_prompts
+                system_prompt = "\n\n".join(part for part in (relevant_rules.strip(), stock_decision_rule, CLOSING_RULE) if part)
+                context_prompt = f"{account_line}\n{learning_context}"
+                user_prompt = user_query + (prompt_data if prompt_data else "")
                 max_tok = 180 if (stock_data_context and stock_symbols) else 300
             else:
-                system_prompt = f"""You are GEEWONI AI - day trading analyst. Best strategy: {best_strategy[0] if best_strategy else 'N/A'}.
-{learning_context}
-{stock_data_context if stock_data_context else "No stock data."}
+                system_prompt = """You are GEEWONI AI - day trading analyst.
 Reply: max 100 words. Include 建議 + 入場/目標/止損 + one-line reason. Be decisive, not generic."""
+                context_prompt = f"""Best strategy: {best_strategy[0] if best_strategy else 'N/A'}.
+{learning_context}
+{"" if stock_data_context else "No stock data."}"""
                 user_prompt = user_query + (stock_data_context if stock_data_context else "")
                 max_tok = 180 if (stock_data_context and stock_symbols) else 300
 
-            response = client.chat.completions.create(
+            async for delta in client.stream(
                 model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt},
-                ],
+                messages=_prompt_messages(system_prompt, context_prompt, user_prompt),
                 max_tokens=max_tok,
                 temperature=0.3,
-            )
-            response_text = response.choices[0].message.content
+            ):
+                response_text += delta
+                await live.update(response_text)
+        sw.lap("llm")
         
         # Extract AI recommendations from response (if stock analysis)
         if stock_data_context or stock_data:
@@ -887,36 +913,29 @@ Reply: max 100 words. Include 建議 + 入場/目標/止損 + one-line reason. B
                 except Exception as e:
                     print(f"⚠️ 无法提取推荐数据: {e}")
         
+        answer_cache.put(cache_key, response_text)
+
         # Build response
-        if (stock_data_context or stock_data) and detected_intent == 'stock_analysis' and stock_symbols:
-            if has_realtime_data:
-                data_source_text = "\n".join(data_sources)
-                prefix = f"🧠 <b>AI 交易分析</b>\n\n<b>📡 数据来源:</b>\n{data_source_text}\n\n"
-            else:
-                prefix = f"🧠 <b>AI 交易分析</b>\n\n<b>📰 数据来源: AI 市场知识 + 新闻分析</b>\n⚠️ 实时数据不可用\n\n"
-            keyboard = []
-            for symbol in stock_symbols[:3]:
-                keyboard.append([
-                    InlineKeyboardButton(f"买入 {symbol}", callback_data=f"buy_{symbol}"),
-                    InlineKeyboardButton(f"观察 {symbol}", callback_data=f"watch_{symbol}")
-                ])
-            reply_markup = InlineKeyboardMarkup(keyboard)
-        else:
-            prefix = "🤖 <b>GEEWONI AI</b>\n\n"
-            reply_markup = None
-        
-        await update.message.reply_text(
+        prefix, reply_markup = _reply_frame(detected_intent, stock_symbols, stock_data_context or stock_data,
+                                            has_realtime_data, data_sources)
+        stage_line = f"\n{format_stage_report(stage_results)}" if stage_results else ""
+        await live.finish(
             f"{prefix}{response_text}\n\n"
-            f"⚙️ AI 使用: {ai_usage_today}/{daily_limit}",
+            f"⚙️ AI 使用: {ai_usage_today}/{daily_limit}{stage_line}",
             parse_mode='HTML',
             reply_markup=reply_markup
         )
         
+        sw.lap("reply")
+        sw.total()
         print(f"✅ 回复已发送。今日总调用: {ai_usage_today}")
         
     except Exception as e:
         print(f"❌ OpenAI API 错误: {e}")
-        await update.message.reply_text(f"❌ AI 错误: {str(e)}")
+        await live.finish(f"❌ AI 错误: {str(e)}")
+    finally:
+        if prefetch:
+            prefetch.close()
 
 # Button callback router
 async def button_callback(update: Update, context):
@@ -951,7 +970,7 @@ async def legacy_button_callback(update: Update, context):
     elif action == 'watch':
         if symbol not in config['priority']:
             config['priority'].append(symbol)
-            save_config(config)
+            config.save('priority')
         await query.message.reply_text(f"👀 已添加 {symbol} 到观察列表")
 
 
@@ -991,6 +1010,12 @@ async def process_trade(update: Update, context):
             }
             
             save_trade(trade)
+
+            # Risk check: today's closed P&L against the daily loss limit (O(1) rollup read)
+            max_daily_loss = float((config.get('risk') or {}).get('max_daily_loss') or 0)
+            today_pnl = get_ledger().current('day')['pnl']
+            risk_msg = (f"\n⚠️ <b>今日已亏损 ${-today_pnl:,.2f}，超过每日止损 ${max_daily_loss:,.0f}</b>"
+                        if max_daily_loss > 0 and today_pnl <= -max_daily_loss else "")
             
             # Check if this follows an AI recommendation
             followed = mark_recommendation_followed(symbol, price)
@@ -1008,7 +1033,7 @@ async def process_trade(update: Update, context):
                 f"价格: ${price:.2f}\n"
                 f"数量: {quantity}\n"
                 f"策略: {strategy}\n"
-                f"总额: ${price * quantity:.2f}",
+                f"总额: ${price * quantity:.2f}{risk_msg}",
                 parse_mode='HTML',
                 reply_markup=reply_markup
             )
@@ -1026,13 +1051,8 @@ async def process_trade(update: Update, context):
         try:
             sell_price = float(parts[2])
             
-            # Find open trade
-            trades = load_trades()
-            open_trade = None
-            for trade in reversed(trades):
-                if trade['symbol'] == symbol and trade['status'] == 'open':
-                    open_trade = trade
-                    break
+            # Find open trade (latest open row for the symbol)
+            open_trade = get_ledger().open_trade(symbol)
             
             if not open_trade:
                 await update.message.reply_text(f"❌ 没有找到 {symbol} 的开仓交易")
@@ -1042,15 +1062,9 @@ async def process_trade(update: Update, context):
             profit = (sell_price - open_trade['entry_price']) * open_trade['quantity']
             profit_pct = ((sell_price - open_trade['entry_price']) / open_trade['entry_price']) * 100
             
-            # Update trade
-            open_trade['exit_price'] = sell_price
-            open_trade['profit'] = profit
-            open_trade['profit_pct'] = profit_pct
-            open_trade['status'] = 'closed'
-            open_trade['exit_date'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            
-            # Save
-            save_trades(trades)
+            # Close the trade row
+            get_ledger().close_trade(open_trade['seq'], sell_price, profit, profit_pct,
+                                     datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
 
             # Update strategy performance
             update_strategy_performance(open_trade['strategy'], profit)
@@ -1060,7 +1074,6 @@ async def process_trade(update: Update, context):
             
             # Update config profit
             config['weekly_profit'] += profit
-            save_config(config)
             
             # Calculate win rate
             win_rate, wins, total = calculate_win_rate()
@@ -1113,10 +1126,16 @@ async def start(update: Update, context):
 async def stats(update: Update, context):
     win_rate, wins, total = calculate_win_rate()
     progress = config["weekly_profit"] / config["weekly_goal"] * 100
+    ledger = get_ledger()
+    day, week, month, overall = (ledger.current(s) for s in ("day", "week", "month", "all"))
+    sharpe = rollups.sharpe(overall)
     
     await update.message.reply_text(
         f"📊 <b>交易统计</b>\n\n"
         f"💰 本周盈亏: ${int(config['weekly_profit']):,}/{config['weekly_goal']:,} ({progress:.0f}%)\n"
+        f"📅 已平仓 今日 ${day['pnl']:+,.2f} ({day['count']}) · 本周 ${week['pnl']:+,.2f} ({week['count']}) · "
+        f"本月 ${month['pnl']:+,.2f} ({month['count']})\n"
+        f"📉 最大回撤: ${overall['max_drawdown']:,.2f} · Sharpe/笔: {f'{sharpe:.2f}' if sharpe is not None else '—'}\n"
         f"📈 胜率: {win_rate:.1f}%\n"
         f"✅ 盈利: {wins}\n"
         f"❌ 亏损: {total - wins}\n"
@@ -1128,13 +1147,25 @@ async def stats(update: Update, context):
 async def usage_command(update: Update, context):
     percentage = (ai_usage_today / daily_limit) * 100
     remaining = daily_limit - ai_usage_today
+    cache = answer_cache.stats
+    pipeline_lines = ""
+    if client and client.stats["prompt_tokens"]:
+        pipeline_lines += (f"🧊 Prompt 缓存: {client.cached_share():.0%} 输入 token 命中 "
+                           f"({client.stats['cached_tokens']:,}/{client.stats['prompt_tokens']:,})\n")
+    if fast_path_stats and (fast_path_stats["served"] or fast_path_stats["fallback"]):
+        pipeline_lines += f"🚀 快速回复: {fast_path_stats['served']} 次 (回退 {fast_path_stats['fallback']})\n"
+    if prefetch_stats and prefetch_stats["started"]:
+        pipeline_lines += (f"🔮 工具预取: 命中 {prefetch_stats['used']}/{prefetch_stats['started']} · "
+                           f"浪费 {prefetch_stats['wasted']} · 按需 {prefetch_stats['on_demand']}\n")
     
     await update.message.reply_text(
         f"🤖 <b>AI 使用量</b>\n\n"
         f"📊 已用: {ai_usage_today}/{daily_limit} ({percentage:.1f}%)\n"
         f"✅ 剩余: {remaining}\n"
-        f"🔄 重置: 每日\n\n"
-        f"💡 每次对话 = 1 次调用",
+        f"🔄 重置: 每日\n"
+        f"⚡ 缓存命中: {cache['hits']}/{cache['hits'] + cache['misses']} ({answer_cache.hit_rate():.0%}) · 节省 {cache['hits']} 次\n"
+        f"{pipeline_lines}\n"
+        f"💡 每次对话 = 1 次调用 (缓存答案不计)",
         parse_mode='HTML'
     )
 
@@ -1148,6 +1179,14 @@ async def strategy_report_command(update: Update, context):
         lines = ["📊 <b>Strategy Agent Rankings</b>\n"]
         for i, r in enumerate(rankings[:12], 1):
             lines.append(f"{i}. <b>{r['name']}</b> | Win rate: {r['win_rate']:.1f}% | Trades: {r['total_trades']} | P&L: ${r['total_pnl']:.2f}")
+        closed = sorted(get_ledger().buckets("strategy").items(), key=lambda kv: kv[1]["pnl"], reverse=True)
+        if closed:
+            lines.append("\n📒 <b>Your closed trades by strategy</b>")
+            for name, b in closed[:8]:
+                sharpe = rollups.sharpe(b)
+                lines.append(f"• {html.escape(name)} | Win rate: {rollups.win_rate(b):.1f}% ({b['wins']}/{b['count']}) | "
+                             f"P&L: ${b['pnl']:+.2f} | Max DD: ${b['max_drawdown']:.2f}"
+                             + (f" | Sharpe: {sharpe:.2f}" if sharpe is not None else ""))
         lines.append("\n💡 Use /strategies for trade-based strategy stats. Agents use skill rules + live data.")
         await update.message.reply_text("\n".join(lines), parse_mode='HTML')
     except Exception as e:
@@ -1374,8 +1413,7 @@ async def skill_detail_command(update: Update, context):
     await update.message.reply_text(response, parse_mode='HTML')
 
 async def positions_command(update: Update, context):
-    trades = load_trades()
-    open_trades = [t for t in trades if t['status'] == 'open']
+    open_trades = get_ledger().open_positions()
     
     if not open_trades:
         await update.message.reply_text("📭 当前无持仓")
@@ -1436,9 +1474,7 @@ async def morning_summary(update: Update, context):
     data_source = "早盘摘要基于 AI 知识库与市场趋势（未请求实时行情）"
     
     try:
-        ai_usage_today += 1
-        config['ai_usage'] = ai_usage_today
-        save_config(config)
+        ai_usage_today = config.incr('ai_usage')
         
         system_prompt = f"""你是专业交易分析师和市场新闻专家。
 
@@ -1467,7 +1503,7 @@ async def morning_summary(update: Update, context):
 
 简短专业，中文回复。即使没有实时数据，也要基于市场知识给出有价值的分析。"""
 
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model="gpt-4o-mini",
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -1492,12 +1528,10 @@ async def morning_summary(update: Update, context):
 
 async def win(update: Update, context):
     config['weekly_profit'] += 250
-    save_config(config)
     await update.message.reply_text(f"✅ +$250 盈利!\n💰 ${config['weekly_profit']:,}/{config['weekly_goal']:,}")
 
 async def loss(update: Update, context):
     config['weekly_profit'] = max(0, config['weekly_profit'] - 100)
-    save_config(config)
     await update.message.reply_text(f"❌ -$100 亏损\n💰 ${config['weekly_profit']:,}/{config['weekly_goal']:,}")
 
 
@@ -1601,7 +1635,13 @@ def format_single_strategy_result(symbol, stock_data, signal, backtest):
         total_d = backtest['total_days']
         text += f"\n📈 <b>60d Backtest ({signal.strategy_name} only):</b>\n"
         text += f"   BUY {buy_d}d | SELL {sell_d}d | HOLD {hold_d}d (total {total_d}d)\n"
-    
+        pnl = backtest.get("pnl")
+        if pnl and pnl.get("trades"):
+            text += (
+                f"   P&L {pnl['total_return_pct']:+.1f}% | {pnl['trades']} trades | "
+                f"Win {pnl['win_rate']:.0f}% | MaxDD {pnl['max_drawdown_pct']:.1f}%\n"
+            )
+
     # Confidence
     text += f"\n🎯 <b>Confidence:</b> {signal.confidence:.0f}%\n"
     
@@ -0,0 +1,52 @@
+"""
+Answer cache tests: key normalization, snapshot buckets, session-bounded TTL and hit stats.
+
+Run: python -m pytest -q test_answer_cache.py
+"""
+
+from datetime import datetime
+
+import pytz
+
+from core import answer_cache
+
+NY = pytz.timezone("America/New_York")
+
+
+def _data(price, rsi):
+    return {"NVDA": {"current_price": price, "rsi": rsi}}
+
+
+def test_key_ignores_wording_noise_but_not_market_moves():
+    snap = answer_cache.snapshot(_data(120.00, 61), {"NVDA": "BUY"})
+    key = answer_cache.make_key("NVDA  entry?", "stock_analysis", ["NVDA"], snap)
+    assert key == answer_cache.make_key("nvda entry", "stock_analysis", ["NVDA", "NVDA"], snap)
+    # Small tick inside the 0.5% bucket and RSI bucket: same snapshot
+    assert answer_cache.snapshot(_data(120.10, 63), {"NVDA": "BUY"}) == snap
+    assert answer_cache.snapshot(_data(122.00, 61), {"NVDA": "BUY"}) != snap
+    assert answer_cache.snapshot(_data(120.00, 71), {"NVDA": "BUY"}) != snap
+    assert answer_cache.snapshot(_data(120.00, 61), {"NVDA": "HOLD"}) != snap
+
+
+def test_market_session_boundaries():
+    assert answer_cache.market_session(NY.localize(datetime(2025, 3, 5, 8, 0)))[0] == "pre"
+    session, end = answer_cache.market_session(NY.localize(datetime(2025, 3, 5, 15, 59)))
+    assert session == "regular" and (end.hour, end.minute) == (16, 0)
+    session, end = answer_cache.market_session(NY.localize(datetime(2025, 3, 7, 21, 0)))  # Friday night
+    assert session == "closed" and end.weekday() == 0 and end.hour == 4
+
+
+def test_get_put_stats_and_expiry(monkeypatch):
+    answer_cache.clear()
+    key = answer_cache.make_key("NVDA entry?", "stock_analysis", ["NVDA"], answer_cache.snapshot(_data(120, 61)))
+    assert answer_cache.get(key) is None
+    # One minute before the close: the entry must not outlive the session
+    answer_cache.put(key, "① 建議: 觀望", now=NY.localize(datetime(2025, 3, 5, 15, 59)))
+    assert answer_cache.get(key) == "① 建議: 觀望"
+    assert answer_cache.get(None) is None
+    assert answer_cache.stats["hits"] == 1 and answer_cache.stats["misses"] == 1
+    assert answer_cache.hit_rate() == 0.5
+
+    real_time = answer_cache.time.time
+    monkeypatch.setattr(answer_cache.time, "time", lambda: real_time() + 61)
+    assert answer_cache.get(key) is None and answer_cache.stats["expired"] == 1
@@ -0,0 +1,160 @@
+"""
+Backtester P&L engine tests.
+- Position simulation: stop/target/signal exits, gap fills, commission and slippage.
+- Metrics: win rate, profit factor, drawdown.
+- A multi-year run with a real agent finishes well under a second.
+- Result cache: one fetch per symbol, invalidated by new bars or params changes.
+
+Run: python -m pytest -q test_backtester.py
+"""
+
+import json
+import time
+
+import numpy as np
+
+from backtester import (
+    BacktestCosts,
+    add_indicators,
+    backtest_frame,
+    compute_metrics,
+    simulate_trades,
+)
+from strategy_agents.base_agent import StrategyAgent
+from strategy_orchestrator import StrategyOrchestrator
+
+NO_COSTS = BacktestCosts(commission_per_share=0.0, commission_min=0.0, slippage_bps=0.0)
+
+
+def _bars(open_, high, low, close):
+    return tuple(np.asarray(x, dtype=float) for x in (open_, high, low, close))
+
+
+def _signals(n, buys=(), sells=(), stop=np.nan, target=np.nan):
+    actions = np.zeros(n, dtype=np.int8)
+    stops = np.full(n, np.nan)
+    targets = np.full(n, np.nan)
+    for i in buys:
+        actions[i], stops[i], targets[i] = 1, stop, target
+    for i in sells:
+        actions[i] = -1
+    return actions, stops, targets
+
+
+def test_stop_hit_exits_at_stop():
+    o, h, l, c = _bars([10, 10, 10, 9.5, 9], [10, 10.2, 10.1, 9.6, 9.2], [10, 9.9, 9.8, 8.9, 8.8], [10, 10, 9.9, 9.1, 9])
+    actions, stops, targets = _signals(5, buys=[0], stop=9.0, target=12.0)
+    sim = simulate_trades(o, h, l, c, actions, stops, targets, costs=NO_COSTS, initial_capital=1000)
+    (trade,) = sim["trades"]
+    assert trade["exit_reason"] == "stop"
+    assert trade["exit_bar"] == 3
+    assert trade["exit_price"] == 9.0
+    assert trade["pnl"] == -100.0
+    assert sim["equity"][-1] == 900.0
+
+
+def test_gap_below_stop_fills_at_open():
+    o, h, l, c = _bars([10, 10, 8.5], [10, 10.1, 8.7], [10, 9.95, 8.4], [10, 10, 8.6])
+    actions, stops, targets = _signals(3, buys=[0], stop=9.0)
+    (trade,) = simulate_trades(o, h, l, c, actions, stops, targets, costs=NO_COSTS, initial_capital=1000)["trades"]
+    assert trade["exit_price"] == 8.5
+
+
+def test_target_hit_and_sell_signal_exit():
+    o, h, l, c = _bars([10, 10, 10.5, 11, 11, 11], [10, 10.6, 11.2, 11.1, 11.1, 11.1],
+                       [10, 9.9, 10.4, 10.9, 10.9, 10.9], [10, 10.5, 11, 11, 11, 11])
+    actions, stops, targets = _signals(6, buys=[0], stop=9.0, target=11.0)
+    (trade,) = simulate_trades(o, h, l, c, actions, stops, targets, costs=NO_COSTS, initial_capital=1000)["trades"]
+    assert (trade["exit_reason"], trade["exit_bar"], trade["exit_price"]) == ("target", 2, 11.0)
+
+    actions, stops, targets = _signals(6, buys=[0], sells=[2])
+    (trade,) = simulate_trades(o, h, l, c, actions, stops, targets, costs=NO_COSTS, initial_capital=1000)["trades"]
+    assert (trade["exit_reason"], trade["exit_bar"], trade["exit_price"]) == ("signal", 3, 11.0)
+
+
+def test_commission_and_slippage_reduce_pnl():
+    o, h, l, c = _bars([10] * 4, [10] * 4, [10] * 4, [10] * 4)
+    actions, stops, targets = _signals(4, buys=[0])
+    costs = BacktestCosts(commission_per_share=0.01, commission_min=1.0, slippage_bps=10.0)
+    (trade,) = simulate_trades(o, h, l, c, actions, stops, targets, costs=costs, initial_capital=1000)["trades"]
+    shares = trade["shares"]
+    assert shares == 99  # 1000 // 10.01, and 99 * 10.01 + 1.00 commission still fits
+    expected = shares * (10 * 0.999 - 10 * 1.001) - 2 * 1.0
+    assert abs(trade["pnl"] - round(expected, 2)) < 1e-9
+    assert trade["exit_reason"] == "end"
+
+
+def test_metrics():
+    equity = np.array([100.0, 110.0, 99.0, 121.0])
+    trades = [
+        {"pnl": 10.0, "return_pct": 10.0, "entry_bar": 0, "exit_bar": 1},
+        {"pnl": -11.0, "return_pct": -10.0, "entry_bar": 1, "exit_bar": 2},
+        {"pnl": 22.0, "return_pct": 22.2, "entry_bar": 2, "exit_bar": 3},
+    ]
+    m = compute_metrics(equity, trades, initial_capital=100.0)
+    assert m["trades"] == 3 and m["wins"] == 2
+    assert m["win_rate"] == 66.7
+    assert m["profit_factor"] == round(32 / 11, 3)
+    assert m["max_drawdown_pct"] == 10.0
+    assert m["total_return_pct"] == 21.0
+    assert m["sharpe"] > 0
+
+
+def test_multi_year_backtest_is_fast(random_ohlcv):
+    df = add_indicators(random_ohlcv(252 * 10))
+    agent = StrategyOrchestrator().agents[0]
+    backtest_frame(df, agent)  # warm up
+    t0 = time.perf_counter()
+    bt = backtest_frame(df, agent)
+    elapsed = time.perf_counter() - t0
+    assert elapsed < 1.0
+    assert len(bt["equity_curve"]) == len(df)
+    assert np.isfinite(bt["equity_curve"]).all()
+    for t in bt["trades"]:
+        assert t["entry_bar"] <= t["exit_bar"]
+    # Flat at the end, so the curve must agree with the trade ledger
+    assert abs(bt["equity_curve"][-1] - (10_000 + sum(t["pnl"] for t in bt["trades"]))) < 0.01 * (len(bt["trades"]) + 1)
+
+
+def test_result_cache_fetches_once_and_invalidates(tmp_path, monkeypatch, random_ohlcv):
+    import backtester
+
+    frames = {"df": add_indicators(random_ohlcv(120, seed=5))}
+    fetches = []
+
+    def fake_fetch(symbol, days=60):
+        fetches.append(symbol)
+        return frames["df"]
+
+    monkeypatch.setattr(backtester, "fetch_historical", fake_fetch)
+    monkeypatch.setattr(backtester, "BACKTEST_CACHE_FILE", tmp_path / "backtest_cache.json")
+    backtester.clear_backtest_cache()
+
+    agents = StrategyOrchestrator().agents[:9]
+    first = [backtester.run_backtest_single_strategy("TEST", a) for a in agents]
+    assert len(fetches) == 1  # one download for every strategy
+    hits = backtester.cache_stats["hits"]
+    again = [backtester.run_backtest_single_strategy("TEST", a) for a in agents]
+    assert again == first
+    assert backtester.cache_stats["hits"] == hits + len(agents)
+
+    # Survives a restart (in-memory caches dropped, file kept)
+    backtester.clear_backtest_cache(disk=False)
+    assert backtester.run_backtest_single_strategy("TEST", agents[0]) == first[0]
+    assert len(fetches) == 2
+
+    # Params change -> recomputed
+    misses = backtester.cache_stats["misses"]
+    agent = StrategyAgent(agents[0].skill_name, {"parameters": {**agents[0].params, "rsi_min": 10}})
+    backtester.run_backtest_single_strategy("TEST", agent)
+    assert backtester.cache_stats["misses"] == misses + 1
+
+    # New bar -> recomputed, old entry for the same strategy dropped
+    frames["df"] = add_indicators(random_ohlcv(121, seed=5))
+    backtester.clear_backtest_cache(disk=False)
+    backtester.run_backtest_single_strategy("TEST", agents[1])
+    assert backtester.cache_stats["misses"] == misses + 2
+    saved = json.loads((tmp_path / "backtest_cache.json").read_text())
+    same_strategy = [k for k in saved if f"|{agents[1].skill_name}|" in k]
+    assert len(same_strategy) == 1 and same_strategy[0].endswith(str(frames["df"].index[-1])[:10])
+    backtester.clear_backtest_cache()
@@ -0,0 +1,99 @@
+"""
+Cassette tests: httpx (sync + async), requests and feedparser traffic recorded once
+and replayed offline, with redaction, fallback matching and injected latency.
+
+Run: python -m pytest -q test_cassette.py
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+import requests
+
+from core import cassette
+
+BOT_URL = "https://api.telegram.org/bot123:ABC-def/sendMessage"
+
+
+def _transport(calls):
+    def handler(request):
+        calls.append(str(request.url))
+        return httpx.Response(200, json={"echo": json.loads(request.content or b"{}"), "n": len(calls)})
+    return httpx.MockTransport(handler)
+
+
+class _FakeAdapter(requests.adapters.BaseAdapter):
+    def __init__(self, calls):
+        super().__init__()
+        self.calls = calls
+
+    def send(self, request, **kwargs):
+        self.calls.append(request.url)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"c": 101.5}'
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def test_record_then_replay_offline(tmp_path):
+    calls = []
+    with cassette.use_cassette("t", mode="record", directory=tmp_path):
+        with httpx.Client(transport=_transport(calls)) as client:
+            first = client.post(BOT_URL, json={"text": "hi"}).json()
+        session = requests.Session()
+        session.mount("https://", _FakeAdapter(calls))
+        assert session.get("https://finnhub.io/api/v1/quote?symbol=NVDA&token=SECRET").json() == {"c": 101.5}
+    recorded = (tmp_path / "t.jsonl").read_text()
+    assert "ABC-def" not in recorded and "SECRET" not in recorded
+    assert len(calls) == 2
+
+    def offline(request):
+        raise AssertionError("network used during replay")
+
+    with cassette.use_cassette("t", directory=tmp_path):
+        with httpx.Client(transport=httpx.MockTransport(offline)) as client:
+            assert client.post(BOT_URL, json={"text": "hi"}).json() == first
+            # Different body: falls back to the same URL
+            assert client.post(BOT_URL, json={"text": "other"}).json() == first
+        session = requests.Session()
+        session.mount("https://", _FakeAdapter([]))
+        assert session.get("https://finnhub.io/api/v1/quote?symbol=NVDA&token=OTHER").json() == {"c": 101.5}
+        try:
+            httpx.Client(transport=httpx.MockTransport(offline)).get("https://example.com/none")
+            assert False, "miss should raise"
+        except httpx.ConnectError:
+            pass
+    # Original transports are restored
+    assert httpx.Client.send is not cassette._patched_httpx_send
+
+
+def test_async_replay_with_latency(tmp_path):
+    calls = []
+
+    async def record():
+        async with httpx.AsyncClient(transport=_transport(calls)) as client:
+            return (await client.post("https://api.openai.com/v1/chat/completions", json={"m": 1})).json()
+
+    with cassette.use_cassette("a", mode="record", directory=tmp_path):
+        expected = asyncio.run(record())
+
+    async def replay_many():
+        async with httpx.AsyncClient() as client:
+            return await asyncio.gather(*(
+                client.post("https://api.openai.com/v1/chat/completions", json={"m": 1}) for _ in range(5)
+            ))
+
+    with cassette.use_cassette("a", directory=tmp_path, latency="200"):
+        t0 = time.perf_counter()
+        responses = asyncio.run(replay_many())
+        elapsed = time.perf_counter() - t0
+    assert all(r.json() == expected for r in responses)
+    # Injected latency is awaited concurrently, not serialized
+    assert 0.2 <= elapsed < 0.6
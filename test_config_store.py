@@ -0,0 +1,42 @@
+"""
+Config store tests: debounced atomic write-behind, counters, external edits and listeners.
+
+Run: python -m pytest -q test_config_store.py
+"""
+
+import json
+import os
+import time
+
+from core.config_store import ConfigStore
+
+
+def test_changes_are_coalesced_into_one_atomic_write(tmp_path):
+    path = tmp_path / "geewoni_config.json"
+    store = ConfigStore(path, defaults={"weekly_profit": 0, "priority": []}, counters={"ai_usage": 0}, debounce=0.05)
+    for _ in range(20):
+        store.incr("ai_usage")
+    store["weekly_profit"] += 250
+    store["priority"].append("NVDA")
+    store.save("priority")
+    assert not path.exists()  # nothing written on the hot path
+    time.sleep(0.3)
+    assert json.loads(path.read_text()) == {"weekly_profit": 250, "priority": ["NVDA"], "ai_usage": 20}
+    assert store.stats["writes"] == 1
+    assert [p.name for p in tmp_path.iterdir()] == ["geewoni_config.json"]  # no temp files left
+
+
+def test_external_edits_are_merged_and_notified(tmp_path):
+    path = tmp_path / "geewoni_config.json"
+    path.write_text(json.dumps({"weekly_goal": 10000, "weekly_profit": 0}))
+    store = ConfigStore(path, defaults={}, debounce=60)
+    seen = []
+    store.subscribe(lambda key, value: seen.append((key, value)))
+    store["weekly_profit"] = 100
+    # Dashboard rewrites the file meanwhile (stale profit, new goal)
+    path.write_text(json.dumps({"weekly_goal": 20000, "weekly_profit": 0}))
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert store.flush()
+    assert json.loads(path.read_text()) == {"weekly_goal": 20000, "weekly_profit": 100}
+    assert seen == [("weekly_profit", 100), ("weekly_goal", 20000)]
+    assert store.refresh() == []  # our own write is not an external change
@@ -0,0 +1,50 @@
+"""
+Context builder tests: rules packed into the token budget by priority, cached per intent,
+and data blocks packed by importance in their original order.
+
+Run: python -m pytest -q test_context_builder.py
+"""
+
+from agents.context_builder import ContextBuilder, count_tokens, split_sections
+
+
+class _Rules:
+    RULE_MAP = {"stock_analysis": ["bot_rules", "templates"], "general": ["bot_rules"]}
+
+    def __init__(self):
+        self.rules = {
+            "bot_rules": "# Bot\n\n## Identity\nDay trading assistant.\n\n## Style\n" + "Be short. " * 20,
+            "templates": "# Templates\n\n## Standard\n" + "[STOCK] $[price] " * 200,
+        }
+
+    def get_rule_names(self, intent):
+        return self.RULE_MAP.get(intent, self.RULE_MAP["general"])
+
+
+def test_split_sections_keeps_intro_and_headings():
+    sections = split_sections("# Bot\nintro\n\n## A\na\n## B\nb\n")
+    assert sections == ["# Bot\nintro", "## A\na", "## B\nb"]
+
+
+def test_rules_fit_budget_by_priority_and_are_cached():
+    builder = ContextBuilder(_Rules(), rules_budget=200)
+    full, packed = builder.summary()["stock_analysis"]
+    rules = builder.rules_for("stock_analysis")
+    assert packed <= 200 < full
+    assert count_tokens(rules) <= 200
+    # Higher-priority file kept whole; the oversized template section is skipped
+    assert "## Identity" in rules and "## Style" in rules and "## Standard" not in rules
+    assert builder.rules_for("stock_analysis") is rules
+    assert builder.rules_for("unknown") == builder.rules_for("general")
+
+
+def test_pack_data_drops_low_priority_blocks_keeps_order():
+    builder = ContextBuilder(_Rules(), data_budget=40)
+    context = ("\n[Data]\nNVDA: $120.00 RSI 61\n[News NVDA] " + "headline " * 40
+               + "\n[Consensus] 7/13 BUY\n[Fit] Momentum\n")
+    packed = builder.pack_data(context)
+    assert "[News" not in packed
+    assert packed.index("[Data]") < packed.index("[Consensus]") < packed.index("[Fit]")
+    assert builder.stats["data_blocks_dropped"] == 1
+    # The top block survives even when it alone exceeds the budget
+    assert "[Data]" in builder.pack_data(context, budget=1)
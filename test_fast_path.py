@@ -0,0 +1,54 @@
+"""
+Fast path tests: which messages skip the LLM, and template rendering from ai_rules.
+
+Run: python -m pytest -q test_fast_path.py
+"""
+
+from agents import fast_path
+
+DATA = {
+    "current_price": 120.5, "support": 115.0, "resistance": 125.0, "rsi": 64.0, "ema_9": 119.0,
+    "price_change_pct": 1.23, "volume_ratio": 1.4, "trend": "强势看涨", "trend_en": "bullish",
+    "data_source": "Yahoo Finance", "last_update": "03/05 10:00",
+}
+
+
+class Orchestrator:
+    def get_incremental_consensus(self, data, symbol):
+        return {"action": "BUY", "buy_count": 7, "sell_count": 2, "hold_count": 4, "total_agents": 13,
+                "top_signals": [{"strategy": "EMA Cross"}, {"strategy": "RSI Bounce"}]}
+
+
+def _intent(*symbols):
+    return {"intent": "stock_analysis", "symbols": list(symbols), "confidence": "high"}
+
+
+def test_match_only_plain_lookups():
+    # The detector's name matching adds noise tickers ("ICE" in "price"); only typed ones count
+    assert fast_path.match("NVDA price?", _intent("KRSP", "NVDA", "ICE")) == ("quote", "NVDA")
+    assert fast_path.match("RKLB RSI", _intent("RKLB", "RSI")) == ("quote", "RKLB")
+    assert fast_path.match("AMD signal", _intent("AMD", "SIG")) == ("signal", "AMD")
+    assert fast_path.match("NVDA 现在股价", _intent("NVDA")) == ("quote", "NVDA")
+    assert fast_path.match("NVDA price and news", _intent("NVDA")) is None
+    assert fast_path.match("compare NVDA AMD price", _intent("NVDA", "AMD")) is None
+    assert fast_path.match("NVDA entry?", _intent("NVDA")) is None
+    assert fast_path.match("NVDA price?", {**_intent("NVDA"), "confidence": "medium"}) is None
+
+
+def test_answer_renders_response_templates():
+    quote = fast_path.answer("NVDA price?", "quote", "NVDA", get_stock_data_fn=lambda s: DATA)
+    assert quote.startswith("NVDA at $120.50 (+1.2%) 📈")
+    assert "• RSI: 64 - neutral" in quote and "Yahoo Finance 03/05 10:00" in quote and "[" not in quote
+
+    signal = fast_path.answer("NVDA signal", "signal", "NVDA", get_stock_data_fn=lambda s: DATA,
+                              orchestrator=Orchestrator())
+    assert "7/13 strategies say BUY" in signal and "Top picks: EMA Cross, RSI Bounce" in signal
+    assert "Target: $125.00 (+3.7%)" in signal and "Stop: $115.00 (-4.6%)" in signal
+
+    chinese = fast_path.answer("NVDA 信号", "signal", "NVDA", get_stock_data_fn=lambda s: DATA,
+                               orchestrator=Orchestrator())
+    assert "7/13个策略建议 买入" in chinese and "止损: $115.00 (-4.6%)" in chinese
+
+    # No data or no consensus for a signal: full pipeline
+    assert fast_path.answer("NVDA price", "quote", "NVDA", get_stock_data_fn=lambda s: None) is None
+    assert fast_path.answer("NVDA signal", "signal", "NVDA", get_stock_data_fn=lambda s: DATA) is None
@@ -0,0 +1,23 @@
+"""
+Final Decision prompt tests: the system prompt is a stable, cacheable prefix.
+
+Run: python -m pytest -q test_final_decision.py
+"""
+
+from agents.final_decision import build_prompts
+
+
+def _prompts(account, learning):
+    return build_prompts("\n[Data] NVDA $120.00 RSI 61\n", "NVDA entry?", "stock_analysis", ["NVDA"],
+                         relevant_rules="# BOT RULES\nBe concise.", account_line=account, learning_context=learning)
+
+
+def test_volatile_lines_stay_out_of_system_prompt():
+    a = _prompts("Account: P&L $120/500.", "AI learning: success rate 55.0%\n")
+    b = _prompts("Account: P&L $135/500.", "")
+    assert a["system"] == b["system"]
+    assert a["system"].startswith("# BOT RULES") and "Final Decision agent" in a["system"]
+    assert "P&L" not in a["system"] and "learning" not in a["system"]
+    assert a["context"] == "Account: P&L $120/500.\nAI learning: success rate 55.0%"
+    assert b["context"] == "Account: P&L $135/500."
+    assert a["user"].startswith("NVDA entry?") and a["max_tokens"] == 180
@@ -0,0 +1,99 @@
+"""
+Intraday backtester tests: streaming indicators match backtester.add_indicators,
+session boundaries, per-bar stop / session-end exits, and the 5m bar store.
+
+Run: python -m pytest -q test_intraday_backtester.py
+"""
+
+import numpy as np
+import pandas as pd
+
+from backtester import BacktestCosts, add_indicators, market_data_rows
+from intraday_backtester import (
+    MARKET_TZ,
+    StreamingIndicators,
+    load_bars,
+    replay_symbol,
+    save_bars,
+    session_codes,
+)
+
+NO_COSTS = BacktestCosts(commission_per_share=0.0, commission_min=0.0, slippage_bps=0.0)
+
+
+def _day_bars(closes, start="2024-03-04 09:30"):
+    index = pd.date_range(start, periods=len(closes), freq="5min", tz=MARKET_TZ)
+    closes = np.asarray(closes, dtype=float)
+    return pd.DataFrame(
+        {"Open": closes, "High": closes + 0.05, "Low": closes - 0.05, "Close": closes, "Volume": 1000.0},
+        index=index,
+    )
+
+
+class _ScriptedAgent:
+    """BUY on the given bar numbers (1-based count of decisions), HOLD otherwise."""
+
+    skill_name = "Scripted"
+
+    def __init__(self, buy_on, stop=None, target=None):
+        self.buy_on, self.stop, self.target, self.calls = set(buy_on), stop, target, 0
+
+    def decide(self, md):
+        self.calls += 1
+        return ("BUY", 80, "scripted") if self.calls in self.buy_on else ("HOLD", 0, "")
+
+    def build_signal(self, action, conf, reason, md):
+        from strategy_agents.base_agent import TradingSignal
+        return TradingSignal(action, conf, reason, self.skill_name, md["current_price"], self.stop, self.target)
+
+
+def test_streaming_indicators_match_batch(random_ohlcv):
+    df = add_indicators(random_ohlcv(400, seed=3))
+    ind = StreamingIndicators()
+    for expected, bar in zip(market_data_rows(df), df[["Open", "High", "Low", "Close", "Volume"]].itertuples(index=False)):
+        got = ind.update(*bar)
+        for key, value in expected.items():
+            if key.startswith("week_52"):
+                continue
+            if key == "trend_en":
+                assert got[key] == value
+            else:
+                assert abs(got[key] - value) < 1e-8, key
+
+
+def test_session_codes():
+    index = pd.DatetimeIndex(
+        ["2024-03-04 04:00", "2024-03-04 09:25", "2024-03-04 09:30", "2024-03-04 15:55",
+         "2024-03-04 16:00", "2024-03-04 19:55", "2024-03-04 20:00"]
+    ).tz_localize(MARKET_TZ)
+    assert session_codes(index).tolist() == [0, 0, 1, 1, 2, 2, -1]
+    # UTC input is converted to New York time
+    assert session_codes(index.tz_convert("UTC")).tolist() == [0, 0, 1, 1, 2, 2, -1]
+
+
+def test_stop_and_session_end_exits():
+    # Day 1: buy after warm-up, price drifts down through the stop
+    day1 = _day_bars(np.linspace(100, 99, 78))
+    # Day 2: buy, never stopped, flattened at the last regular bar
+    day2 = _day_bars(np.linspace(100, 101, 78), start="2024-03-05 09:30")
+    df = pd.concat([day1, day2])
+    agent = _ScriptedAgent(buy_on={1, 78}, stop=99.5)
+    out = replay_symbol(df, agent, costs=NO_COSTS, warmup_bars=10)
+    reasons = [t["exit_reason"] for t in out["trades"]]
+    assert reasons == ["stop", "session_end"]
+    first, second = out["trades"]
+    assert first["exit_price"] == 99.5
+    assert second["exit_time"].startswith("2024-03-05 15:55")
+    # Nothing is held overnight
+    assert out["equity"][77] == out["equity"][78]
+
+
+def test_bar_store_merges(tmp_path):
+    first = _day_bars([10, 11, 12])
+    save_bars("TEST", first, tmp_path)
+    newer = _day_bars([12.5, 13, 14, 15], start="2024-03-04 09:40")
+    # 09:40 overlaps: the newer bar wins
+    assert save_bars("TEST", newer, tmp_path) == 6
+    stored = load_bars("TEST", tmp_path)
+    assert stored["Close"].tolist() == [10.0, 11.0, 12.5, 13.0, 14.0, 15.0]
+    assert str(stored.index.tz) == MARKET_TZ
@@ -0,0 +1,81 @@
+"""
+Learning log tests: follow / outcome lookups, incremental summary and the one-time JSON import.
+
+Run: python -m pytest -q test_learning_log.py
+"""
+
+import json
+import sqlite3
+
+import pytest
+
+from core.learning_log import LearningLog
+from core.trade_ledger import TradeLedger
+
+
+def test_follow_outcome_and_summary(tmp_path):
+    log = LearningLog(tmp_path / "trades.db", json_file=tmp_path / "missing.json")
+    log.log_recommendation("NVDA", {"entry_price": 100.0, "rsi": 72, "strategy": "Momentum"})
+    log.log_recommendation("NVDA", {"entry_price": 120.0, "rsi": 55, "strategy": "EMA Crossover"})
+
+    assert not log.mark_followed("NVDA", 110.0)  # not within 2% of either entry
+    assert log.mark_followed("NVDA", 101.0)
+    assert not log.record_outcome("AMD", 10.0, 5.0)
+    assert log.record_outcome("NVDA", 108.0, 70.0)
+    assert not log.record_outcome("NVDA", 108.0, 70.0)  # already has an outcome
+
+    summary = log.summary()
+    assert summary["total_recommendations"] == 2 and summary["recommendations_followed"] == 1
+    assert summary["follow_rate"] == 50.0 and summary["successes"] == 1 and summary["success_patterns"] == 1
+    assert summary["learning_insights"]["best_rsi_range"] == {"min": 40, "max": 70}
+    assert summary["learning_insights"]["preferred_strategies"] == ["Momentum"]
+    log.close()
+    # State survives a restart without recomputing
+    assert LearningLog(tmp_path / "trades.db").summary() == summary
+
+
+def test_imports_ai_learning_json_once(tmp_path):
+    json_file = tmp_path / "ai_learning.json"
+    json_file.write_text(json.dumps({
+        "recommendations": [
+            {"id": "1", "symbol": "RKLB", "entry_price": 20.0, "rsi": 45, "strategy": "Reversal",
+             "followed": True, "outcome": {"profit": 30.0, "success": True}},
+            {"id": "2", "symbol": "RKLB", "entry_price": 22.0, "followed": False, "outcome": None},
+        ],
+        "followed_trades": [{"recommendation_id": "1", "symbol": "RKLB", "entry_price": 20.1}],
+        "learning_insights": {"best_rsi_range": {"min": 35, "max": 60}, "best_volume_ratio": 1.5,
+                              "preferred_strategies": ["Reversal"], "success_patterns": [{"rsi": 45}]},
+        "total_recommendations": 2, "recommendations_followed": 1, "follow_rate": 50.0,
+    }))
+    log = LearningLog(tmp_path / "trades.db", json_file=json_file)
+    summary = log.summary()
+    assert (summary["successes"], summary["success_patterns"], summary["follow_rate"]) == (1, 1, 50.0)
+    assert summary["learning_insights"]["best_rsi_range"] == {"min": 35, "max": 60}
+    assert log.mark_followed("RKLB", 22.2)
+    log.close()
+    assert LearningLog(tmp_path / "trades.db", json_file=json_file).summary()["total_recommendations"] == 2
+
+
+def test_failed_write_rolls_back_and_log_stays_usable(tmp_path):
+    log = LearningLog(tmp_path / "trades.db", json_file=None)
+    log.log_recommendation("NVDA", {"entry_price": 100.0})
+    before = log.summary()
+    log._db.execute("DROP TABLE followed_trades")  # the follow's second statement fails
+    with pytest.raises(sqlite3.OperationalError):
+        log.mark_followed("NVDA", 100.0)
+    # Rolled back: summary untouched, recommendation still unfollowed, no transaction left open
+    assert log.summary() == before
+    assert log._db.execute("SELECT followed FROM recommendations").fetchone()[0] == 0
+    assert not log._db.in_transaction
+    log.log_recommendation("AMD", {"entry_price": 90.0})
+    assert log.summary()["total_recommendations"] == 2
+
+
+def test_shares_the_ledger_connection(tmp_path):
+    ledger = TradeLedger(tmp_path / "trades.db", json_file=None)
+    log = LearningLog(json_file=None, ledger=ledger)
+    log.log_recommendation("NVDA", {"entry_price": 100.0})
+    ledger.add({"symbol": "NVDA", "entry_price": 100.0, "quantity": 1, "status": "open"})
+    assert log.mark_followed("NVDA", 100.5) and ledger.open_trade("NVDA")
+    log.close()  # leaves the ledger's connection open
+    assert ledger.open_positions()
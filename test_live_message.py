@@ -0,0 +1,52 @@
+"""
+Live message tests: placeholder, throttled edits while streaming and the final edit.
+
+Run: python -m pytest -q test_live_message.py
+"""
+
+import asyncio
+
+from core import metrics
+from core.live_message import LiveMessage
+
+
+class FakeSent:
+    def __init__(self, log):
+        self.log = log
+
+    async def edit_text(self, text, **kwargs):
+        self.log.append(("edit", text, kwargs))
+
+
+class FakeMessage:
+    def __init__(self):
+        self.log = []
+
+    async def reply_text(self, text, **kwargs):
+        self.log.append(("reply", text, kwargs))
+        return FakeSent(self.log)
+
+
+def test_throttled_edits_then_final():
+    metrics.reset("lm.")
+    message = FakeMessage()
+    live = LiveMessage(message, metric="lm", interval=0.05, min_chars=5)
+
+    async def stream():
+        await live.start("…")
+        text = ""
+        for i in range(20):
+            text += f"w{i} "
+            await live.update(text)
+            await asyncio.sleep(0.01)
+        await live.finish(text + "done", parse_mode="HTML")
+
+    asyncio.run(stream())
+    kinds = [entry[0] for entry in message.log]
+    assert kinds[0] == "reply" and kinds.count("reply") == 1
+    partial = message.log[1:-1]
+    assert 2 <= len(partial) <= 6  # ~200ms of tokens at one edit per 50ms
+    assert all(text.endswith("▌") for _, text, _ in partial)
+    assert message.log[-1] == ("edit", "w0 w1 w2 w3 w4 w5 w6 w7 w8 w9 w10 w11 w12 w13 w14 w15 w16 w17 w18 w19 done", {"parse_mode": "HTML"})
+    stats = metrics.summary("lm.")
+    assert stats["lm.first_text"]["count"] == 1 and stats["lm.full_text"]["count"] == 1
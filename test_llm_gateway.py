@@ -0,0 +1,150 @@
+"""
+LLM gateway tests: concurrency cap, retries on 429, pass-through of other errors, streaming,
+prompt-cache usage stats.
+
+Run: python -m pytest -q test_llm_gateway.py
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+
+from core import llm_gateway, metrics
+from core.llm_gateway import LLMGateway
+
+
+class FakeClient:
+    """Async chat.completions.create(); raises the queued errors first."""
+
+    def __init__(self, latency=0.02, errors=()):
+        self.latency = latency
+        self.errors = list(errors)
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs):
+        self.calls += 1
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.latency)
+            if self.errors:
+                raise self.errors.pop(0)
+            message = SimpleNamespace(content=f" {kwargs['model']} ok ", tool_calls=None)
+            usage = SimpleNamespace(prompt_tokens=2000, completion_tokens=50,
+                                    prompt_tokens_details=SimpleNamespace(cached_tokens=1536 if self.calls > 1 else 0))
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+        finally:
+            self.active -= 1
+
+
+def _rate_limited(retry_after=None):
+    headers = {"retry-after": retry_after} if retry_after else {}
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    return openai.RateLimitError("slow down", response=httpx.Response(429, headers=headers, request=request), body=None)
+
+
+def test_concurrency_cap():
+    fake = FakeClient(latency=0.02)
+    gateway = LLMGateway(client=fake, max_concurrency=3)
+
+    async def burst():
+        return await asyncio.gather(*(gateway.complete("hi") for _ in range(12)))
+
+    answers = asyncio.run(burst())
+    assert answers == ["gpt-4o-mini ok"] * 12
+    assert fake.peak == 3 and gateway.stats["max_in_flight"] == 3
+    assert gateway.stats["calls"] == 12 and gateway.stats["in_flight"] == 0
+
+
+def test_retries_rate_limit_with_backoff(monkeypatch):
+    monkeypatch.setattr(llm_gateway, "RETRY_BASE_DELAY", 0.01)
+    fake = FakeClient(latency=0, errors=[_rate_limited(), _rate_limited("0")])
+    gateway = LLMGateway(client=fake, max_retries=3)
+    response = asyncio.run(gateway.chat.completions.create(model="m", messages=[]))
+    assert response.choices[0].message.content.strip() == "m ok"
+    assert fake.calls == 3 and gateway.stats["retries"] == 2 and gateway.stats["failures"] == 0
+
+
+def test_gives_up_and_does_not_retry_other_errors(monkeypatch):
+    monkeypatch.setattr(llm_gateway, "RETRY_BASE_DELAY", 0.0)
+    fake = FakeClient(latency=0, errors=[_rate_limited()] * 3)
+    gateway = LLMGateway(client=fake, max_retries=2)
+    with pytest.raises(openai.RateLimitError):
+        asyncio.run(gateway.complete("hi"))
+    assert fake.calls == 3 and gateway.stats["failures"] == 1
+
+    fake = FakeClient(latency=0, errors=[ValueError("bad request")])
+    gateway = LLMGateway(client=fake)
+    with pytest.raises(ValueError):
+        asyncio.run(gateway.complete("hi"))
+    assert fake.calls == 1 and gateway.stats["retries"] == 0
+
+
+class FakeStreamClient(FakeClient):
+    async def _create(self, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        assert kwargs["stream"] is True
+
+        async def chunks():
+            for word in ["NVDA", " 觀望", ""]:
+                await asyncio.sleep(self.latency)
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word))])
+        return chunks()
+
+
+def test_stream_yields_deltas_and_records_ttft(monkeypatch):
+    monkeypatch.setattr(llm_gateway, "RETRY_BASE_DELAY", 0.0)
+    metrics.reset("llm.")
+    fake = FakeStreamClient(latency=0.01, errors=[_rate_limited()])
+    gateway = LLMGateway(client=fake)
+
+    async def collect():
+        return [d async for d in gateway.stream(messages=[])]
+
+    assert asyncio.run(collect()) == ["NVDA", " 觀望"]
+    assert fake.calls == 2 and gateway.stats["retries"] == 1 and gateway.stats["in_flight"] == 0
+    stats = metrics.summary("llm.")
+    assert stats["llm.ttft"]["count"] == 1
+    assert stats["llm.stream_total"]["max_ms"] >= stats["llm.ttft"]["max_ms"]
+
+
+def test_prompt_cache_usage_stats():
+    metrics.reset("llm.call.")
+    gateway = LLMGateway(client=FakeClient(latency=0))
+    for _ in range(2):
+        asyncio.run(gateway.complete("hi"))
+    assert gateway.stats["prompt_tokens"] == 4000 and gateway.stats["cached_tokens"] == 1536
+    assert gateway.cached_share() == 1536 / 4000
+    stats = metrics.summary("llm.call.")
+    assert stats["llm.call.cached"]["count"] == 1 and stats["llm.call.uncached"]["count"] == 1
+
+
+def test_stream_collects_tool_calls():
+    async def create(**kwargs):
+        def tool_delta(index, id=None, name=None, arguments=None):
+            fn = SimpleNamespace(name=name, arguments=arguments)
+            return SimpleNamespace(index=index, id=id, function=fn)
+
+        async def chunks():
+            for calls in ([tool_delta(0, "call_1", "get_stock_data", '{"sym')],
+                          [tool_delta(0, arguments='bol": "NVDA"}'), tool_delta(1, "call_2", "get_news", "{}")]):
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=None, tool_calls=calls))])
+        return chunks()
+
+    gateway = LLMGateway(client=SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create))))
+    tool_calls = []
+
+    async def collect():
+        return [d async for d in gateway.stream(messages=[], tools=[{}], tool_calls=tool_calls)]
+
+    assert asyncio.run(collect()) == []
+    assert [(c["id"], c["function"]["name"], c["function"]["arguments"]) for c in tool_calls] == [
+        ("call_1", "get_stock_data", '{"symbol": "NVDA"}'), ("call_2", "get_news", "{}")]
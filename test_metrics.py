@@ -0,0 +1,48 @@
+"""
+Latency metrics tests: percentiles, stopwatch laps and event-loop lag detection.
+
+Run: python -m pytest -q test_metrics.py
+"""
+
+import asyncio
+import time
+
+from core import metrics
+
+
+def test_percentiles_and_summary():
+    metrics.reset("t.")
+    for ms in range(1, 101):
+        metrics.record("t.handler", ms / 1000)
+    s = metrics.summary("t.")["t.handler"]
+    assert s["count"] == 100
+    assert s["p50_ms"] == 50.5 and s["max_ms"] == 100.0
+    assert 99 <= s["p99_ms"] <= 100
+    assert metrics.percentile([], 95) == 0.0
+
+
+def test_stopwatch_laps():
+    metrics.reset("sw.")
+    sw = metrics.Stopwatch("sw")
+    time.sleep(0.01)
+    sw.lap("a")
+    sw.lap("b")
+    total = sw.total()
+    stats = metrics.summary("sw.")
+    assert set(stats) == {"sw.a", "sw.b", "sw.total"}
+    assert stats["sw.a"]["p50_ms"] >= 10
+    assert total >= sw.laps["a"] + sw.laps["b"] - 1e-6
+
+
+def test_event_loop_lag_sees_blocking_call():
+    metrics.reset("lag")
+
+    async def scenario():
+        task = asyncio.create_task(metrics.monitor_event_loop_lag(0.005, name="lag"))
+        await asyncio.sleep(0.02)
+        time.sleep(0.1)  # a synchronous call inside a handler
+        await asyncio.sleep(0.02)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert metrics.summary("lag")["lag"]["max_ms"] >= 90
@@ -0,0 +1,66 @@
+"""
+Monte Carlo tests: seeded determinism, block bootstrap keeps consecutive trades
+together, equity/drawdown math and the weekly-goal probability.
+
+Run: python -m pytest -q test_monte_carlo.py
+"""
+
+import time
+
+import numpy as np
+
+from backtester import add_indicators, backtest_frame
+from monte_carlo import (
+    equity_paths,
+    max_drawdowns,
+    monte_carlo_from_backtest,
+    resample_returns,
+    run_monte_carlo,
+)
+from strategy_agents.base_agent import StrategyAgent
+
+
+def test_resampling_is_seeded_and_blocks_are_contiguous():
+    returns = np.arange(20, dtype=float)
+    a = resample_returns(returns, 500, 30, method="block", block_size=5, seed=7)
+    b = resample_returns(returns, 500, 30, method="block", block_size=5, seed=7)
+    assert a.shape == (500, 30)
+    assert np.array_equal(a, b)
+    # Inside each block the trades follow the original order (circularly)
+    blocks = a.reshape(500, 6, 5)
+    assert np.all((np.diff(blocks, axis=2) % 20) == 1)
+    boot = resample_returns(returns, 500, 30, seed=7)
+    assert set(np.unique(boot)) <= set(returns)
+
+
+def test_equity_and_drawdown():
+    sampled = np.array([[0.10, -0.50, 0.20], [-1.5, 0.1, 0.1]])
+    paths = equity_paths(sampled, 1000.0)
+    assert np.allclose(paths[0], [1000, 1100, 550, 660])
+    # A loss beyond -100% floors the account at zero
+    assert np.allclose(paths[1], [1000, 0, 0, 0])
+    assert np.allclose(max_drawdowns(paths), [50.0, 100.0])
+
+
+def test_weekly_goal_probability():
+    # Every trade +1%: the goal of $100 is reached on the first trade in every path
+    out = run_monte_carlo([1.0] * 10, initial_capital=10_000, weekly_goal=100, trades_per_week=3, n_paths=200, seed=1)
+    assert out["prob_hit_weekly_goal"] == 1.0
+    assert out["risk_of_ruin"] == 0.0
+    assert out["max_drawdown_pct"]["p95"] == 0.0
+    assert abs(out["final_equity"]["p50"] - 10_000 * 1.01 ** 10) < 0.01
+    # +2% / -2% coin flips: a 4% goal in one trade is never hit, and over two
+    # trades only +2% twice ends in profit (1.02 * 0.98 < 1)
+    out = run_monte_carlo([2.0, -2.0], weekly_goal=400, trades_per_week=1, n_paths=4000, seed=1)
+    assert out["prob_hit_weekly_goal"] == 0.0
+    assert 0.2 < out["prob_profit"] < 0.3
+
+
+def test_from_backtest_vectorized_speed(random_ohlcv):
+    bt = backtest_frame(add_indicators(random_ohlcv(756, seed=5)), StrategyAgent("EMA Crossover", {}))
+    assert bt["trades"]
+    t0 = time.perf_counter()
+    out = monte_carlo_from_backtest(bt, n_paths=10_000, method="block", seed=0, horizon_trades=250)
+    assert time.perf_counter() - t0 < 2.0
+    assert out["n_trades"] == len(bt["trades"])
+    assert out["final_equity"]["p5"] <= out["final_equity"]["p50"] <= out["final_equity"]["p95"]
@@ -0,0 +1,73 @@
+"""
+Portfolio backtester tests on synthetic history: risk limits from the config,
+sharded (process pool) results matching in-process, and cash accounting.
+
+Run: python -m pytest -q test_portfolio_backtester.py
+"""
+
+import numpy as np
+import pytest
+
+from portfolio_backtester import run_portfolio_backtest, simulate_portfolio
+from backtester import BacktestCosts
+
+STRATEGIES = ["EMA Crossover", "Trend Following", "RSI Divergence"]
+RISK = {"max_position_pct": 10, "stop_loss_pct": 2, "max_daily_loss": 1500}
+
+
+@pytest.fixture
+def history(random_ohlcv):
+    history = {f"SYM{i}": random_ohlcv(400, seed=10 + i) for i in range(6)}
+    # One symbol lists later, so the calendar has gaps to align
+    history["SYM0"] = history["SYM0"].iloc[120:]
+    return history
+
+
+def test_pool_matches_in_process_and_respects_risk(history):
+    kwargs = dict(history=history, risk=RISK, initial_capital=100_000.0)
+    serial = run_portfolio_backtest(STRATEGIES, max_workers=0, **kwargs)
+    pooled = run_portfolio_backtest(STRATEGIES, max_workers=2, shards_per_worker=2, **kwargs)
+    assert serial["trades"] == pooled["trades"]
+    assert serial["equity_curve"] == pooled["equity_curve"]
+
+    trades = serial["trades"]
+    assert trades
+    assert set(serial["pnl_by_strategy"]) <= set(STRATEGIES)
+    curve = dict(zip(serial["dates"], serial["equity_curve"]))
+    dates = serial["dates"]
+    for t in trades:
+        # Position size capped by max_position_pct of the previous close's equity
+        prev_equity = curve[dates[t["entry_bar"] - 1]]
+        assert t["shares"] * t["entry_price"] <= prev_equity * RISK["max_position_pct"] / 100 + 1e-6
+    assert serial["throughput"]["symbol_years_per_sec"] > 0
+    final = serial["equity_curve"][-1]
+    assert abs(final - (100_000 + sum(t["pnl"] for t in trades))) < 0.01 * (len(trades) + 1)
+
+
+def test_daily_loss_limit_flattens_and_skips_entries():
+    # Two symbols, one bar of entry then a crash day
+    n = 5
+    calendar = np.arange("2024-01-01", "2024-01-06", dtype="datetime64[D]")
+    price = np.array([[100, 100, 100, 90, 90]] * 2, dtype=float)
+    aligned = {
+        "symbols": ["A", "B"],
+        "calendar": calendar,
+        "open": price.copy(),
+        "high": price.copy(),
+        "low": price.copy(),
+        "close": price.copy(),
+        "actions": np.zeros((1, 2, n), dtype=np.int8),
+        "stops": np.full((1, 2, n), np.nan),
+        "targets": np.full((1, 2, n), np.nan),
+        "confidence": np.full((1, 2, n), 50.0),
+    }
+    aligned["open"][:, 3] = 100  # gap happens intraday, close at 90
+    aligned["actions"][0, :, 0] = 1  # both BUY on day 0 -> enter day 1
+    aligned["actions"][0, :, 3] = 1  # BUY again on the crash day: must be skipped
+    no_costs = BacktestCosts(commission_per_share=0, commission_min=0, slippage_bps=0)
+    risk = {"max_position_pct": 50, "stop_loss_pct": 0, "max_daily_loss": 1000}
+    sim = simulate_portfolio(aligned, ["S"], risk=risk, costs=no_costs, initial_capital=10_000)
+    assert sim["halted_days"] == 1
+    assert [t["exit_reason"] for t in sim["trades"]] == ["daily_loss", "daily_loss"]
+    assert all(t["exit_bar"] == 3 for t in sim["trades"])
+    assert sim["equity"][-1] == 9_000
@@ -0,0 +1,40 @@
+"""
+Tool prefetch tests: prefetched calls are reused, others run on demand, unused ones count as wasted.
+
+Run: python -m pytest -q test_prefetch.py
+"""
+
+import asyncio
+import time
+
+from agents import prefetch as prefetch_mod
+from agents.prefetch import ToolPrefetcher
+
+
+def test_prefetch_used_on_demand_and_wasted():
+    for k in prefetch_mod.stats:
+        prefetch_mod.stats[k] = 0
+    fetched = []
+
+    def slow_data(symbol):
+        fetched.append(symbol)
+        time.sleep(0.2)
+        return None  # formatted as "<SYM>: No data."
+
+    prefetcher = ToolPrefetcher(get_stock_data_fn=slow_data, tools=("get_stock_data",))
+
+    async def message():
+        prefetcher.start(["NVDA", "AMD"])
+        await asyncio.sleep(0.2)  # the first LLM round trip
+        t0 = time.perf_counter()
+        ready = await prefetcher.run("get_stock_data", {"symbol": "nvda"})
+        waited = time.perf_counter() - t0
+        extra = await prefetcher.run("get_stock_data", {"symbol": "TSLA"})
+        prefetcher.close()
+        return ready, waited, extra
+
+    ready, waited, extra = asyncio.run(message())
+    assert ready == "NVDA: No data." and extra == "TSLA: No data."
+    assert waited < 0.15  # already (nearly) done when the model asked
+    assert sorted(fetched) == ["AMD", "NVDA", "TSLA"]
+    assert prefetch_mod.stats == {"started": 2, "used": 1, "wasted": 1, "on_demand": 1}
@@ -0,0 +1,50 @@
+"""
+Rollup tests: Welford variance and running drawdown match a full recompute, and the ledger
+keeps day / week / month / strategy buckets in step with closes and bulk imports.
+
+Run: python -m pytest -q test_rollups.py
+"""
+
+import statistics
+
+from core import rollups
+from core.trade_ledger import TradeLedger
+
+PROFITS = [120.0, -80.0, -60.0, 200.0, -150.0, 40.0]
+
+
+def test_bucket_matches_full_recompute():
+    bucket = rollups.new_bucket()
+    for p in PROFITS:
+        rollups.add(bucket, p)
+    assert bucket["count"] == 6 and bucket["wins"] == 3 and bucket["pnl"] == sum(PROFITS)
+    assert abs(rollups.std(bucket) - statistics.stdev(PROFITS)) < 1e-9
+    assert abs(rollups.sharpe(bucket) - statistics.mean(PROFITS) / statistics.stdev(PROFITS)) < 1e-9
+    # Equity 120 → 40 → -20 → 180 → 30 → 70: worst drop from a peak is 180 → 30
+    assert bucket["max_drawdown"] == 150.0
+    assert rollups.sharpe(rollups.add(rollups.new_bucket(), 10)) is None
+
+
+def test_keys_for_close_date():
+    assert rollups.keys_for("2025-03-07 15:30:00", "Reversal") == [
+        ("day", "2025-03-07"), ("week", "2025-W10"), ("month", "2025-03"),
+        ("strategy", "Reversal"), ("all", "all"),
+    ]
+    assert rollups.keys_for(None, None) == [("strategy", "Manual"), ("all", "all")]
+
+
+def test_ledger_updates_rollups_on_close_and_rebuild(tmp_path):
+    ledger = TradeLedger(tmp_path / "trades.db", json_file=None)
+    for i, p in enumerate(PROFITS):
+        seq = ledger.add({"symbol": "NVDA", "entry_price": 100.0, "quantity": 1, "status": "open",
+                          "strategy": "Reversal" if i % 2 else "EMA Crossover"})
+        ledger.close_trade(seq, 100.0 + p, p, p, f"2025-03-0{3 + i // 3} 10:00:0{i}")
+
+    assert ledger.rollup("day", "2025-03-03")["pnl"] == -20.0
+    assert ledger.rollup("week", "2025-W10")["count"] == 6
+    assert ledger.strategy_stats()["Reversal"] == {"trades": 3, "wins": 2, "losses": 1, "profit": 160.0}
+    assert ledger.win_rate() == (50.0, 3, 6)
+
+    incremental = {scope: ledger.buckets(scope) for scope in rollups.SCOPES}
+    ledger.replace_all(ledger.all())  # bulk path recomputes from scratch
+    assert {scope: ledger.buckets(scope) for scope in rollups.SCOPES} == incremental
@@ -0,0 +1,46 @@
+"""
+Stage runner tests: stages run concurrently, a slow stage is dropped at its deadline
+without delaying the others, errors are contained, and the report line lists each stage.
+
+Run: python -m pytest -q test_stage_runner.py
+"""
+
+import asyncio
+import time
+
+from core.stage_runner import format_stage_report, run_stage
+
+
+def _sleep(seconds, value):
+    time.sleep(seconds)
+    return value
+
+
+def _boom():
+    raise RuntimeError("feed down")
+
+
+def test_fan_out_with_deadlines():
+    async def scenario():
+        t0 = time.perf_counter()
+        results = await asyncio.gather(
+            run_stage("technical", _sleep, 0.2, "data", timeout=1.0),
+            run_stage("backtest", _sleep, 0.2, "bt", timeout=1.0),
+            run_stage("news:NVDA", _sleep, 2.0, "late", timeout=0.3),
+            run_stage("consensus", _boom, timeout=1.0),
+            run_stage("skills_fit", None),
+        )
+        return results, time.perf_counter() - t0
+
+    results, elapsed = asyncio.run(scenario())
+    by_name = {r.name: r for r in results}
+    # Concurrent: bounded by the slowest deadline, not the sum of the stages
+    assert elapsed < 0.6
+    assert by_name["technical"].ok and by_name["technical"].value == "data"
+    assert by_name["news:NVDA"].status == "timeout" and by_name["news:NVDA"].value is None
+    assert by_name["consensus"].status == "error" and "feed down" in by_name["consensus"].error
+    assert by_name["skills_fit"].status == "skipped"
+
+    line = format_stage_report(by_name)
+    assert line.startswith("⏱ technical 0.2s ✓")
+    assert "news:NVDA 0.3s ✗ timeout" in line and "skills_fit –" in line
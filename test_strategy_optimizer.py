@@ -0,0 +1,96 @@
+"""
+StrategyOptimizer tests: search-space expansion, ranking, and process-pool results
+matching an in-process sweep on the same synthetic history.
+Walk-forward (backtester.walk_forward): window layout and no look-ahead.
+
+Run: python -m pytest -q test_strategy_optimizer.py
+"""
+
+import json
+
+import pytest
+
+from backtester import add_indicators, walk_forward, walk_forward_windows
+from strategy_optimizer import (
+    grid_combinations,
+    optimize_strategy,
+    random_combinations,
+    save_best_params,
+)
+
+
+@pytest.fixture
+def history(random_ohlcv):
+    return {f"SYM{i}": add_indicators(random_ohlcv(600, seed=i)) for i in range(2)}
+
+
+def test_search_spaces():
+    space = {"rsi_min": [30, 40], "rsi_max": [60, 70, 80]}
+    combos = grid_combinations(space)
+    assert len(combos) == 6
+    assert {"rsi_min": 40, "rsi_max": 80} in combos
+
+    draws = random_combinations({"rsi_min": (20, 50), "volume_ratio": (1.0, 3.0)}, 25, seed=1)
+    assert len(draws) == 25
+    assert len({tuple(sorted(d.items())) for d in draws}) == 25
+    assert all(isinstance(d["rsi_min"], int) and 20 <= d["rsi_min"] <= 50 for d in draws)
+    assert random_combinations({"x": (0.0, 1.0)}, 5, seed=3) == random_combinations({"x": (0.0, 1.0)}, 5, seed=3)
+
+
+def test_sweep_ranks_and_pool_matches_serial(history):
+    space = {
+        "donchian_period_short": [10, 20],
+        "donchian_period_long": [40, 55],
+        "week_52_threshold": [0.95, 1.0],
+    }
+    kwargs = dict(space=space, history=history, metric="total_return_pct", min_trades=0, top=100)
+    serial = optimize_strategy("Momentum Breakout (Donchian)", list(history), max_workers=0, **kwargs)
+    pooled = optimize_strategy("Momentum Breakout (Donchian)", list(history), max_workers=2, chunk_size=3, **kwargs)
+
+    assert serial["evaluated"] == pooled["evaluated"] == 8
+    returns = [r["metrics"]["total_return_pct"] for r in serial["results"]]
+    assert returns == sorted(returns, reverse=True)
+    assert [(r["params"], r["metrics"]) for r in serial["results"]] == [
+        (r["params"], r["metrics"]) for r in pooled["results"]
+    ]
+    # Indicator params must actually change the signals
+    assert len({r["metrics"]["trades"] for r in serial["results"]}) > 1
+
+
+def test_save_best_params_merges(tmp_path):
+    params_file = tmp_path / "strategy_params.json"
+    params_file.write_text(json.dumps({"EMA Crossover": {"rsi_min": 40, "volume_ratio": 1.5}}))
+    save_best_params("EMA Crossover", {"rsi_min": 35}, params_file)
+    assert json.loads(params_file.read_text()) == {"EMA Crossover": {"rsi_min": 35, "volume_ratio": 1.5}}
+
+
+def test_walk_forward_windows_tile_out_of_sample():
+    windows = walk_forward_windows(600, 200, 50)
+    assert windows[0] == ((41, 241), (241, 291))
+    outs = [w[1] for w in windows]
+    assert all(a[1] == b[0] for a, b in zip(outs, outs[1:]))
+    assert outs[-1][1] <= 600
+
+
+def test_walk_forward_has_no_look_ahead(history):
+    space = {"RSI Divergence": {"rsi_oversold": [25, 30, 35], "rsi_overbought": [65, 70, 75]}}
+    kwargs = dict(spaces=space, history=history, train_bars=200, test_bars=60, metric="total_return_pct", min_trades=0)
+    base = walk_forward(["RSI Divergence"], list(history), max_workers=0, **kwargs)["RSI Divergence"]
+    pooled = walk_forward(["RSI Divergence"], list(history), max_workers=2, **kwargs)["RSI Divergence"]
+    assert base["windows"] == pooled["windows"]
+    assert base["metrics"] == pooled["metrics"]
+    n_windows = len(base["windows"])
+    assert n_windows == len(walk_forward_windows(600, 200, 60))
+    assert len(base["equity_curves"]["SYM0"]) == n_windows * 60
+
+    # Rewriting every bar after the first out-of-sample window must not change that window
+    first_oos_end = walk_forward_windows(600, 200, 60)[0][1][1]
+    shocked = {}
+    for symbol, df in history.items():
+        raw = df[["Open", "High", "Low", "Close", "Volume"]].copy()
+        raw.iloc[first_oos_end:, :4] *= 0.5
+        shocked[symbol] = add_indicators(raw)
+    kwargs["history"] = shocked
+    after = walk_forward(["RSI Divergence"], list(shocked), max_workers=0, **kwargs)["RSI Divergence"]
+    assert after["windows"][0] == base["windows"][0]
+    assert after["equity_curves"]["SYM0"][:60] == base["equity_curves"]["SYM0"][:60]
@@ -0,0 +1,146 @@
+"""
+StrategyOrchestrator tests.
+- Concurrency: one shared orchestrator must give the same answers under thousands of
+  concurrent evaluations (threads and process pool) as a plain serial run.
+- Incremental consensus: re-evaluating only agents whose inputs changed must match a full run.
+
+Run: python -m pytest -q test_strategy_orchestrator.py
+"""
+
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+from strategy_orchestrator import StrategyOrchestrator
+
+N_EVALUATIONS = 3000
+
+
+def _random_market_data(rng: random.Random) -> dict:
+    """Plausible get_extended_stock_data()-shaped dict with all indicators the agents read."""
+    price = rng.uniform(5, 500)
+    ema_9 = price * rng.uniform(0.95, 1.05)
+    ema_21 = price * rng.uniform(0.93, 1.07)
+    support = price * rng.uniform(0.9, 1.0)
+    resistance = price * rng.uniform(1.0, 1.1)
+    bb_middle = price * rng.uniform(0.97, 1.03)
+    bb_width = price * rng.uniform(0.02, 0.08)
+    return {
+        "current_price": price,
+        "ema_5": price * rng.uniform(0.97, 1.03),
+        "ema_9": ema_9,
+        "ema_21": ema_21,
+        "rsi": rng.uniform(10, 90),
+        "volume_ratio": rng.uniform(0.3, 4.0),
+        "support": support,
+        "resistance": resistance,
+        "trend_en": rng.choice(["bullish", "bearish", "neutral"]),
+        "bb_upper": bb_middle + bb_width,
+        "bb_middle": bb_middle,
+        "bb_lower": bb_middle - bb_width,
+        "donchian_upper_20": resistance,
+        "donchian_lower_20": support,
+        "donchian_upper_40": resistance * 1.02,
+        "donchian_lower_40": support * 0.98,
+        "atr": price * rng.uniform(0.01, 0.05),
+        "week_52_high": resistance * rng.uniform(1.0, 1.3),
+        "week_52_low": support * rng.uniform(0.6, 1.0),
+    }
+
+
+def _inputs(n: int = N_EVALUATIONS, seed: int = 7):
+    rng = random.Random(seed)
+    return [(_random_market_data(rng), f"SYM{i % 7}") for i in range(n)]
+
+
+def _signal_tuples(orchestrator, market_data):
+    return [
+        (s.strategy_name, s.action, s.confidence, s.reasoning, s.entry_price, s.stop_loss, s.target)
+        for s in (agent.analyze(market_data) for agent in orchestrator.agents)
+    ]
+
+
+def test_shared_agents_are_reentrant_under_threads():
+    orchestrator = StrategyOrchestrator("skills")
+    items = _inputs()
+    expected = [_signal_tuples(orchestrator, md) for md, _ in items]
+
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        got = list(pool.map(lambda item: _signal_tuples(orchestrator, item[0]), items))
+
+    assert got == expected
+
+
+def test_thread_executor_consensus_is_deterministic():
+    serial = StrategyOrchestrator("skills")
+    threaded = StrategyOrchestrator("skills", executor="thread", max_workers=8)
+    items = _inputs()
+    expected = [serial.get_consensus_signal(md, sym) for md, sym in items]
+
+    try:
+        # Many chats hitting the same orchestrator at once, each fanning agents out
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            got = list(pool.map(lambda item: threaded.get_consensus_signal(*item), items))
+        assert got == expected
+        assert threaded.get_consensus_batch(items, chunk_size=128) == expected
+    finally:
+        threaded.shutdown()
+
+
+def test_process_executor_batch_matches_serial():
+    serial = StrategyOrchestrator("skills")
+    pooled = StrategyOrchestrator("skills", executor="process", max_workers=4)
+    items = _inputs(seed=11)
+    expected = [serial.get_consensus_signal(md, sym) for md, sym in items]
+
+    try:
+        # Single calls stay in-process; only batches use the pool
+        assert pooled.get_consensus_signal(*items[0]) == expected[0]
+        assert pooled._pool is None
+        assert pooled.get_consensus_batch(items, chunk_size=250) == expected
+    finally:
+        pooled.shutdown()
+
+
+def test_empty_inputs():
+    orchestrator = StrategyOrchestrator("skills", executor="thread")
+    try:
+        assert orchestrator.get_consensus_signal({}, "NVDA")["summary"] == "No agents or no data"
+        assert orchestrator.get_consensus_batch([]) == []
+    finally:
+        orchestrator.shutdown()
+
+
+def test_incremental_consensus_matches_full_run():
+    orchestrator = StrategyOrchestrator("skills")
+    rng = random.Random(5)
+    tick = _random_market_data(rng)
+    reevaluated = []
+    for _ in range(500):
+        # Live ticks: price always moves, other fields only sometimes
+        tick = dict(tick, current_price=tick["current_price"] * rng.uniform(0.995, 1.005))
+        if rng.random() < 0.3:
+            tick["volume_ratio"] = rng.uniform(0.3, 4.0)
+        if rng.random() < 0.1:
+            fresh = _random_market_data(rng)
+            tick = dict(fresh, current_price=tick["current_price"])
+        got = orchestrator.get_incremental_consensus(tick, "NVDA")
+        reevaluated.append(got.pop("reevaluated"))
+        assert got == orchestrator.get_consensus_signal(tick, "NVDA")
+
+    assert reevaluated[0] == len(orchestrator.agents)
+    # Agents whose rules never read the price are served from cache on price-only ticks
+    assert min(reevaluated[1:]) < len(orchestrator.agents)
+
+
+def test_incremental_consensus_reevaluates_on_param_change():
+    orchestrator = StrategyOrchestrator("skills")
+    tick = _random_market_data(random.Random(9))
+    orchestrator.get_incremental_consensus(tick, "PLTR")
+    assert orchestrator.get_incremental_consensus(tick, "PLTR")["reevaluated"] == 0
+
+    agent = orchestrator.agents[0]
+    agent.params["rsi_min"] = agent.params.get("rsi_min", 40) + 5
+    assert orchestrator.get_incremental_consensus(tick, "PLTR")["reevaluated"] == 1
+
+    orchestrator.invalidate_decision_cache("PLTR")
+    assert orchestrator.get_incremental_consensus(tick, "PLTR")["reevaluated"] == len(orchestrator.agents)
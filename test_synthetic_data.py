@@ -0,0 +1,56 @@
+"""
+Synthetic data provider tests: seeded and period-independent paths, intraday bars
+consistent with daily bars, and data_manager / backtester running offline on it.
+
+Run: python -m pytest -q test_synthetic_data.py
+"""
+
+import numpy as np
+
+from core.synthetic_data import SyntheticTicker, daily_bars, intraday_bars, set_provider
+
+END = "2025-06-30"
+
+
+def test_seeded_and_period_independent():
+    long = daily_bars("NVDA", 500, seed=1, end=END)
+    short = daily_bars("NVDA", 20, seed=1, end=END)
+    assert len(long) == 500 and len(short) == 20
+    assert short.equals(long.tail(20))
+    assert not daily_bars("NVDA", 20, seed=2, end=END).equals(short)
+    assert not daily_bars("AAPL", 20, seed=1, end=END)["Close"].equals(short["Close"])
+    assert (long["High"] >= long[["Open", "Close"]].max(axis=1)).all()
+    assert (long["Low"] <= long[["Open", "Close"]].min(axis=1)).all()
+    assert (long["Volume"] > 0).all()
+
+
+def test_intraday_matches_daily():
+    daily = daily_bars("TSLA", 3, seed=0, end=END)
+    bars = intraday_bars("TSLA", 3, seed=0, end=END, prepost=True)
+    assert len(bars) == 3 * 192
+    regular = bars.between_time("09:30", "15:55")
+    by_day = regular.groupby(regular.index.date)
+    assert np.allclose(by_day["Open"].first().values, daily["Open"].values)
+    assert np.allclose(by_day["Close"].last().values, daily["Close"].values)
+    assert np.allclose(by_day["High"].max().values, daily["High"].values)
+    assert np.allclose(by_day["Low"].min().values, daily["Low"].values)
+    # Pre-market starts from the previous close
+    assert np.isclose(bars["Open"].iloc[192], daily["Close"].iloc[0])
+
+    ticker = SyntheticTicker("TSLA", seed=0, end=END)
+    assert len(ticker.history(period="5d", interval="15m")) == 3 * 26
+
+
+def test_data_manager_and_backtester_offline():
+    from backtester import fetch_historical
+    from core.data_manager import get_extended_stock_data
+
+    set_provider("synthetic", seed=3)
+    try:
+        data = get_extended_stock_data("ZZZZ", use_cache=False)
+        assert data["data_source"].startswith("Synthetic")
+        assert data["current_price"] > 0 and 0 <= data["rsi"] <= 100
+        df = fetch_historical("ZZZZ", 120)
+        assert df is not None and "ema_21" in df.columns
+    finally:
+        set_provider(None)
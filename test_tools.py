@@ -0,0 +1,26 @@
+"""
+Function-calling tool tests: one round of tool calls runs concurrently, in order, under a timeout.
+
+Run: python -m pytest -q test_tools.py
+"""
+
+import asyncio
+import time
+
+from agents.tools import execute_tools
+
+
+def test_execute_tools_concurrent_ordered_with_timeout():
+    def slow_data(symbol):
+        time.sleep({"NVDA": 0.3, "AMD": 0.1, "TSLA": 0.2}.get(symbol, 2.0))
+        return None
+
+    calls = [("get_stock_data", {"symbol": s}) for s in ("NVDA", "AMD", "TSLA")] + [("nope", {})]
+    t0 = time.perf_counter()
+    results = asyncio.run(execute_tools(calls, get_stock_data_fn=slow_data))
+    assert time.perf_counter() - t0 < 0.5  # max, not sum (0.6s)
+    assert results == ["NVDA: No data.", "AMD: No data.", "TSLA: No data.", "Unknown tool: nope"]
+
+    calls = [("get_stock_data", {"symbol": "SLOW"}), ("get_stock_data", {"symbol": "AMD"})]
+    results = asyncio.run(execute_tools(calls, get_stock_data_fn=slow_data, timeout=0.3))
+    assert results[0].startswith("Error: get_stock_data timed out") and results[1] == "AMD: No data."
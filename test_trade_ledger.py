@@ -0,0 +1,47 @@
+"""
+Trade ledger tests: JSON migration, open-position lookup, closing, win rate and strategy totals.
+
+Run: python -m pytest -q test_trade_ledger.py
+"""
+
+import json
+
+from core.trade_ledger import TradeLedger
+
+
+def _ledger(tmp_path, trades=None):
+    json_file = tmp_path / "trades_history.json"
+    if trades is not None:
+        json_file.write_text(json.dumps(trades))
+    return TradeLedger(tmp_path / "trades.db", json_file=json_file)
+
+
+def test_migrates_json_once_and_keeps_extra_fields(tmp_path):
+    trades = [
+        {"id": "1", "symbol": "NVDA", "entry_price": 100.0, "quantity": 10, "strategy": "EMA Crossover",
+         "status": "closed", "profit": 50.0, "date": "2025-03-03 10:00:00"},
+        {"date": "2025-03-04 10:00", "type": "buy", "symbol": "AMD", "price": 90.0, "quantity": 5,
+         "strategy": "Reversal", "status": "open", "profit": 0},
+    ]
+    ledger = _ledger(tmp_path, trades)
+    assert [{k: v for k, v in t.items() if k != "seq"} for t in ledger.all()] == trades
+    ledger.close()
+    # Reopening does not import again
+    assert len(_ledger(tmp_path).all()) == 2
+
+
+def test_open_trade_close_and_aggregates(tmp_path):
+    ledger = _ledger(tmp_path)
+    ledger.add({"symbol": "NVDA", "entry_price": 100.0, "quantity": 10, "strategy": "EMA Crossover", "status": "open"})
+    latest = ledger.add({"symbol": "NVDA", "entry_price": 110.0, "quantity": 1, "strategy": "Reversal", "status": "open"})
+    ledger.add({"symbol": "AMD", "entry_price": 90.0, "quantity": 5, "strategy": "Reversal", "status": "open"})
+
+    trade = ledger.open_trade("NVDA")
+    assert trade["seq"] == latest and trade["entry_price"] == 110.0
+    assert ledger.close_trade(trade["seq"], 105.0, -5.0, -4.5, "2025-03-05 15:00:00")
+    assert not ledger.close_trade(trade["seq"], 105.0, -5.0, -4.5, "2025-03-05 15:00:00")  # already closed
+    ledger.close_trade(ledger.open_trade("AMD")["seq"], 99.0, 45.0, 10.0, "2025-03-05 15:30:00")
+
+    assert [t["symbol"] for t in ledger.open_positions()] == ["NVDA"]
+    assert ledger.win_rate() == (50.0, 1, 2)
+    assert ledger.strategy_stats() == {"Reversal": {"trades": 2, "wins": 1, "losses": 1, "profit": 40.0}}
@@ -41,10 +41,11 @@ from core import (
     STRATEGIES_FILE,
     load_config,
     save_config,
-    load_trades,
-    save_trades,
+    save_trade,
     load_strategies,
 )
+from core import rollups
+from core.trade_ledger import get_ledger
 from intent_detector import resolve_symbol
 
 # ===== Telegram Bot =====
@@ -185,7 +186,7 @@ h1 {
 # ===== 加载数据 =====
 config = load_config()
 strategies = load_strategies()
-trades = load_trades()
+ledger = get_ledger()  # trades + P&L rollups (core/trade_ledger.py, core/rollups.py)
 
 # ===== Sidebar: quick lookup + nav =====
 with st.sidebar:
@@ -222,15 +223,14 @@ if nav_tab == "📊 Dashboard":
         progress = min(config["weekly_profit"] / config["weekly_goal"] * 100, 100)
         st.metric("💰 Week", f"${config['weekly_profit']:,.0f}", f"{progress:.0f}%")
     with col2:
-        today_trades = [t for t in trades if t.get('date', '').startswith(datetime.now().strftime('%Y-%m-%d'))]
-        st.metric("📅 Today", f"${sum([t.get('profit', 0) for t in today_trades]):,.0f}", f"{len(today_trades)} trades")
+        today = ledger.current("day")
+        st.metric("📅 Today", f"${today['pnl']:,.0f}", f"{today['count']} closed")
     with col3:
-        open_pos = [t for t in trades if t.get('status') == 'open']
+        open_pos = ledger.open_positions()
         st.metric("💼 Positions", len(open_pos), f"Max {config['risk']['max_position_pct']}%")
     with col4:
-        closed = [t for t in trades if t.get('status') == 'closed']
-        wr = (len([t for t in closed if t.get('profit', 0) > 0]) / len(closed) * 100) if closed else 0
-        st.metric("📊 Win Rate", f"{wr:.1f}%", f"{len(closed)} trades")
+        overall = ledger.current("all")
+        st.metric("📊 Win Rate", f"{rollups.win_rate(overall):.1f}%", f"{overall['count']} trades")
     
     st.divider()
     
@@ -459,9 +459,8 @@ elif nav_tab == "📋 Journal":
                 "status": "open" if trade_type == "Buy" else "closed",
                 "profit": 0 if trade_type == "Buy" else None
             }
-            trades.append(new_trade)
             try:
-                if save_trades(trades):
+                if save_trade(new_trade):
                     st.success(f"✅ {trade_type} recorded!")
                     st.rerun()
                 else:
@@ -471,8 +470,9 @@ elif nav_tab == "📋 Journal":
     
     with col2:
         st.subheader("📜 Recent Trades")
-        if trades:
-            for trade in trades[-5:]:
+        recent_trades = ledger.recent(5)
+        if recent_trades:
+            for trade in recent_trades:
                 st.markdown(f"**{trade.get('symbol')}** - ${trade.get('price'):.2f} × {trade.get('quantity')}")
                 st.caption(f"{trade.get('date')} | {trade.get('strategy')}")
         else:
@@ -542,15 +542,13 @@ elif nav_tab == "📊 Analytics":
         progress_pct = min(config['weekly_profit'] / config['weekly_goal'], 1.0) if config['weekly_goal'] else 0
         st.progress(progress_pct)
         st.metric("Weekly Progress", f"${config['weekly_profit']:,.0f} / ${config['weekly_goal']:,.0f}", f"{progress_pct*100:.0f}%")
+    overall = ledger.current("all")
     with col2:
-        closed = [t for t in trades if t.get('status') == 'closed']
-        wins = len([t for t in closed if (t.get('profit') or 0) > 0])
-        total = len(closed)
-        wr = (wins / total * 100) if total > 0 else 0
-        st.metric("Win Rate", f"{wr:.1f}%", f"{wins}/{total} trades")
+        st.metric("Win Rate", f"{rollups.win_rate(overall):.1f}%", f"{overall['wins']}/{overall['count']} trades")
     with col3:
-        total_pnl = sum(t.get('profit', 0) or 0 for t in closed)
-        st.metric("Total P&L (closed)", f"${total_pnl:,.2f}", "")
+        sharpe = rollups.sharpe(overall)
+        st.metric("Total P&L (closed)", f"${overall['pnl']:,.2f}",
+                  f"Max DD ${overall['max_drawdown']:,.0f}" + (f" · Sharpe {sharpe:.2f}" if sharpe is not None else ""))
     
     st.divider()
     
@@ -562,35 +560,29 @@ elif nav_tab == "📊 Analytics":
             create_daily_pnl_chart,
             create_win_rate_by_strategy_chart,
         )
-        # Normalize trade keys for charts (support both 'price' and 'entry_price')
-        trades_for_charts = []
-        for t in trades:
-            tc = dict(t)
-            if 'profit' not in tc and t.get('status') == 'closed':
-                tc['profit'] = 0
-            if 'exit_date' not in tc and t.get('status') == 'closed':
-                tc['exit_date'] = t.get('date', '')
-            trades_for_charts.append(tc)
+        # Daily / per-strategy rollups instead of rebuilding from every trade
+        daily_pnl = {day: b["pnl"] for day, b in ledger.buckets("day").items()}
+        strategy_stats = ledger.strategy_stats() or strategies
         
         st.subheader("📈 Equity Curve")
-        fig_equity = create_equity_curve(trades_for_charts, config.get('weekly_goal'))
+        fig_equity = create_equity_curve([], config.get('weekly_goal'), daily=daily_pnl)
         if fig_equity:
             st.plotly_chart(fig_equity, use_container_width=True)
         
         st.subheader("📊 Strategy Performance")
-        fig_strat = create_strategy_performance_chart(strategies)
+        fig_strat = create_strategy_performance_chart(strategy_stats)
         if fig_strat:
             st.plotly_chart(fig_strat, use_container_width=True)
         
         c1, c2 = st.columns(2)
         with c1:
             st.subheader("📅 Daily P&L")
-            fig_daily = create_daily_pnl_chart(trades_for_charts)
+            fig_daily = create_daily_pnl_chart([], daily=daily_pnl)
             if fig_daily:
                 st.plotly_chart(fig_daily, use_container_width=True)
         with c2:
             st.subheader("🎯 Win Rate by Strategy")
-            fig_wr = create_win_rate_by_strategy_chart(strategies)
+            fig_wr = create_win_rate_by_strategy_chart(strategy_stats)
             if fig_wr:
                 st.plotly_chart(fig_wr, use_container_width=True)
     except ImportError as e: